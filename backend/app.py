@@ -3,12 +3,33 @@ FastAPI Application
 Main application file for the WearWhat backend API.
 """
 
+import asyncio
+import logging
+import os
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from endpoints.authentication.routes import router as authentication_router
 from endpoints.outfit.routes import router as outfit_router
 from endpoints.weekly import router as weekly_router
 from endpoints.chat import router as chat_router
+from endpoints.admin import router as admin_router
+from batch_planner import BATCH_SCHEDULER_ENABLED, run_scheduler
+from observability import registry, RequestMetricsMiddleware, PROMETHEUS_CONTENT_TYPE
+from observability.profiler import RequestProfilerMiddleware, PROFILER_ENABLED
+from auth.rate_limit import login_guard
+from outfit_chat import chat_response_cache
+from mongodb_uploader import weekly_plan_cache, backfill_tag_index
+from image_composer import tile_cache
+from image_ingest import UploadSizeLimitMiddleware, upload_limiter, MAX_UPLOAD_BYTES
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -17,6 +38,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Reject oversized uploads from their Content-Length before the body is read
+# (with room for the multipart framing around the file). Added first, so it
+# runs inside CORS and the request metrics and its 413 carries CORS headers
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES + 64 * 1024, path_prefixes=["/outfit/upload-outfit"])
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -26,11 +52,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency by route; added after CORS so it also times CORS handling
+app.add_middleware(RequestMetricsMiddleware)
+
+# Per-request profiling via the X-Profile-Request header, for admins only
+if PROFILER_ENABLED:
+    app.add_middleware(RequestProfilerMiddleware)
+
+registry.register_collector("wearwhat_login_rejections", "Rejected login attempts by reason.", login_guard.get_metrics)
+registry.register_collector("wearwhat_chat_cache", "Chat response cache counters and latencies.", chat_response_cache.get_metrics)
+registry.register_collector("wearwhat_weekly_plan_cache", "Weekly plan read cache counters.", weekly_plan_cache.get_metrics)
+registry.register_collector("wearwhat_uploads", "Upload decodes running or waiting, and uploads rejected as busy.", upload_limiter.get_metrics)
+registry.register_collector("wearwhat_tile_cache", "Composite cell tile cache lookups and coverage.", tile_cache.get_metrics)
+
 # Include routers
 app.include_router(authentication_router)
 app.include_router(outfit_router)
 app.include_router(weekly_router)
 app.include_router(chat_router)
+app.include_router(admin_router)
+
+
+@app.on_event("startup")
+async def start_batch_planner():
+    """Start the nightly weekly plan pre-generation if enabled"""
+    if BATCH_SCHEDULER_ENABLED:
+        app.state.batch_planner_task = asyncio.create_task(run_scheduler())
+
+
+@app.on_event("startup")
+async def start_tag_index_backfill():
+    """Index the tags of items stored before the tag index existed, without delaying startup"""
+    async def backfill():
+        try:
+            updated = await asyncio.to_thread(backfill_tag_index)
+            if updated:
+                logger.info("Backfilled the tag index of %d items", updated)
+        except Exception as e:
+            logger.warning("Failed to backfill the tag index: %s", e)
+
+    app.state.tag_index_backfill_task = asyncio.create_task(backfill())
 
 
 @app.get("/")
@@ -39,6 +100,12 @@ async def root():
     return {"message": "Wearwhat Backend 1.0.0"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Metrics in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -1,24 +1,53 @@
 import jwt
 from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 from dotenv import load_dotenv
 import os
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
+# When enabled, tokens carry the user's profile as signed claims so that
+# require_user can authenticate requests without a database lookup
+STATELESS_AUTH_ENABLED = os.getenv("STATELESS_AUTH_ENABLED", "false").lower() in ("1", "true", "yes")
 
 
-def issue_token(user_id: str):
+def get_session_timeout_seconds() -> int:
     # Default to 1 hour (3600 seconds) if not set
-    session_timeout_seconds = int(os.getenv('SESSION_TIMEOUT_SECONDS', '3600'))
+    return int(os.getenv('SESSION_TIMEOUT_SECONDS', '3600'))
+
+
+def issue_token(user_id: str, profile: dict | None = None):
+    now = datetime.now(timezone.utc)
     payload = {
         "user_id": user_id,
-        "exp": datetime.now(timezone.utc) + timedelta(seconds=session_timeout_seconds)
+        # Fractional, like the revocation cutoff it is compared with in RevocationList.is_revoked
+        "iat": now.timestamp(),
+        "exp": now + timedelta(seconds=get_session_timeout_seconds())
     }
+    if STATELESS_AUTH_ENABLED and profile:
+        payload.update({
+            "jti": str(uuid4()),
+            "username": profile.get("username"),
+            "email": profile.get("email"),
+            "location": profile.get("location"),
+        })
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
 
+def profile_from_claims(decoded: dict) -> dict | None:
+    """Return the profile embedded in a decoded token, or None if it carries no profile claims."""
+    if not STATELESS_AUTH_ENABLED or "jti" not in decoded or "email" not in decoded:
+        return None
+    return {
+        "user_id": str(decoded.get("user_id")),
+        "username": decoded.get("username"),
+        "email": decoded.get("email"),
+        "location": decoded.get("location"),
+    }
+
+
 def verify_cookie(token: str):
     try:
         decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         return f"Authenticated user {decoded['user_id']}"
     except jwt.ExpiredSignatureError:
-        return "Token expired"
\ No newline at end of file
+        return "Token expired"
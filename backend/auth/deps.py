@@ -1,10 +1,25 @@
-from fastapi import Cookie, HTTPException, status
+from fastapi import Cookie, HTTPException, Request, status
 import jwt
-from auth.cookie_utils import SECRET_KEY
-from auth.user_db import get_user_by_id
+from auth.cookie_utils import SECRET_KEY, profile_from_claims
+from auth.revocation import revocation_list
+from auth.user_db import get_user_profile
 
 
-def require_user(auth_token: str | None = Cookie(default=None)):
+def require_user(request: Request, auth_token: str | None = Cookie(default=None)):
+    """
+    Resolve the authenticated user's profile from the auth cookie.
+
+    When the token carries signed profile claims (STATELESS_AUTH_ENABLED) the
+    profile is taken from the claims after an in-memory revocation check, with
+    no database round trip. Otherwise the profile (user_id, username, email,
+    location) is loaded with a single projected lookup (or from the short-TTL
+    user cache). Either way it is stored on request.state.user so downstream
+    code never has to fetch the user again.
+    """
+    cached_user = getattr(request.state, "user", None)
+    if cached_user is not None:
+        return cached_user
+
     if not auth_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No auth cookie")
     try:
@@ -15,9 +30,16 @@ def require_user(auth_token: str | None = Cookie(default=None)):
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = get_user_by_id(user_id)
+    claims_profile = profile_from_claims(decoded)
+    if claims_profile is not None:
+        if revocation_list.is_revoked(decoded.get("jti"), user_id, decoded.get("iat", 0)):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
+        request.state.user = claims_profile
+        return claims_profile
+
+    user = get_user_profile(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    uid, username, email = user
-    return {"user_id": uid, "username": username, "email": email}
+    request.state.user = user
+    return user
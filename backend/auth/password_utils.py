@@ -1,24 +1,52 @@
 """
 Password Utilities
 Handles password hashing and verification using bcrypt.
+
+bcrypt is deliberately slow, so async callers should use the *_async
+variants, which run the work on a dedicated, size-limited thread pool
+instead of blocking the event loop.
 """
 
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
 import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Work factor for new hashes; existing hashes with a different cost are
+# upgraded transparently on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dedicated to bcrypt (bcrypt releases the GIL while hashing)
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 1)))
+# Hashing jobs allowed to wait for a thread before new ones are shed
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_WORKERS * 4)))
 
 
-def hash_password(password: str) -> str:
+class PasswordHashingBusyError(Exception):
+    """Raised when the hashing pool is saturated and the request should be retried later."""
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
     """
     Hash a password using bcrypt.
-    
+
     Args:
         password: Plain text password to hash.
-    
+        rounds: bcrypt cost factor.
+
     Returns:
         Hashed password as a string.
     """
     hashed_bytes = bcrypt.hashpw(
         password.encode("utf-8"),
-        bcrypt.gensalt(rounds=12)
+        bcrypt.gensalt(rounds=rounds)
     )
     return hashed_bytes.decode("utf-8")
 
@@ -26,11 +54,11 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, password_hash: str) -> bool:
     """
     Verify a password against its hash.
-    
+
     Args:
         password: Plain text password to verify.
         password_hash: Hashed password to compare against.
-    
+
     Returns:
         True if password matches, False otherwise.
     """
@@ -39,3 +67,83 @@ def verify_password(password: str, password_hash: str) -> bool:
         password_hash.encode("utf-8")
     )
 
+
+def needs_rehash(password_hash: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    """
+    Check whether a hash was created with a different cost than configured.
+
+    Args:
+        password_hash: bcrypt hash in modular crypt format ($2b$12$...).
+        rounds: The currently configured cost factor.
+
+    Returns:
+        True if the hash should be recomputed with the configured cost.
+    """
+    try:
+        return int(password_hash.split("$")[2]) != rounds
+    except (IndexError, ValueError):
+        return False
+
+
+class PasswordHashingPool:
+    """
+    Bounded executor for bcrypt work with queue-length-based load shedding.
+
+    At most max_workers hashes run at once and at most max_pending more may
+    wait; beyond that submit raises PasswordHashingBusyError instead of
+    letting latency grow without bound.
+    """
+
+    def __init__(self, max_workers: int = BCRYPT_WORKERS, max_pending: int = BCRYPT_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """Number of jobs running or waiting."""
+        return self._in_flight
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Run func(*args) on the pool.
+
+        Raises:
+            PasswordHashingBusyError: If the pool is saturated.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                raise PasswordHashingBusyError("Too many concurrent authentication requests")
+            self._in_flight += 1
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+
+hashing_pool = PasswordHashingPool()
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the bcrypt pool.
+
+    Raises:
+        PasswordHashingBusyError: If the pool is saturated.
+    """
+    return await hashing_pool.run(hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """
+    Verify a password on the bcrypt pool.
+
+    Raises:
+        PasswordHashingBusyError: If the pool is saturated.
+    """
+    return await hashing_pool.run(verify_password, password, password_hash)
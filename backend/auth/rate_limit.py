@@ -0,0 +1,271 @@
+"""
+Login Rate Limiting
+Token-bucket rate limiting per email and per client IP, plus a short
+negative cache for unknown emails, so abusive login bursts are rejected
+before any database or bcrypt work is done.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "memory" keeps buckets and unknown emails per worker; "mongo" shares them across workers
+LOGIN_RATE_LIMIT_BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")
+LOGIN_EMAIL_BURST = int(os.getenv("LOGIN_EMAIL_BURST", "5"))
+LOGIN_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_EMAIL_PER_MINUTE", "5"))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+UNKNOWN_EMAIL_CACHE_TTL_SECONDS = float(os.getenv("UNKNOWN_EMAIL_CACHE_TTL_SECONDS", "60"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+RATE_LIMITS_COLLECTION_NAME = "rate_limits"
+
+
+class LoginRateLimitedError(Exception):
+    """Raised when a login attempt exceeds its rate limit."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InMemoryBucketBackend:
+    """Token buckets stored per worker process, bounded by LRU eviction."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: int, refill_per_second: float) -> Tuple[bool, float]:
+        """
+        Try to take one token from the bucket at key.
+
+        Returns:
+            Tuple of (allowed, tokens remaining).
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+            tokens = min(float(capacity), tokens + (now - updated_at) * refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class MongoBucketBackend:
+    """
+    Token buckets shared by all workers through MongoDB.
+
+    Each check is a single atomic find_one_and_update with an update
+    pipeline that refills, tests and decrements the bucket server-side.
+    """
+
+    def __init__(self):
+        from auth.user_db import database
+
+        self.collection = database[RATE_LIMITS_COLLECTION_NAME]
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception:
+            pass  # Index might already exist
+
+    def take(self, key: str, capacity: int, refill_per_second: float) -> Tuple[bool, float]:
+        """
+        Try to take one token from the bucket at key.
+
+        Returns:
+            Tuple of (allowed, tokens remaining).
+        """
+        now = time.time()
+        # A bucket left alone this long is full again and can be dropped
+        idle_ms = int(capacity / refill_per_second * 1000) if refill_per_second > 0 else 86400000
+        pipeline = [
+            {"$set": {
+                "tokens": {"$min": [capacity, {"$add": [
+                    {"$ifNull": ["$tokens", capacity]},
+                    {"$multiply": [{"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}]}, refill_per_second]}
+                ]}]},
+                "updated_at": now
+            }},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {"$set": {
+                "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                "expires_at": {"$add": ["$$NOW", idle_ms]}
+            }},
+        ]
+        bucket = self.collection.find_one_and_update(
+            {"_id": key},
+            pipeline,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return bucket["allowed"], bucket["tokens"]
+
+
+class UnknownEmailCache:
+    """Remembers emails with no account for a short time."""
+
+    def __init__(self, ttl_seconds: float = UNKNOWN_EMAIL_CACHE_TTL_SECONDS, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, email: str) -> None:
+        with self._lock:
+            self._entries[email] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def discard(self, email: str) -> None:
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def __contains__(self, email: str) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(email)
+            if expires_at is None:
+                return False
+            if expires_at < time.monotonic():
+                del self._entries[email]
+                return False
+            return True
+
+
+class MongoUnknownEmailCache:
+    """
+    Remembers emails with no account for a short time, shared by all workers.
+
+    Entries are stored next to the token buckets and expire through the same
+    TTL index; since that index is only swept periodically, reads also check
+    the expiry themselves.
+    """
+
+    def __init__(self, collection, ttl_seconds: float = UNKNOWN_EMAIL_CACHE_TTL_SECONDS):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _key(email: str) -> str:
+        return f"login:unknown:{email}"
+
+    def add(self, email: str) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        self.collection.update_one({"_id": self._key(email)}, {"$set": {"expires_at": expires_at}}, upsert=True)
+
+    def discard(self, email: str) -> None:
+        self.collection.delete_one({"_id": self._key(email)})
+
+    def __contains__(self, email: str) -> bool:
+        entry = self.collection.find_one(
+            {"_id": self._key(email), "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            {"_id": 1}
+        )
+        return entry is not None
+
+
+class LoginGuard:
+    """
+    Pre-authentication checks for the login endpoint.
+
+    Rejections are counted by reason so they can be exported as metrics.
+    With the mongo backend every check makes blocking database calls, so
+    async code should run it on a worker thread.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or _create_backend()
+        self.unknown_emails = _create_unknown_email_cache(self.backend)
+        self.rejections: Dict[str, int] = {"ip_rate_limited": 0, "email_rate_limited": 0, "unknown_email": 0}
+        self._lock = threading.Lock()
+
+    def _reject(self, reason: str) -> None:
+        with self._lock:
+            self.rejections[reason] += 1
+
+    def check(self, email: str, client_ip: str) -> bool:
+        """
+        Run the rate limits and negative cache for a login attempt.
+
+        Args:
+            email: The email the client is trying to log in with.
+            client_ip: The client's IP address.
+
+        Returns:
+            False if the email is known not to exist, True if the attempt may proceed.
+
+        Raises:
+            LoginRateLimitedError: If the IP or email exceeded its rate limit.
+        """
+        ip_refill = LOGIN_IP_PER_MINUTE / 60
+        allowed, tokens = self.backend.take(f"login:ip:{client_ip}", LOGIN_IP_BURST, ip_refill)
+        if not allowed:
+            self._reject("ip_rate_limited")
+            raise LoginRateLimitedError("Too many login attempts", _retry_after(tokens, ip_refill))
+
+        # Keyed exactly like the users collection lookup, which is case-sensitive
+        if email in self.unknown_emails:
+            self._reject("unknown_email")
+            return False
+
+        email_refill = LOGIN_EMAIL_PER_MINUTE / 60
+        allowed, tokens = self.backend.take(f"login:email:{normalize_email(email)}", LOGIN_EMAIL_BURST, email_refill)
+        if not allowed:
+            self._reject("email_rate_limited")
+            raise LoginRateLimitedError("Too many login attempts", _retry_after(tokens, email_refill))
+
+        return True
+
+    def record_unknown_email(self, email: str) -> None:
+        """Remember that no account exists for email."""
+        self.unknown_emails.add(email)
+
+    def forget_unknown_email(self, email: str) -> None:
+        """Forget a cached unknown email, e.g. after it signs up."""
+        self.unknown_emails.discard(email)
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Return a snapshot of rejection counts by reason."""
+        with self._lock:
+            return dict(self.rejections)
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def _retry_after(tokens: float, refill_per_second: float) -> float:
+    if refill_per_second <= 0:
+        return 60.0
+    return max(0.0, (1 - tokens) / refill_per_second)
+
+
+def _create_backend():
+    if LOGIN_RATE_LIMIT_BACKEND == "mongo":
+        return MongoBucketBackend()
+    return InMemoryBucketBackend()
+
+
+def _create_unknown_email_cache(backend):
+    # Unknown emails live where the buckets do, so a signup clears them for every worker
+    if isinstance(backend, MongoBucketBackend):
+        return MongoUnknownEmailCache(backend.collection)
+    return UnknownEmailCache()
+
+
+login_guard = LoginGuard()
@@ -0,0 +1,160 @@
+"""
+Token Revocation
+Keeps a revocation list for stateless auth tokens in MongoDB and mirrors it
+in memory so token checks never need a database round trip.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from pymongo.collection import Collection
+from dotenv import load_dotenv
+
+from auth.user_db import database
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REVOKED_TOKENS_COLLECTION_NAME = "revoked_tokens"
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "15"))
+
+revoked_tokens_collection: Collection = database[REVOKED_TOKENS_COLLECTION_NAME]
+
+# Entries expire together with the tokens they revoke
+try:
+    revoked_tokens_collection.create_index("expires_at", expireAfterSeconds=0)
+except Exception:
+    pass  # Index might already exist
+
+
+class RevocationList:
+    """
+    In-memory mirror of the revoked_tokens collection.
+
+    Two kinds of entries are supported:
+    - token: a single token revoked by its jti (logout)
+    - user: every token of a user issued before not_before (account deletion)
+
+    The mirror is reloaded at most every REVOCATION_REFRESH_SECONDS, so a
+    revocation made by another worker takes effect within one refresh interval.
+    Revocations made by this worker take effect immediately. The collection is
+    read without holding the lock, so revocations never wait for a refresh.
+    """
+
+    def __init__(self, refresh_seconds: float = REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._revoked_jtis: Dict[str, float] = {}
+        self._user_not_before: Dict[str, float] = {}
+        self._loaded_at = 0.0
+        # Revocations made by this worker while a refresh reads the collection,
+        # re-applied to what it read; None when no refresh is running
+        self._recent_jtis: Optional[Dict[str, float]] = None
+        self._recent_users: Optional[Dict[str, float]] = None
+        # Guards the mirror, held only to swap or update it
+        self._lock = threading.Lock()
+        # Lets one thread at a time refresh; the others keep using the current mirror
+        self._refresh_lock = threading.Lock()
+
+    def _refresh_if_stale(self) -> None:
+        if time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        # Until the first load there is no mirror to fall back on, so wait for it
+        if not self._refresh_lock.acquire(blocking=self._loaded_at == 0.0):
+            return
+        try:
+            if time.monotonic() - self._loaded_at < self.refresh_seconds:
+                return
+            with self._lock:
+                self._recent_jtis = {}
+                self._recent_users = {}
+            revoked_jtis = {}
+            user_not_before = {}
+            try:
+                for entry in revoked_tokens_collection.find({}, {"_id": 0}):
+                    if entry.get("kind") == "user":
+                        user_not_before[entry["user_id"]] = entry["not_before"]
+                    else:
+                        revoked_jtis[entry["jti"]] = entry["expires_at"].timestamp()
+            except Exception as e:
+                logger.warning("Failed to refresh token revocation list: %s", e)
+                revoked_jtis = user_not_before = None
+            with self._lock:
+                if revoked_jtis is not None:
+                    revoked_jtis.update(self._recent_jtis)
+                    user_not_before.update(self._recent_users)
+                    self._revoked_jtis = revoked_jtis
+                    self._user_not_before = user_not_before
+                self._recent_jtis = self._recent_users = None
+                self._loaded_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def is_revoked(self, jti: Optional[str], user_id: str, issued_at: float) -> bool:
+        """
+        Check whether a token has been revoked.
+
+        Args:
+            jti: The token's unique id claim.
+            user_id: The user the token was issued to.
+            issued_at: The token's iat claim as a unix timestamp.
+
+        Returns:
+            True if the token must be rejected.
+        """
+        self._refresh_if_stale()
+        if jti and jti in self._revoked_jtis:
+            return True
+        not_before = self._user_not_before.get(user_id)
+        return not_before is not None and issued_at <= not_before
+
+    def revoke_token(self, jti: str, expires_at: datetime) -> None:
+        """
+        Revoke a single token until it would have expired anyway.
+
+        Args:
+            jti: The token's unique id claim.
+            expires_at: The token's expiry time.
+        """
+        revoked_tokens_collection.update_one(
+            {"kind": "token", "jti": jti},
+            {"$set": {"kind": "token", "jti": jti, "expires_at": expires_at}},
+            upsert=True
+        )
+        with self._lock:
+            self._revoked_jtis[jti] = expires_at.timestamp()
+            if self._recent_jtis is not None:
+                self._recent_jtis[jti] = expires_at.timestamp()
+
+    def revoke_user(self, user_id: str, max_token_lifetime_seconds: int) -> None:
+        """
+        Revoke every token issued to a user up to now.
+
+        Args:
+            user_id: The user whose tokens should be rejected.
+            max_token_lifetime_seconds: How long tokens issued now could stay valid.
+        """
+        now = time.time()
+        revoked_tokens_collection.update_one(
+            {"kind": "user", "user_id": user_id},
+            {
+                "$set": {
+                    "kind": "user",
+                    "user_id": user_id,
+                    "not_before": now,
+                    "expires_at": datetime.fromtimestamp(now + max_token_lifetime_seconds, tz=timezone.utc)
+                }
+            },
+            upsert=True
+        )
+        with self._lock:
+            self._user_not_before[user_id] = now
+            if self._recent_users is not None:
+                self._recent_users[user_id] = now
+
+
+revocation_list = RevocationList()
@@ -0,0 +1,89 @@
+"""
+User Profile Cache
+Short-lived in-process cache of projected user profiles keyed by user_id.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+
+class UserProfileCache:
+    """
+    Thread-safe TTL cache with LRU eviction for user profiles.
+
+    Entries are only trusted for a few seconds, so profile changes made by
+    another worker become visible after at most one TTL.
+    """
+
+    def __init__(self, ttl_seconds: float = USER_CACHE_TTL_SECONDS, max_entries: int = USER_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached profile for user_id, or None if missing or expired.
+
+        Args:
+            user_id: The user_id to look up.
+
+        Returns:
+            A copy of the cached profile dict, or None.
+        """
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, profile = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return dict(profile)
+
+    def set(self, user_id: str, profile: Dict[str, Any]) -> None:
+        """
+        Store a profile for user_id.
+
+        Args:
+            user_id: The user_id the profile belongs to.
+            profile: The projected profile dict.
+        """
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, dict(profile))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        """
+        Drop any cached profile for user_id.
+
+        Args:
+            user_id: The user_id to evict.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Drop all cached profiles."""
+        with self._lock:
+            self._entries.clear()
+
+
+user_profile_cache = UserProfileCache()
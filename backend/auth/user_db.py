@@ -4,19 +4,22 @@ Handles user CRUD operations in MongoDB.
 """
 
 import os
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from pymongo.collection import Collection
 from pymongo.database import Database
 from dotenv import load_dotenv
-from auth.password_utils import hash_password, verify_password
+from observability import mongo_command_listener
+from auth.password_utils import hash_password_async, verify_password_async, needs_rehash
+from auth.user_cache import user_profile_cache
 
 load_dotenv()
 
 # MongoDB connection setup
-mongodb_client = MongoClient(os.getenv("MONGODB_URI"))
+mongodb_client = MongoClient(os.getenv("MONGODB_URI"), event_listeners=[mongo_command_listener])
 DB_NAME = "WearWhat"
 USERS_COLLECTION_NAME = "users"
 
@@ -28,6 +31,16 @@ if USERS_COLLECTION_NAME not in database.list_collection_names():
 
 users_collection: Collection = database[USERS_COLLECTION_NAME]
 
+
+class UserNotFoundError(ValueError):
+    """Raised when no user exists for the given email."""
+
+
+# Fields needed by request handlers; never load the password hash for them
+USER_PROFILE_PROJECTION = {"_id": 0, "user_id": 1, "username": 1, "email": 1, "location": 1}
+# Profile fields plus the password hash, for login
+LOGIN_PROJECTION = {**USER_PROFILE_PROJECTION, "password": 1}
+
 # Drop unique index on username if it exists (usernames can be duplicate)
 try:
     # Get all indexes and drop any unique index on username
@@ -49,9 +62,10 @@ except Exception:
     pass  # Indexes might already exist
 
 
-def sign_up(auth: Dict[str, Any]) -> str:
+async def sign_up(auth: Dict[str, Any]) -> str:
     """
     Sign up a new user with username, email, password and optional location.
+    Password hashing runs on the bcrypt pool so the event loop is not blocked.
 
     Args:
         auth: Dictionary containing 'username', 'email', 'password' and optional 'latitude', 'longitude' keys.
@@ -61,6 +75,7 @@ def sign_up(auth: Dict[str, Any]) -> str:
 
     Raises:
         ValueError: If email already exists or fields are missing
+        PasswordHashingBusyError: If the bcrypt pool is saturated
     """
     username = auth.get("username")
     email = auth.get("email")
@@ -71,14 +86,9 @@ def sign_up(auth: Dict[str, Any]) -> str:
     if not username or not email or not password:
         raise ValueError("Username, email and password are required")
 
-    # Check if user already exists
-    existing_user = users_collection.find_one({"email": email})
-    if existing_user:
-        raise ValueError("User with this email already exists")
-
     # Generate unique user_id
     user_id = str(uuid4())
-    password_hash = hash_password(password)
+    password_hash = await hash_password_async(password)
     # Create user document
     user_doc = {
         "user_id": user_id,
@@ -96,20 +106,30 @@ def sign_up(auth: Dict[str, Any]) -> str:
             "updated_at": datetime.utcnow().isoformat()
         }
 
-    # Insert user into database
-    users_collection.insert_one(user_doc)
+    # Insert user into database; the unique index on email rejects duplicates
+    # atomically, so no separate existence check is needed
+    try:
+        users_collection.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise ValueError("User with this email already exists")
     return user_id
 
 
-def login(auth: Dict[str, Any]):
+async def login(auth: Dict[str, Any]):
     """
     Login a user by verifying email and password, and optionally update location.
+    If the stored hash uses a different bcrypt cost than configured, it is
+    transparently recomputed with the plain password we just verified.
 
     Args:
         auth: Dictionary containing 'email', 'password' and optional 'latitude', 'longitude' keys.
 
     Returns:
         The user_id, username and email as a tuple.
+
+    Raises:
+        ValueError: If fields are missing, the user doesn't exist or the password is wrong
+        PasswordHashingBusyError: If the bcrypt pool is saturated
     """
     email = auth.get("email")
     password = auth.get("password")
@@ -119,30 +139,36 @@ def login(auth: Dict[str, Any]):
     if not email or not password:
         raise ValueError("Email and password are required")
 
-    # Find user by email
-    user = users_collection.find_one({"email": email})
+    new_location = None
+    if latitude is not None and longitude is not None:
+        new_location = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "updated_at": datetime.utcnow().isoformat()
+        }
 
+    user = users_collection.find_one({"email": email}, LOGIN_PROJECTION)
     if not user:
-        raise ValueError("User not found")
+        raise UserNotFoundError("User not found")
 
-    # Verify password (plain text comparison)
-    if not verify_password(password, user.get("password")):
+    # Verify password against the bcrypt hash; nothing is written before it passes
+    if not await verify_password_async(password, user.get("password")):
         raise ValueError("Invalid password")
 
-    # Update location if provided
-    if latitude is not None and longitude is not None:
-        users_collection.update_one(
-            {"user_id": user.get("user_id")},
-            {
-                "$set": {
-                    "location": {
-                        "latitude": latitude,
-                        "longitude": longitude,
-                        "updated_at": datetime.utcnow().isoformat()
-                    }
-                }
-            }
-        )
+    # Write the new location and, if the configured cost changed, an upgraded
+    # hash in one update
+    updates = {}
+    if new_location:
+        updates["location"] = new_location
+        user["location"] = new_location
+    if needs_rehash(user.get("password")):
+        updates["password"] = await hash_password_async(password)
+    if updates:
+        users_collection.update_one({"user_id": user.get("user_id")}, {"$set": updates})
+
+    # Prime the profile cache so the token issued for this login and the
+    # first authenticated requests don't need another lookup
+    user_profile_cache.set(user.get("user_id"), _to_profile(user))
 
     return user.get("user_id"), user.get("username"), user.get("email")
 
@@ -157,10 +183,60 @@ def delete_user(user_id: str) -> int:
     Returns:
         The number of documents deleted (0 or 1).
     """
+    from auth.cookie_utils import STATELESS_AUTH_ENABLED, get_session_timeout_seconds
+    from auth.revocation import revocation_list
+
     result = users_collection.delete_one({"user_id": user_id})
+    user_profile_cache.invalidate(user_id)
+    # Tokens with embedded profile claims are never checked against the users
+    # collection, so they have to be revoked explicitly
+    if STATELESS_AUTH_ENABLED and result.deleted_count:
+        revocation_list.revoke_user(user_id, get_session_timeout_seconds())
     return result.deleted_count
 
 
+def _to_profile(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a projected user document into the profile dict used by handlers."""
+    location = user.get("location") or {}
+    profile_location = None
+    if location.get("latitude") is not None and location.get("longitude") is not None:
+        profile_location = {
+            "latitude": location.get("latitude"),
+            "longitude": location.get("longitude")
+        }
+    return {
+        "user_id": user.get("user_id"),
+        "username": user.get("username"),
+        "email": user.get("email"),
+        "location": profile_location
+    }
+
+
+def get_user_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a user's profile (user_id, username, email, location) by user_id.
+    Served from the in-process user cache when possible; otherwise a single
+    projected find_one is issued and the result cached.
+
+    Args:
+        user_id: The user_id of the user to fetch.
+
+    Returns:
+        Profile dict if found, otherwise None. location is None when unset.
+    """
+    profile = user_profile_cache.get(user_id)
+    if profile is not None:
+        return profile
+
+    user = users_collection.find_one({"user_id": user_id}, USER_PROFILE_PROJECTION)
+    if not user:
+        return None
+
+    profile = _to_profile(user)
+    user_profile_cache.set(user_id, profile)
+    return profile
+
+
 def get_user_by_id(user_id: str):
     """
     Fetch a user by user_id.
@@ -171,10 +247,10 @@ def get_user_by_id(user_id: str):
     Returns:
         Tuple of (user_id, username, email) if found, otherwise None.
     """
-    user = users_collection.find_one({"user_id": user_id})
-    if not user:
+    profile = get_user_profile(user_id)
+    if not profile:
         return None
-    return user.get("user_id"), user.get("username"), user.get("email")
+    return profile["user_id"], profile["username"], profile["email"]
 
 
 def get_user_location(user_id: str):
@@ -187,12 +263,30 @@ def get_user_location(user_id: str):
     Returns:
         Dict with latitude and longitude if location exists, otherwise None.
     """
-    user = users_collection.find_one({"user_id": user_id})
-    if not user or not user.get("location"):
+    profile = get_user_profile(user_id)
+    if not profile:
         return None
+    return profile["location"]
 
-    location = user.get("location", {})
-    return {
-        "latitude": location.get("latitude"),
-        "longitude": location.get("longitude")
-    }
+
+def iter_user_profiles(after_user_id: Optional[str] = None, batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Iterate over all user profiles in user_id order, in chunks, with a single cursor.
+
+    Args:
+        after_user_id: Only return users with a user_id greater than this (to resume).
+        batch_size: Number of profiles per chunk (and per cursor batch).
+
+    Yields:
+        Lists of profile dicts (user_id, username, email, location).
+    """
+    query = {"user_id": {"$gt": after_user_id}} if after_user_id else {}
+    cursor = users_collection.find(query, USER_PROFILE_PROJECTION).sort("user_id", 1).batch_size(batch_size)
+    chunk = []
+    for user in cursor:
+        chunk.append(_to_profile(user))
+        if len(chunk) >= batch_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
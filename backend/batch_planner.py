@@ -0,0 +1,324 @@
+"""
+Batch Planner Module
+Pre-generates weekly plans for every active wardrobe so that plans are
+served straight from weekly_plans instead of being built on request.
+
+Users are read in chunks through a single cursor; users whose locations fall
+into the same bucket share one forecast call; composites are rendered on the
+planner pool; and each chunk is written with one bulk write. Progress is
+checkpointed after every chunk, so a crashed run resumes where it stopped.
+A run is leased to one worker at a time: the checkpoint doubles as its
+heartbeat, and another worker only takes a run over once it has gone stale.
+MongoDB calls run on worker threads, so a run inside the app never blocks
+the event loop.
+
+Run from the backend directory:
+    python batch_planner.py [--chunk-size 200] [--concurrency 8] [--resume]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from endpoints.weekly.models import WeeklyPlan
+from auth.user_db import iter_user_profiles
+from mongodb_uploader import get_items_for_wardrobes, get_weekly_plans, bulk_write_weekly_plans, weekly_plan_days_update
+from mongodb_uploader.uploader import database
+from weekly_planner import plan_days, render_daily_composites, days_to_render, diff_daily_plans, build_wear_history, get_plan_forecast
+
+logger = logging.getLogger(__name__)
+
+BATCH_RUNS_COLLECTION_NAME = "batch_planner_runs"
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "200"))
+# Wardrobes planned at the same time within a chunk
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Size of a location bucket in degrees; users in the same bucket share a forecast
+BATCH_LOCATION_BUCKET_DEGREES = float(os.getenv("BATCH_LOCATION_BUCKET_DEGREES", "0.1"))
+# Lease of a running batch: its worker refreshes checkpoint_at after every chunk,
+# and another worker may take the run over once it is older than this (crashed).
+# Must exceed the time one chunk takes
+BATCH_STALE_AFTER_SECONDS = float(os.getenv("BATCH_STALE_AFTER_SECONDS", "900"))
+# In-process scheduler: enable and pick the UTC hour for the nightly run
+BATCH_SCHEDULER_ENABLED = os.getenv("BATCH_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+BATCH_SCHEDULE_HOUR_UTC = int(os.getenv("BATCH_SCHEDULE_HOUR_UTC", "3"))
+
+batch_runs_collection = database[BATCH_RUNS_COLLECTION_NAME]
+
+
+def _item_to_outfit(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "outfit_id": item.get("item_id", ""),
+        "wardrobe_id": item.get("wardrobe_id", ""),
+        "image_url": item.get("image_url", ""),
+        "image_variants": item.get("image_variants"),
+        "tags": item.get("tags", {})
+    }
+
+
+def _location_bucket(location: Optional[Dict[str, float]]) -> Optional[Tuple[float, float]]:
+    """Snap a location to the center of its bucket, or None without a location."""
+    if not location:
+        return None
+    size = BATCH_LOCATION_BUCKET_DEGREES
+    return (
+        round(round(location["latitude"] / size) * size, 4),
+        round(round(location["longitude"] / size) * size, 4)
+    )
+
+
+async def _fetch_bucket_forecasts(
+    buckets: List[Tuple[float, float]],
+    forecasts: Dict[Tuple[float, float], Optional[Dict[str, Any]]]
+) -> None:
+    """Fetch one forecast per bucket not fetched yet during this run."""
+    missing = [bucket for bucket in dict.fromkeys(buckets) if bucket not in forecasts]
+    results = await asyncio.gather(*(
+        get_plan_forecast({"latitude": latitude, "longitude": longitude}) for latitude, longitude in missing
+    ))
+    forecasts.update(zip(missing, results))
+
+
+async def _plan_wardrobe(
+    profile: Dict[str, Any],
+    items: List[Dict[str, Any]],
+    existing_plan: Optional[Dict[str, Any]],
+    weather_data: Optional[Dict[str, Any]]
+) -> Optional[Any]:
+    """
+    Plan and render one wardrobe.
+
+    Returns:
+        The write operation storing the plan, or None if nothing changed.
+    """
+    wardrobe_id = profile["user_id"]
+    outfits = [_item_to_outfit(item) for item in items]
+    wear_history = build_wear_history(existing_plan, outfits)
+    daily_plans = await plan_days(outfits, None, existing_plan, weather_data, wear_history)
+
+    async def _set_image_url(day_key: str, image_url: Optional[str]):
+        daily_plans[day_key].image_url = image_url
+
+    await render_daily_composites(days_to_render(daily_plans), outfits, _set_image_url)
+
+    now = datetime.now(timezone.utc)
+    today = now.date().isoformat()
+
+    if existing_plan:
+        changed_days, removed_day_keys = diff_daily_plans(existing_plan, daily_plans)
+        if not changed_days and not removed_day_keys and existing_plan.get("week_start") == today:
+            return None
+        update = weekly_plan_days_update(
+            {"week_start": today, "updated_at": now.isoformat(), "status": "complete", "wear_history": wear_history},
+            changed_days,
+            removed_day_keys
+        )
+        return UpdateOne({"wardrobe_id": wardrobe_id}, update)
+
+    weekly_plan = WeeklyPlan(
+        plan_id=str(uuid4()),
+        wardrobe_id=wardrobe_id,
+        created_at=now.isoformat(),
+        updated_at=now.isoformat(),
+        week_start=today,
+        daily_plans=daily_plans,
+        status="complete"
+    )
+    return ReplaceOne({"wardrobe_id": wardrobe_id}, {**weekly_plan.dict(), "wear_history": wear_history}, upsert=True)
+
+
+async def _plan_chunk(
+    profiles: List[Dict[str, Any]],
+    forecasts: Dict[Tuple[float, float], Optional[Dict[str, Any]]],
+    concurrency: int
+) -> Dict[str, int]:
+    """Plan every active wardrobe of a chunk of users and write the plans in one bulk write."""
+    wardrobe_ids = [profile["user_id"] for profile in profiles]
+    items_by_wardrobe = await asyncio.to_thread(get_items_for_wardrobes, wardrobe_ids)
+    active_profiles = [profile for profile in profiles if items_by_wardrobe.get(profile["user_id"])]
+    existing_plans = await asyncio.to_thread(get_weekly_plans, [profile["user_id"] for profile in active_profiles])
+
+    buckets = {profile["user_id"]: _location_bucket(profile.get("location")) for profile in active_profiles}
+    await _fetch_bucket_forecasts([bucket for bucket in buckets.values() if bucket], forecasts)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def _plan(profile: Dict[str, Any]):
+        nonlocal failed
+        async with semaphore:
+            try:
+                bucket = buckets[profile["user_id"]]
+                return await _plan_wardrobe(
+                    profile,
+                    items_by_wardrobe[profile["user_id"]],
+                    existing_plans.get(profile["user_id"]),
+                    forecasts.get(bucket) if bucket else None
+                )
+            except Exception as e:
+                failed += 1
+                logger.warning("Failed to plan wardrobe %s: %s", profile["user_id"], e)
+                return None
+
+    operations = [op for op in await asyncio.gather(*(_plan(profile) for profile in active_profiles)) if op is not None]
+    await asyncio.to_thread(bulk_write_weekly_plans, operations)
+
+    return {
+        "users": len(profiles),
+        "active": len(active_profiles),
+        "written": len(operations),
+        "failed": failed
+    }
+
+
+def _claim_run(run_id: Optional[str], resume: bool, owner: str) -> Optional[Dict[str, Any]]:
+    """
+    Create a run document, or take over an unfinished one whose lease expired.
+
+    Args:
+        run_id: Explicit run ID; a second worker claiming the same ID backs off
+            unless the first one stopped checkpointing (crashed).
+        resume: Resume the most recent unfinished run when no run_id is given.
+        owner: ID of the claiming worker, required for every later checkpoint.
+
+    Returns:
+        The run document to work on, or None if the run is done or leased to a live worker.
+    """
+    now = time.time()
+    stale = {"status": "running", "checkpoint_at": {"$lt": now - BATCH_STALE_AFTER_SECONDS}}
+    take_over = {"$set": {"checkpoint_at": now, "owner": owner}}
+    if run_id is None and resume:
+        run = batch_runs_collection.find_one_and_update(
+            stale, take_over, sort=[("started_at", -1)], return_document=ReturnDocument.AFTER
+        )
+        if run or batch_runs_collection.find_one({"status": "running"}, {"_id": 1}):
+            return run
+    run_id = run_id or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+    run = {
+        "_id": run_id,
+        "status": "running",
+        "owner": owner,
+        "started_at": now,
+        "checkpoint_at": now,
+        "last_user_id": None,
+        "totals": {"users": 0, "active": 0, "written": 0, "failed": 0}
+    }
+    try:
+        batch_runs_collection.insert_one(run)
+        return run
+    except DuplicateKeyError:
+        # Take over a crashed run; complete and live runs don't match
+        return batch_runs_collection.find_one_and_update(
+            {"_id": run_id, **stale}, take_over, return_document=ReturnDocument.AFTER
+        )
+
+
+def _checkpoint(run_id: str, owner: str, fields: Dict[str, Any]) -> bool:
+    """Store run progress and renew the lease; False if another worker has taken the run over."""
+    result = batch_runs_collection.update_one(
+        {"_id": run_id, "owner": owner},
+        {"$set": {**fields, "checkpoint_at": time.time()}}
+    )
+    return result.matched_count == 1
+
+
+async def run_batch(
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    concurrency: int = BATCH_CONCURRENCY
+) -> Optional[Dict[str, Any]]:
+    """
+    Pre-generate or roll forward the weekly plan of every active wardrobe.
+
+    Args:
+        run_id: Optional run ID, used to avoid running the same batch twice.
+        resume: Resume the most recent unfinished run.
+        chunk_size: Number of users read and written per chunk.
+        concurrency: Number of wardrobes planned at the same time.
+
+    Returns:
+        The run totals, or None if there was nothing to do.
+    """
+    owner = str(uuid4())
+    run = await asyncio.to_thread(_claim_run, run_id, resume, owner)
+    if run is None:
+        logger.info("Batch planner: run already complete or in progress elsewhere")
+        return None
+
+    totals = dict(run["totals"])
+    last_user_id = run.get("last_user_id")
+    forecasts: Dict[Tuple[float, float], Optional[Dict[str, Any]]] = {}
+    started = time.monotonic()
+    if last_user_id:
+        logger.info("Batch planner: resuming run %s after user %s", run["_id"], last_user_id)
+
+    chunks = iter_user_profiles(last_user_id, chunk_size)
+    while profiles := await asyncio.to_thread(next, chunks, None):
+        chunk_totals = await _plan_chunk(profiles, forecasts, concurrency)
+        for key, value in chunk_totals.items():
+            totals[key] += value
+        last_user_id = profiles[-1]["user_id"]
+
+        if not await asyncio.to_thread(_checkpoint, run["_id"], owner, {"last_user_id": last_user_id, "totals": totals}):
+            logger.warning("Batch planner: run %s was taken over by another worker; stopping", run["_id"])
+            return None
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Batch planner: %d users, %d active, %d plans written, %d failed, %d forecasts, %.1f users/s",
+            totals["users"], totals["active"], totals["written"], totals["failed"], len(forecasts), totals["users"] / elapsed
+        )
+
+    if not await asyncio.to_thread(_checkpoint, run["_id"], owner, {"status": "complete", "totals": totals}):
+        logger.warning("Batch planner: run %s was taken over by another worker", run["_id"])
+        return None
+    return totals
+
+
+def _seconds_until_next_run(now: Optional[datetime] = None) -> float:
+    now = now or datetime.now(timezone.utc)
+    next_run = now.replace(hour=BATCH_SCHEDULE_HOUR_UTC, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+async def run_scheduler() -> None:
+    """
+    Run the batch planner every day at BATCH_SCHEDULE_HOUR_UTC.
+    Every worker may run the scheduler; the daily run ID makes sure only one
+    of them actually plans, and another one picks the run up if it crashes.
+    """
+    while True:
+        await asyncio.sleep(_seconds_until_next_run())
+        try:
+            await run_batch(run_id=f"nightly-{datetime.now(timezone.utc).date().isoformat()}")
+        except Exception as e:
+            logger.exception("Scheduled batch planner run failed: %s", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate weekly plans for all active wardrobes")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="users per chunk")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="wardrobes planned concurrently")
+    parser.add_argument("--run-id", default=None, help="explicit run ID")
+    parser.add_argument("--resume", action="store_true", help="resume the most recent unfinished run")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    totals = asyncio.run(run_batch(args.run_id, args.resume, args.chunk_size, args.concurrency))
+    if totals:
+        logger.info("Batch planner finished: %s", totals)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""
+Benchmarks Package
+Standalone benchmarks for backend hot paths.
+
+Run from the backend directory, e.g.:
+    python -m benchmarks.bench_login_throughput
+
+Every benchmark module exposes run(**options) -> dict and prints its
+results as JSON when executed directly. benchmarks.run runs the whole
+suite into one JSON file and compares two such files:
+    python -m benchmarks.run --output results/head.json
+    python -m benchmarks.run --compare results/base.json results/head.json
+
+External services are replaced by local stand-ins (stubs.py, fake_openai.py,
+fake_services.py), so no benchmark needs network access or credentials.
+"""
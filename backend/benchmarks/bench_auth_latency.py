@@ -0,0 +1,99 @@
+"""
+Auth Endpoint Latency Benchmark
+Measures /auth/signup, /auth/login and /auth/session latency and MongoDB
+round trips per request against an in-memory Mongo stand-in with simulated
+network latency.
+"""
+
+import json
+import os
+import statistics
+import time
+from typing import Dict, Any, List
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-with-32-bytes!")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("LOGIN_EMAIL_BURST", "1000000")
+os.environ.setdefault("LOGIN_IP_BURST", "1000000")
+
+from benchmarks.stubs import install_mongo_stand_in, mongo_stats, reset_mongo_stats
+
+install_mongo_stand_in()
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from endpoints.authentication.routes import router as authentication_router
+from auth.user_cache import user_profile_cache
+
+
+def _summarize(name: str, timings: List[float], round_trips: int) -> Dict[str, Any]:
+    timings = sorted(timings)
+    return {
+        "endpoint": name,
+        "requests": len(timings),
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+        "mongo_round_trips_per_request": round(round_trips / len(timings), 2),
+    }
+
+
+def _measure(name: str, requests: int, send) -> Dict[str, Any]:
+    timings = []
+    reset_mongo_stats()
+    for i in range(requests):
+        started = time.perf_counter()
+        response = send(i)
+        timings.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name} failed: {response.status_code} {response.text}")
+    return _summarize(name, timings, mongo_stats["round_trips"])
+
+
+def run(requests: int = 200, round_trip_ms: float = 1.0) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        requests: Requests per endpoint.
+        round_trip_ms: Simulated MongoDB network latency per operation.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    mongo_stats["round_trip_ms"] = round_trip_ms
+    app = FastAPI()
+    app.include_router(authentication_router)
+    client = TestClient(app)
+    run_id = str(time.time_ns())
+
+    def email(i: int) -> str:
+        return f"bench-{run_id}-{i}@example.com"
+
+    results = [
+        _measure("signup", requests, lambda i: client.post("/auth/signup", json={
+            "username": f"user{i}", "email": email(i), "password": "benchmark-password"
+        })),
+        _measure("login", requests, lambda i: client.post("/auth/login", json={
+            "email": email(i), "password": "benchmark-password"
+        })),
+        _measure("login_with_location", requests, lambda i: client.post("/auth/login", json={
+            "email": email(i), "password": "benchmark-password", "latitude": 52.52, "longitude": 13.40
+        })),
+    ]
+
+    # Session lookups with a cold and a warm profile cache
+    user_profile_cache.clear()
+    results.append(_measure("session_cold", 1, lambda i: client.get("/auth/session")))
+    results.append(_measure("session_warm", requests, lambda i: client.get("/auth/session")))
+
+    return {
+        "benchmark": "auth_latency",
+        "bcrypt_rounds": int(os.environ["BCRYPT_ROUNDS"]),
+        "round_trip_ms": round_trip_ms,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,96 @@
+"""
+Chat Context Benchmark
+Compares prompt size, context build time and completion latency of the
+packed, retrieved wardrobe context with dumping the full wardrobe into the
+prompt, for wardrobes of growing size. Completions go to the fake OpenAI
+server with a per-prompt-token prefill delay.
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+from benchmarks.stubs import install_mongo_stand_in, synthetic_wardrobe
+
+install_mongo_stand_in()
+
+from benchmarks.fake_openai import start_fake_openai, fake_openai_stats
+
+MESSAGES = [
+    "What should I wear to a casual date tonight?",
+    "Something formal for a winter office party",
+    "Which jeans go with my white sneakers?",
+    "Outfit for a summer picnic",
+]
+
+
+def _full_dump(items: List[Dict[str, Any]]) -> str:
+    """The naive alternative: every item with all its fields."""
+    return "The user's wardrobe: " + json.dumps(items)
+
+
+async def _complete(contexts: List[str], requests: int) -> List[float]:
+    from outfit_chat.service import complete_chat
+
+    latencies = []
+    for i in range(requests):
+        started = time.perf_counter()
+        await complete_chat(MESSAGES[i % len(MESSAGES)], None, None, contexts[i % len(contexts)])
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run(sizes: List[int] = (20, 100, 500, 2000), requests: int = 5, prompt_token_ms: float = 0.05) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        sizes: Wardrobe sizes.
+        requests: Completions per size and strategy.
+        prompt_token_ms: Fake prefill cost per prompt token.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    os.environ["OPENAI_BASE_URL"] = start_fake_openai(first_token_ms=150, token_ms=0, tokens=50, prompt_token_ms=prompt_token_ms)
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+    from outfit_chat.context import build_wardrobe_context, estimate_tokens
+
+    results = []
+    loop = asyncio.new_event_loop()
+    for size in sizes:
+        items = synthetic_wardrobe(size)
+        strategies = {
+            "full_dump": lambda message: _full_dump(items),
+            "packed": lambda message: build_wardrobe_context(items, message, {"temp_c": 12.0, "condition_text": "Cloudy"})[0],
+        }
+        row = {"wardrobe_size": size}
+        for name, build in strategies.items():
+            started = time.perf_counter()
+            contexts = [build(message) for message in MESSAGES]
+            build_ms = (time.perf_counter() - started) / len(MESSAGES) * 1000
+
+            before = fake_openai_stats["prompt_tokens"]
+            latencies = loop.run_until_complete(_complete(contexts, requests))
+            row[name] = {
+                "context_tokens": round(statistics.mean(estimate_tokens(context) for context in contexts)),
+                "prompt_tokens": round((fake_openai_stats["prompt_tokens"] - before) / requests),
+                "build_ms": round(build_ms, 3),
+                "completion_p50_ms": round(statistics.median(latencies) * 1000, 1),
+            }
+        results.append(row)
+    loop.close()
+
+    return {
+        "benchmark": "chat_context",
+        "prompt_token_ms": prompt_token_ms,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,123 @@
+"""
+Chat Streaming Benchmark
+Measures time to first byte and total time of /chat/outfit-chat and
+/chat/outfit-chat/stream against the fake OpenAI server, and checks that
+a client disconnecting mid-stream stops generation upstream. A replayed
+message mix shows the response cache hit rate and latencies.
+"""
+
+import json
+import os
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-with-32-bytes!")
+
+from benchmarks.stubs import install_mongo_stand_in, start_server
+from benchmarks.fake_openai import start_fake_openai, fake_openai_stats
+
+install_mongo_stand_in()
+
+
+def _summarize(name: str, first_byte: List[float], total: List[float]) -> Dict[str, Any]:
+    return {
+        "endpoint": name,
+        "requests": len(total),
+        "ttfb_p50_ms": round(statistics.median(first_byte) * 1000, 1),
+        "total_p50_ms": round(statistics.median(total) * 1000, 1),
+    }
+
+
+def run(requests: int = 10, first_token_ms: float = 400.0, token_ms: float = 15.0, tokens: int = 120) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        requests: Requests per endpoint.
+        first_token_ms: Fake model latency before the first token.
+        token_ms: Fake model latency between tokens.
+        tokens: Tokens per fake completion.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    import httpx
+
+    os.environ["OPENAI_BASE_URL"] = start_fake_openai(first_token_ms, token_ms, tokens)
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+    from fastapi import FastAPI
+    from endpoints.chat import router as chat_router
+    from auth.deps import require_user
+
+    app = FastAPI()
+    app.include_router(chat_router)
+    app.dependency_overrides[require_user] = lambda: {"user_id": "benchmark-user"}
+    base_url = start_server(app)
+    from outfit_chat import chat_response_cache
+
+    # Distinct messages, so that the response cache doesn't answer them
+    def body(i: int) -> Dict[str, Any]:
+        return {"message": f"What should I wear to summer wedding number {i}?"}
+
+    results = []
+
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        first_byte, total = [], []
+        for i in range(requests):
+            started = time.perf_counter()
+            with client.stream("POST", "/chat/outfit-chat", json=body(i)) as response:
+                response.raise_for_status()
+                for _ in response.iter_bytes():
+                    if len(first_byte) < len(total) + 1:
+                        first_byte.append(time.perf_counter() - started)
+            total.append(time.perf_counter() - started)
+        results.append(_summarize("outfit-chat", first_byte, total))
+
+        first_byte, total = [], []
+        for i in range(requests):
+            started = time.perf_counter()
+            with client.stream("POST", "/chat/outfit-chat/stream", json=body(requests + i)) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line == "event: token" and len(first_byte) < len(total) + 1:
+                        first_byte.append(time.perf_counter() - started)
+            total.append(time.perf_counter() - started)
+        results.append(_summarize("outfit-chat/stream", first_byte, total))
+
+        # Disconnect after the first token; the upstream stream should be cancelled
+        before = dict(fake_openai_stats)
+        with client.stream("POST", "/chat/outfit-chat/stream", json=body(2 * requests)) as response:
+            for line in response.iter_lines():
+                if line == "event: token":
+                    break
+        time.sleep(0.5 + token_ms * 5 / 1000)
+        disconnect = {
+            "upstream_streams_cancelled": fake_openai_stats["streams_cancelled"] - before["streams_cancelled"],
+            "upstream_tokens_sent": fake_openai_stats["tokens_sent"] - before["tokens_sent"],
+        }
+
+        # A message mix with repeats and case/punctuation variants
+        chat_response_cache.clear()
+        chat_response_cache.metrics.update({key: 0 for key in chat_response_cache.metrics})
+        common = ["What should I wear today?", "Casual outfit for a date", "What goes with white sneakers"]
+        workload = [random.choice(common) for _ in range(requests * 2)]
+        workload = [message.upper() if i % 3 == 0 else message for i, message in enumerate(workload)]
+        for message in workload:
+            client.post("/chat/outfit-chat", json={"message": message}).raise_for_status()
+
+    return {
+        "benchmark": "chat_streaming",
+        "first_token_ms": first_token_ms,
+        "token_ms": token_ms,
+        "tokens": tokens,
+        "results": results,
+        "disconnect": disconnect,
+        "cache": chat_response_cache.get_metrics(),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
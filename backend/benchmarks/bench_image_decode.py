@@ -0,0 +1,87 @@
+"""
+Image Decode Benchmark
+Compares decoding large phone-sized photos at full size and shrinking them
+with LANCZOS against the reduced-scale decode and two-stage resize used by
+image_composer, down to a composite grid cell.
+"""
+
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.stubs import synthetic_image
+from image_composer import decode_image
+from image_composer.composer import RESAMPLE, _fit_within
+
+# Box an image is fitted into in the grid layout
+CELL_SIZE = (560, 560)
+
+
+def _full(data: bytes) -> Tuple[Image.Image, Image.Image]:
+    """Decode at full size and resize in one LANCZOS pass, as before."""
+    image = decode_image(data, None)
+    scale = min(CELL_SIZE[0] / image.width, CELL_SIZE[1] / image.height)
+    return image, image.resize((round(image.width * scale), round(image.height * scale)), RESAMPLE)
+
+
+def _reduced(data: bytes) -> Tuple[Image.Image, Image.Image]:
+    image = decode_image(data)
+    return image, _fit_within(image, *CELL_SIZE)
+
+
+def _time(data: bytes, pipeline: Callable, iterations: int) -> Tuple[List[float], Image.Image, Image.Image]:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        decoded, fitted = pipeline(data)
+        timings.append(time.perf_counter() - started)
+    return timings, decoded, fitted
+
+
+def run(
+    sizes: List[Tuple[int, int]] = ((1600, 1200), (4032, 3024), (8000, 6000)),
+    iterations: int = 5
+) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        sizes: Photo sizes (width, height); 4032x3024 is a typical 12 MP phone photo.
+        iterations: Timed decodes per size and pipeline.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    results = []
+    for size in sizes:
+        data = synthetic_image(0, size, quality=92)
+        fitted_images = {}
+        for name, pipeline in (("full", _full), ("reduced", _reduced)):
+            timings, decoded, fitted = _time(data, pipeline, iterations)
+            fitted_images[name] = fitted
+            results.append({
+                "case": f"{size[0]}x{size[1]}_{name}",
+                "encoded_kb": round(len(data) / 1024),
+                "decoded_size": list(decoded.size),
+                # Decoded RGB pixels dominate the memory of a decode
+                "decoded_mb": round(decoded.width * decoded.height * 3 / 1024 ** 2, 2),
+                "p50_ms": round(statistics.median(timings) * 1000, 3),
+            })
+        # Mean absolute pixel difference of the two cells, 0-255
+        full, reduced = (np.asarray(fitted_images[name], dtype=np.int16) for name in ("full", "reduced"))
+        if full.shape == reduced.shape:
+            results[-1]["mean_abs_diff"] = round(float(np.abs(full - reduced).mean()), 3)
+
+    return {
+        "benchmark": "image_decode",
+        "cell_size": list(CELL_SIZE),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,96 @@
+"""
+Image Pipeline Benchmark
+Measures tag_image on a synthetic photo and create_composite_image in grid
+and vertical layouts, downloading synthetic images from the fake image CDN
+with simulated network latency. Grid composites are measured cold (tiles
+rendered from downloads) and warm (all cell tiles cached).
+"""
+
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.stubs import install_mongo_stand_in, synthetic_image
+
+install_mongo_stand_in()
+
+from benchmarks.fake_services import start_fake_services, fake_services_stats
+from image_tagging import tag_image
+from image_composer import create_composite_image, tile_cache
+
+
+def _time(case: str, iterations: int, func: Callable[[int], Any]) -> Dict[str, Any]:
+    timings = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        func(i)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "case": case,
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)] * 1000, 3),
+    }
+
+
+def run(iterations: int = 20, images_per_composite: int = 4, latency_ms: float = 20.0) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        iterations: Timed calls per case.
+        images_per_composite: Images combined into each composite.
+        latency_ms: Simulated latency of every image download.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    base_url = start_fake_services(latency_ms=latency_ms)
+    tile_cache.directory = tempfile.mkdtemp(prefix="bench-tiles-")
+    results: List[Dict[str, Any]] = []
+
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
+        f.write(synthetic_image(0))
+        image_path = f.name
+    try:
+        results.append(_time("tag_image", iterations, lambda i: tag_image(image_path)))
+    finally:
+        os.unlink(image_path)
+
+    for layout in ("grid", "vertical"):
+        # Fresh seeds per iteration so nothing is served from a warm cache
+        def compose(i: int, layout=layout):
+            seeds = range(i * images_per_composite, (i + 1) * images_per_composite)
+            create_composite_image([f"{base_url}/images/synthetic/{seed}.jpg" for seed in seeds], layout)
+
+        before = fake_services_stats["image_requests"]
+        result = _time(f"create_composite_image_{layout}", iterations, compose)
+        result["image_requests"] = fake_services_stats["image_requests"] - before
+        results.append(result)
+
+    # The same composites again: every tile is now cached
+    def compose_cached(i: int):
+        seeds = range(i * images_per_composite, (i + 1) * images_per_composite)
+        create_composite_image([f"{base_url}/images/synthetic/{seed}.jpg" for seed in seeds], "grid")
+
+    before = fake_services_stats["image_requests"]
+    result = _time("create_composite_image_grid_cached_tiles", iterations, compose_cached)
+    result["image_requests"] = fake_services_stats["image_requests"] - before
+    results.append(result)
+    shutil.rmtree(tile_cache.directory, ignore_errors=True)
+
+    return {
+        "benchmark": "image_pipeline",
+        "images_per_composite": images_per_composite,
+        "latency_ms": latency_ms,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,106 @@
+"""
+Login Throughput Benchmark
+Measures bcrypt verify throughput through the hashing pool per worker count,
+and how long the event loop stalls when verifying inline versus on the pool.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Any, List
+
+from benchmarks.stubs import install_mongo_stand_in
+
+install_mongo_stand_in()
+
+from auth.password_utils import PasswordHashingPool, hash_password, verify_password
+
+
+async def _measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst event-loop scheduling delay observed until stop is set."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def _run_pool(workers: int, logins: int, password: str, password_hash: str) -> Dict[str, Any]:
+    pool = PasswordHashingPool(max_workers=workers, max_pending=logins)
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(pool.run(verify_password, password, password_hash) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    max_loop_lag = await lag_task
+    return {
+        "mode": "pool",
+        "workers": workers,
+        "logins_per_second": round(logins / elapsed, 2),
+        "logins_per_second_per_core": round(logins / elapsed / workers, 2),
+        "max_loop_lag_ms": round(max_loop_lag * 1000, 2),
+    }
+
+
+async def _run_inline(logins: int, password: str, password_hash: str) -> Dict[str, Any]:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    for _ in range(logins):
+        verify_password(password, password_hash)
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    max_loop_lag = await lag_task
+    return {
+        "mode": "inline",
+        "workers": 1,
+        "logins_per_second": round(logins / elapsed, 2),
+        "logins_per_second_per_core": round(logins / elapsed, 2),
+        "max_loop_lag_ms": round(max_loop_lag * 1000, 2),
+    }
+
+
+def run(rounds: int = 10, logins: int = 32, worker_counts: List[int] = None) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        rounds: bcrypt cost factor to benchmark.
+        logins: Number of password verifications per configuration.
+        worker_counts: Pool sizes to measure; defaults to 1, 2, 4, ... up to the CPU count.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    cpu_count = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = []
+        workers = 1
+        while workers < cpu_count:
+            worker_counts.append(workers)
+            workers *= 2
+        worker_counts.append(cpu_count)
+
+    password = "correct horse battery staple"
+    password_hash = hash_password(password, rounds=rounds)
+
+    results = [asyncio.run(_run_inline(logins, password, password_hash))]
+    for workers in worker_counts:
+        results.append(asyncio.run(_run_pool(workers, logins, password, password_hash)))
+
+    return {
+        "benchmark": "login_throughput",
+        "bcrypt_rounds": rounds,
+        "logins": logins,
+        "cpu_count": cpu_count,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(rounds=int(os.getenv("BCRYPT_ROUNDS", "10"))), indent=2))
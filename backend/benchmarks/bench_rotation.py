@@ -0,0 +1,148 @@
+"""
+Outfit Rotation Benchmark
+Compares independent per-day random sampling with the joint rotation
+selection of the weekly planner: selection time, how much of the wardrobe
+a week covers, and how often items repeat, for wardrobes of growing size.
+The rolling scenario plans several consecutive weeks with wear history,
+and the regenerate scenario checks that regenerating a plan the day after
+keeps yesterday's items out of today.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from benchmarks.stubs import install_mongo_stand_in
+
+install_mongo_stand_in()
+
+# Importing the weekly routes first resolves their import cycle with the planner
+import endpoints.weekly  # noqa: F401
+from weekly_planner import select_rotation, plan_days, build_wear_history, PLAN_DAYS
+
+CATEGORY_GROUPS = ["upperWear", "bottomWear", "footwear", "outerWear", "accessories"]
+
+
+def _wardrobe(size: int) -> List[Dict[str, Any]]:
+    return [
+        {"outfit_id": f"item-{i}", "tags": {"categoryGroup": CATEGORY_GROUPS[i % len(CATEGORY_GROUPS)]}}
+        for i in range(size)
+    ]
+
+
+def _select_random(outfits: List[Dict[str, Any]], counts: List[int]) -> List[List[str]]:
+    return [[outfit["outfit_id"] for outfit in random.sample(outfits, count)] for count in counts]
+
+
+def _quality(outfits: List[Dict[str, Any]], days: List[List[str]]) -> Dict[str, Any]:
+    groups = {outfit["outfit_id"]: outfit["tags"]["categoryGroup"] for outfit in outfits}
+    slots = sum(len(day) for day in days)
+    distinct = len({outfit_id for day in days for outfit_id in day})
+    return {
+        "coverage": round(distinct / min(len(outfits), slots), 3),
+        "repeats_in_week": slots - distinct,
+        "consecutive_day_repeats": sum(len(set(a) & set(b)) for a, b in zip(days, days[1:])),
+        "avg_groups_per_day": round(statistics.mean(len({groups[o] for o in day}) for day in days), 2),
+    }
+
+
+def _time(select, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        select()
+    return (time.perf_counter() - started) / repeats
+
+
+def _rolling_coverage(outfits: List[Dict[str, Any]], weeks: int) -> Dict[str, float]:
+    """Fraction of the wardrobe worn after planning several consecutive weeks."""
+    covered = {}
+    for mode in ("random", "rotation"):
+        last_worn: Dict[str, int] = {}
+        worn = set()
+        for week in range(weeks):
+            counts = [min(random.randint(3, 5), len(outfits)) for _ in range(PLAN_DAYS)]
+            if mode == "rotation":
+                days = select_rotation(outfits, last_worn, counts)
+            else:
+                days = _select_random(outfits, counts)
+            for offset, day in enumerate(days):
+                for outfit_id in day:
+                    last_worn[outfit_id] = week * PLAN_DAYS + offset
+                worn.update(day)
+        covered[mode] = round(len(worn) / len(outfits), 3)
+    return covered
+
+
+def _shift_days(daily_plans: Dict[str, Any], days: int) -> Dict[str, Any]:
+    """Move stored daily plans by a number of days, as if they had been planned that much earlier."""
+    shifted = {}
+    for daily_plan in daily_plans.values():
+        day_key = (date.fromisoformat(daily_plan.date) + timedelta(days=days)).isoformat()
+        shifted[day_key] = {**daily_plan.dict(), "date": day_key}
+    return shifted
+
+
+async def _regenerate_next_day(outfits: List[Dict[str, Any]], trials: int) -> Dict[str, Any]:
+    """
+    Plan a week, then regenerate it the next day, and count yesterday's
+    items planned again for today. The wardrobe is small enough that items
+    repeat within a week.
+    """
+    today = datetime.now(timezone.utc).date()
+    yesterday = (today - timedelta(days=1)).isoformat()
+    repeated = 0
+    for _ in range(trials):
+        plan = await plan_days(outfits, None, weather_data={})
+        # The same plan as stored yesterday: it covered yesterday and the next six days
+        stored_plan = {"daily_plans": _shift_days(plan, -1), "wear_history": build_wear_history(None, outfits)}
+        regenerated = await plan_days(outfits, None, weather_data={}, wear_history=build_wear_history(stored_plan, outfits))
+        repeated += len(set(stored_plan["daily_plans"][yesterday]["outfit_ids"]) & set(regenerated[today.isoformat()].outfit_ids))
+    return {"wardrobe_size": len(outfits), "trials": trials, "yesterday_items_today": repeated}
+
+
+def run(sizes: List[int] = (10, 50, 500, 5000, 50000), repeats: int = 20, weeks: int = 4) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        sizes: Wardrobe sizes to plan for.
+        repeats: Selections timed per size and mode.
+        weeks: Consecutive weeks planned for the rolling coverage.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    results = []
+    for size in sizes:
+        outfits = _wardrobe(size)
+        counts = [min(random.randint(3, 5), size) for _ in range(PLAN_DAYS)]
+        results.append({
+            "wardrobe_size": size,
+            "random": {
+                "ms_per_plan": round(_time(lambda: _select_random(outfits, counts), repeats) * 1000, 3),
+                **_quality(outfits, _select_random(outfits, counts)),
+            },
+            "rotation": {
+                "ms_per_plan": round(_time(lambda: select_rotation(outfits, {}, counts), repeats) * 1000, 3),
+                **_quality(outfits, select_rotation(outfits, {}, counts)),
+            },
+            f"coverage_after_{weeks}_weeks": _rolling_coverage(outfits, weeks),
+        })
+
+    regenerate = asyncio.run(_regenerate_next_day(_wardrobe(12), repeats))
+    assert regenerate["yesterday_items_today"] == 0, regenerate
+
+    return {
+        "benchmark": "rotation",
+        "plan_days": PLAN_DAYS,
+        "results": results,
+        "regenerate_next_day": regenerate,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,119 @@
+"""
+Wardrobe Benchmark
+Measures get_items for wardrobes of growing size against the in-memory
+Mongo stand-in with simulated network latency, and generate_weekly_plan
+end to end: forecast from the fake weather API, composites from synthetic
+images on the fake image CDN, uploads to the Cloudinary stand-in.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from benchmarks.stubs import install_mongo_stand_in, mongo_stats, reset_mongo_stats, synthetic_wardrobe
+
+install_mongo_stand_in()
+
+from benchmarks.fake_services import start_fake_services, install_cloudinary_stand_in, install_weather_stand_in, fake_services_stats
+# Importing the weekly routes first resolves their import cycle with the planner
+import endpoints.weekly  # noqa: F401
+from weekly_planner import generate_weekly_plan
+from mongodb_uploader import get_items
+from mongodb_uploader.uploader import outfits_collection
+
+LOCATION = {"latitude": 52.52, "longitude": 13.405}
+
+
+def _summarize(timings: List[float]) -> Dict[str, float]:
+    timings = sorted(timings)
+    return {
+        "p50_ms": round(statistics.median(timings) * 1000, 3),
+        "p95_ms": round(timings[max(0, int(len(timings) * 0.95) - 1)] * 1000, 3),
+    }
+
+
+def _bench_get_items(sizes: List[int], iterations: int) -> List[Dict[str, Any]]:
+    rows = []
+    for size in sizes:
+        wardrobe_id = f"get-items-{size}"
+        outfits_collection.insert_many(synthetic_wardrobe(size, wardrobe_id))
+        timings = []
+        reset_mongo_stats()
+        for _ in range(iterations):
+            started = time.perf_counter()
+            items = get_items(wardrobe_id)
+            timings.append(time.perf_counter() - started)
+        assert len(items) == size
+        rows.append({
+            "case": "get_items",
+            "wardrobe_size": size,
+            **_summarize(timings),
+            "mongo_round_trips_per_call": round(mongo_stats["round_trips"] / iterations, 2),
+        })
+    return rows
+
+
+def _bench_weekly_plan(base_url: str, wardrobe_size: int, iterations: int) -> Dict[str, Any]:
+    items = synthetic_wardrobe(wardrobe_size, "weekly-plan", image_base_url=base_url)
+    outfits = [{"outfit_id": item["item_id"], "wardrobe_id": item["wardrobe_id"], "image_url": item["image_url"], "tags": item["tags"]} for item in items]
+
+    async def _plan_all() -> List[float]:
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            daily_plans = await generate_weekly_plan(outfits, LOCATION)
+            timings.append(time.perf_counter() - started)
+            assert all(plan.image_url for plan in daily_plans.values())
+        return timings
+
+    before = dict(fake_services_stats)
+    timings = asyncio.run(_plan_all())
+    return {
+        "case": "generate_weekly_plan",
+        "wardrobe_size": wardrobe_size,
+        **_summarize(timings),
+        "image_requests_per_plan": (fake_services_stats["image_requests"] - before["image_requests"]) / iterations,
+        "uploads_per_plan": (fake_services_stats["uploads"] - before["uploads"]) / iterations,
+        "weather_requests_per_plan": (fake_services_stats["weather_requests"] - before["weather_requests"]) / iterations,
+    }
+
+
+def run(
+    sizes: List[int] = (20, 100, 500, 2000),
+    iterations: int = 20,
+    plan_iterations: int = 5,
+    round_trip_ms: float = 1.0,
+    latency_ms: float = 20.0
+) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        sizes: Wardrobe sizes for get_items.
+        iterations: Timed get_items calls per size.
+        plan_iterations: Timed weekly plans.
+        round_trip_ms: Simulated MongoDB network latency per operation.
+        latency_ms: Simulated latency of the image CDN and the weather API.
+
+    Returns:
+        Results dict suitable for JSON output.
+    """
+    install_mongo_stand_in(round_trip_ms)
+    base_url = start_fake_services(latency_ms=latency_ms)
+    install_cloudinary_stand_in(base_url)
+    install_weather_stand_in(base_url)
+
+    results = _bench_get_items(list(sizes), iterations)
+    results.append(_bench_weekly_plan(base_url, 40, plan_iterations))
+    return {
+        "benchmark": "wardrobe",
+        "round_trip_ms": round_trip_ms,
+        "latency_ms": latency_ms,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,137 @@
+"""
+Fake OpenAI Completion Server
+Local OpenAI-compatible /v1/chat/completions (with configurable latency)
+and /v1/embeddings endpoints, for tests, benchmarks and offline development.
+
+Run standalone and point the backend at it:
+    python -m benchmarks.fake_openai --port 8001
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=fake uvicorn app:app
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+from benchmarks.stubs import start_server
+
+# prompt_token_ms models prefill: the first token is delayed by this much per prompt token
+fake_openai_config = {"first_token_ms": 400.0, "token_ms": 15.0, "tokens": 120, "prompt_token_ms": 0.0}
+fake_openai_stats = {"requests": 0, "streams_completed": 0, "streams_cancelled": 0, "tokens_sent": 0, "embeddings": 0, "prompt_tokens": 0}
+EMBEDDING_DIMENSIONS = 256
+
+app = FastAPI()
+
+
+def _chunk(completion_id: str, delta: Dict[str, Any], finish_reason=None) -> str:
+    return "data: " + json.dumps({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "fake",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }) + "\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    fake_openai_stats["requests"] += 1
+    completion_id = f"chatcmpl-fake-{fake_openai_stats['requests']}"
+    tokens = [f"word{i} " for i in range(fake_openai_config["tokens"])]
+    # Cite the first wardrobe item when the prompt carries a packed wardrobe
+    if any("\ni1 " in (message.get("content") or "") for message in body.get("messages", [])):
+        tokens[:1] = ["[i1] "]
+    prompt_tokens = sum(len(message.get("content") or "") for message in body.get("messages", [])) // 4
+    fake_openai_stats["prompt_tokens"] += prompt_tokens
+    first_token_ms = fake_openai_config["first_token_ms"] + fake_openai_config["prompt_token_ms"] * prompt_tokens
+
+    if not body.get("stream"):
+        await asyncio.sleep((first_token_ms + fake_openai_config["token_ms"] * len(tokens)) / 1000)
+        fake_openai_stats["tokens_sent"] += len(tokens)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "fake",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens)},
+        }
+
+    async def stream():
+        completed = False
+        try:
+            await asyncio.sleep(first_token_ms / 1000)
+            yield _chunk(completion_id, {"role": "assistant", "content": ""})
+            for token in tokens:
+                yield _chunk(completion_id, {"content": token})
+                fake_openai_stats["tokens_sent"] += 1
+                await asyncio.sleep(fake_openai_config["token_ms"] / 1000)
+            yield _chunk(completion_id, {}, "stop")
+            yield "data: [DONE]\n\n"
+            completed = True
+        finally:
+            fake_openai_stats["streams_completed" if completed else "streams_cancelled"] += 1
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    """Deterministic bag-of-words embeddings: texts sharing words are similar."""
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    fake_openai_stats["embeddings"] += len(inputs)
+    data = []
+    for index, text in enumerate(inputs):
+        vector = [0.0] * EMBEDDING_DIMENSIONS
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % EMBEDDING_DIMENSIONS] += 1.0
+        data.append({"object": "embedding", "index": index, "embedding": vector})
+    return {"object": "list", "data": data, "model": "fake", "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+
+def start_fake_openai(
+    first_token_ms: float = 400.0,
+    token_ms: float = 15.0,
+    tokens: int = 120,
+    port: int = 0,
+    prompt_token_ms: float = 0.0
+) -> str:
+    """
+    Start the fake server on a background thread.
+
+    Args:
+        first_token_ms: Delay before the first token (and, unstreamed, before anything).
+        token_ms: Delay between tokens.
+        tokens: Number of tokens per completion.
+        port: Port to listen on; 0 picks a free one.
+        prompt_token_ms: Extra delay before the first token per prompt token.
+
+    Returns:
+        The base URL to use as OPENAI_BASE_URL.
+    """
+    fake_openai_config.update(first_token_ms=first_token_ms, token_ms=token_ms, tokens=tokens, prompt_token_ms=prompt_token_ms)
+    return start_server(app, port) + "/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI chat completion server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-ms", type=float, default=400.0)
+    parser.add_argument("--token-ms", type=float, default=15.0)
+    parser.add_argument("--tokens", type=int, default=120)
+    parser.add_argument("--prompt-token-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake_openai_config.update(
+        first_token_ms=args.first_token_ms, token_ms=args.token_ms, tokens=args.tokens, prompt_token_ms=args.prompt_token_ms
+    )
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,160 @@
+"""
+Fake Cloudinary and Weather Services
+A local image CDN serving synthetic and uploaded images, an in-process
+Cloudinary upload stand-in storing into it, and weatherapi.com-compatible
+/forecast.json and /current.json endpoints, for benchmarks and offline
+development.
+
+Run standalone and point the backend at it:
+    python -m benchmarks.fake_services --port 8002
+    WEATHER_API_BASE_URL=http://127.0.0.1:8002/weather/v1 uvicorn app:app
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import Response
+
+from benchmarks.stubs import start_server, synthetic_image
+
+# latency_ms is added to every request, modelling the network to the real service
+fake_services_config = {"latency_ms": 0.0}
+fake_services_stats = {"image_requests": 0, "uploads": 0, "weather_requests": 0}
+# public_id -> uploaded image bytes
+uploaded_images: Dict[str, bytes] = {}
+
+app = FastAPI()
+
+
+@functools.lru_cache(maxsize=1024)
+def _synthetic(seed: int) -> bytes:
+    return synthetic_image(seed)
+
+
+async def _delay() -> None:
+    if fake_services_config["latency_ms"]:
+        await asyncio.sleep(fake_services_config["latency_ms"] / 1000)
+
+
+@app.get("/images/synthetic/{seed}.jpg")
+async def synthetic(seed: int):
+    await _delay()
+    fake_services_stats["image_requests"] += 1
+    return Response(_synthetic(seed), media_type="image/jpeg")
+
+
+@app.get("/images/uploads/{public_id}.jpg")
+async def uploaded(public_id: str):
+    await _delay()
+    fake_services_stats["image_requests"] += 1
+    if public_id not in uploaded_images:
+        raise HTTPException(status_code=404, detail="Not found")
+    return Response(uploaded_images[public_id], media_type="image/jpeg")
+
+
+def _location(q: str) -> Dict[str, Any]:
+    latitude, longitude = (float(part) for part in q.split(","))
+    return {"name": "Benchmark City", "region": "Bench", "country": "Offline", "lat": latitude, "lon": longitude}
+
+
+def _temperature(q: str, day: date) -> float:
+    """A deterministic temperature per location and day between 0 and 30 C."""
+    digest = hashlib.sha256(f"{q}:{day.isoformat()}".encode()).digest()
+    return round(digest[0] / 255 * 30, 1)
+
+
+def _condition(temperature: float) -> Dict[str, Any]:
+    return {"text": "Sunny" if temperature > 18 else "Cloudy", "icon": "//cdn.weatherapi.com/weather/64x64/day/116.png"}
+
+
+@app.get("/weather/v1/current.json")
+async def current(q: str, key: str = None):
+    await _delay()
+    fake_services_stats["weather_requests"] += 1
+    temperature = _temperature(q, date.today())
+    return {
+        "location": _location(q),
+        "current": {
+            "temp_c": temperature,
+            "temp_f": round(temperature * 9 / 5 + 32, 1),
+            "condition": _condition(temperature),
+            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        },
+    }
+
+
+@app.get("/weather/v1/forecast.json")
+async def forecast(q: str, days: int = 3, key: str = None):
+    await _delay()
+    fake_services_stats["weather_requests"] += 1
+    forecast_days = []
+    for offset in range(days):
+        day = date.today() + timedelta(days=offset)
+        temperature = _temperature(q, day)
+        forecast_days.append({"date": day.isoformat(), "day": {"avgtemp_c": temperature, "condition": _condition(temperature)}})
+    return {
+        "location": _location(q),
+        "current": {"temp_c": forecast_days[0]["day"]["avgtemp_c"]},
+        "forecast": {"forecastday": forecast_days},
+    }
+
+
+def install_cloudinary_stand_in(base_url: str) -> None:
+    """
+    Replace the Cloudinary SDK's upload and destroy with in-memory versions
+    whose images are served by the fake image CDN at base_url.
+    """
+    import cloudinary.uploader
+
+    def upload(file, **options):
+        with open(file, "rb") as f:
+            data = f.read()
+        public_id = options.get("public_id") or hashlib.sha1(data).hexdigest()[:20]
+        uploaded_images[public_id] = data
+        fake_services_stats["uploads"] += 1
+        return {"public_id": public_id, "secure_url": f"{base_url}/images/uploads/{public_id}.jpg", "bytes": len(data)}
+
+    def destroy(public_id, **options):
+        return {"result": "ok" if uploaded_images.pop(public_id, None) is not None else "not found"}
+
+    cloudinary.uploader.upload = upload
+    cloudinary.uploader.destroy = destroy
+
+
+def install_weather_stand_in(base_url: str) -> None:
+    """Point the weather service at the fake weather API at base_url."""
+    import weather_data.service
+
+    weather_data.service.WEATHER_API_BASE_URL = f"{base_url}/weather/v1"
+
+
+def start_fake_services(latency_ms: float = 0.0, port: int = 0) -> str:
+    """
+    Start the fake services on a background thread.
+
+    Args:
+        latency_ms: Delay added to every request.
+        port: Port to listen on; 0 picks a free one.
+
+    Returns:
+        The base URL; the weather API is at <base URL>/weather/v1.
+    """
+    fake_services_config["latency_ms"] = latency_ms
+    return start_server(app, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run fake Cloudinary image and weather services")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    fake_services_config["latency_ms"] = args.latency_ms
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,160 @@
+"""
+Benchmark Runner
+Runs the benchmark suite offline and writes the results, with the commit
+they were measured at, to a JSON file; compares two such files to spot
+regressions between commits.
+
+    python -m benchmarks.run --output results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run --only bench_wardrobe bench_image_pipeline
+    python -m benchmarks.run --compare results/base.json results/head.json
+
+Every benchmark runs in its own interpreter, so module-level state (stand-ins,
+caches, environment defaults) cannot leak between benchmarks.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+BENCHMARKS = [
+    "bench_image_pipeline",
+    "bench_image_decode",
+    "bench_wardrobe",
+    "bench_auth_latency",
+    "bench_login_throughput",
+    "bench_rotation",
+    "bench_chat_streaming",
+    "bench_chat_context",
+]
+
+# Keys of list entries that identify a row, so rows compare by identity rather than position
+ROW_KEYS = ("case", "endpoint", "wardrobe_size", "mode", "workers", "scenario", "size")
+# Metric name suffixes and whether lower is better
+LOWER_IS_BETTER = ("_ms", "_mb", "_seconds", "round_trips_per_request", "round_trips_per_call", "prompt_tokens")
+HIGHER_IS_BETTER = ("per_second", "hit_rate", "coverage")
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(name: str) -> Dict[str, Any]:
+    """Run one benchmark module with its defaults in a fresh interpreter."""
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-m", f"benchmarks.{name}"], capture_output=True, text=True)
+    elapsed = round(time.perf_counter() - started, 2)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:] or ["failed"], "wall_seconds": elapsed}
+    return {"results": json.loads(completed.stdout), "wall_seconds": elapsed}
+
+
+def run_suite(names: List[str]) -> Dict[str, Any]:
+    """Run benchmarks and collect their results with the environment they ran in."""
+    suite = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        suite["benchmarks"][name] = run_benchmark(name)
+    return suite
+
+
+def _flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """Flatten nested results into {"path.to.metric": number}."""
+    flat = {}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            flat.update(_flatten(child, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, list):
+        for index, child in enumerate(value):
+            label = str(index)
+            if isinstance(child, dict):
+                label = ",".join(f"{key}={child[key]}" for key in ROW_KEYS if key in child) or label
+            flat.update(_flatten(child, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = float(value)
+    return flat
+
+
+def _direction(metric: str) -> int:
+    """1 if higher is better, -1 if lower is better, 0 if the metric is not a performance measure."""
+    name = metric.rsplit(".", 1)[-1]
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER) and name != "wall_seconds":
+        return -1
+    return 0
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> Tuple[List[str], int]:
+    """
+    Compare two suite results.
+
+    Args:
+        baseline: Results of the base commit.
+        current: Results of the commit under test.
+        threshold: Relative change beyond which a metric counts as changed.
+
+    Returns:
+        Tuple of (report lines, number of regressions).
+    """
+    old = _flatten(baseline["benchmarks"])
+    new = _flatten(current["benchmarks"])
+    lines = [f"{'metric':<90} {'base':>12} {'head':>12} {'change':>8}"]
+    regressions = 0
+    for metric in sorted(old.keys() & new.keys()):
+        direction = _direction(metric)
+        if not direction or not old[metric]:
+            continue
+        change = (new[metric] - old[metric]) / abs(old[metric])
+        if abs(change) < threshold:
+            continue
+        regressed = change * direction < 0
+        regressions += regressed
+        marker = "REGRESSION" if regressed else "improved"
+        lines.append(f"{metric:<90} {old[metric]:>12.3f} {new[metric]:>12.3f} {change:>+8.1%} {marker}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite or compare two result files")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="benchmarks to run (default: all)")
+    parser.add_argument("--output", help="write results to this JSON file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change reported by --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text()) for path in args.compare)
+        lines, regressions = compare(baseline, current, args.threshold)
+        print(f"{baseline.get('commit')} -> {current.get('commit')}")
+        print("\n".join(lines))
+        sys.exit(1 if regressions else 0)
+
+    suite = run_suite(args.only or BENCHMARKS)
+    output = json.dumps(suite, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    failed = [name for name, result in suite["benchmarks"].items() if "error" in result]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
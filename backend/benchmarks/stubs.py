@@ -0,0 +1,189 @@
+"""
+Benchmark Stand-ins
+Local replacements for external services so benchmarks run offline.
+
+Call the install_* functions before importing any backend module: several
+modules connect to their services at import time.
+"""
+
+import functools
+import io
+import json
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pymongo
+
+# Collection methods that cost one round trip against a real server
+_ROUND_TRIP_METHODS = (
+    "find_one", "find", "insert_one", "insert_many", "update_one", "update_many",
+    "replace_one", "delete_one", "delete_many", "find_one_and_update",
+    "find_one_and_replace", "find_one_and_delete", "aggregate", "bulk_write",
+    "count_documents", "distinct",
+)
+
+_mongo_client = None
+mongo_stats = {"round_trips": 0, "round_trip_ms": 0.0}
+
+_local = threading.local()
+
+
+def _with_round_trip(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        # mongomock implements some operations on top of others (find_one
+        # calls find); only the outermost call is a round trip
+        if getattr(_local, "in_operation", False):
+            return method(*args, **kwargs)
+        mongo_stats["round_trips"] += 1
+        if mongo_stats["round_trip_ms"]:
+            time.sleep(mongo_stats["round_trip_ms"] / 1000)
+        _local.in_operation = True
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _local.in_operation = False
+    return wrapper
+
+
+def install_mongo_stand_in(round_trip_ms: float = 0.0):
+    """
+    Replace pymongo.MongoClient with a shared in-memory mongomock client.
+
+    Args:
+        round_trip_ms: Simulated network latency added to every collection
+            operation, so round-trip savings show up in timings.
+
+    Returns:
+        The mongomock client every backend module will receive.
+    """
+    global _mongo_client
+    import mongomock
+
+    mongo_stats["round_trip_ms"] = round_trip_ms
+    if _mongo_client is None:
+        for name in _ROUND_TRIP_METHODS:
+            method = getattr(mongomock.collection.Collection, name, None)
+            if method is not None:
+                setattr(mongomock.collection.Collection, name, _with_round_trip(method))
+        _mongo_client = mongomock.MongoClient()
+        pymongo.MongoClient = lambda *args, **kwargs: _mongo_client
+    return _mongo_client
+
+
+def reset_mongo_stats() -> None:
+    """Reset the round-trip counter."""
+    mongo_stats["round_trips"] = 0
+
+
+def start_server(app, port: int = 0) -> str:
+    """
+    Serve an ASGI app with uvicorn on a background thread.
+
+    Args:
+        app: The ASGI app.
+        port: Port to listen on; 0 picks a free one.
+
+    Returns:
+        The server's base URL.
+    """
+    import uvicorn
+
+    if not port:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def synthetic_image(seed: int, size: Tuple[int, int] = (800, 1000), quality: int = 90) -> bytes:
+    """
+    Generate a deterministic JPEG resembling a product photo: a garment-like
+    shape with texture on a light background.
+
+    Args:
+        seed: Seed; the same seed always yields the same image.
+        size: Image width and height in pixels.
+        quality: JPEG quality.
+
+    Returns:
+        The encoded JPEG.
+    """
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.new("RGB", size, (rng.randint(225, 255),) * 3)
+    draw = ImageDraw.Draw(image)
+    color = tuple(rng.randint(20, 230) for _ in range(3))
+    margin_x, margin_y = width // rng.randint(5, 8), height // rng.randint(6, 10)
+    draw.rounded_rectangle((margin_x, margin_y, width - margin_x, height - margin_y), radius=width // 10, fill=color)
+    # Stripes and noise so the JPEG encodes like a photo rather than a flat block
+    for offset in range(margin_y, height - margin_y, rng.randint(12, 40)):
+        shade = tuple(max(0, channel - rng.randint(10, 40)) for channel in color)
+        draw.line((margin_x, offset, width - margin_x, offset), fill=shade, width=rng.randint(2, 6))
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    image = Image.blend(image, noise, 0.08).filter(ImageFilter.SMOOTH)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def synthetic_wardrobe(
+    size: int,
+    wardrobe_id: str = "benchmark-user",
+    image_base_url: Optional[str] = None,
+    seed: int = 7
+) -> List[Dict[str, Any]]:
+    """
+    Build random wardrobe items with tags drawn from the real tag configuration.
+
+    Args:
+        size: Number of items.
+        wardrobe_id: The wardrobe the items belong to.
+        image_base_url: Base URL of benchmarks/fake_services.py; items then
+            point at downloadable synthetic images. Defaults to placeholder
+            Cloudinary URLs.
+        seed: Seed for the tags.
+
+    Returns:
+        Item documents as stored in the outfits collection.
+    """
+    rng = random.Random(seed)
+    with open("tags/categories.json") as f:
+        category_groups = json.load(f)["categoryGroups"]
+    with open("tags/specific_attributes.json") as f:
+        specific_attributes = json.load(f)
+    with open("tags/generic_attributes.json") as f:
+        generic_attributes = json.load(f)
+
+    items = []
+    for i in range(size):
+        group = rng.choice(list(category_groups))
+        tags = {"categoryGroup": group, "category": rng.choice(category_groups[group]["categories"])}
+        for attribute, options in specific_attributes.get(group, {}).items():
+            if options:
+                tags[attribute] = rng.choice(options)
+        for attribute, options in generic_attributes.items():
+            if options:
+                tags[attribute] = rng.choice(options)
+        if image_base_url:
+            image_url = f"{image_base_url}/images/synthetic/{i}.jpg"
+        else:
+            image_url = f"https://res.cloudinary.com/demo/image/upload/v1/item_{i}.jpg"
+        items.append({
+            "item_id": f"{i:08d}-0000-4000-8000-000000000000",
+            "wardrobe_id": wardrobe_id,
+            "image_url": image_url,
+            "tags": tags,
+        })
+    return items
@@ -3,7 +3,7 @@ Cloudinary Uploader Package
 A modular package for uploading and managing images on Cloudinary.
 """
 
-from cloudinary_uploader.uploader import upload_image, delete_image
+from cloudinary_uploader.uploader import upload_image, upload_image_with_variants, delete_image, select_image_url, variant_url, IMAGE_VARIANT_WIDTHS
 
-__all__ = ['upload_image', 'delete_image']
+__all__ = ['upload_image', 'upload_image_with_variants', 'delete_image', 'select_image_url', 'variant_url', 'IMAGE_VARIANT_WIDTHS']
 
@@ -4,12 +4,14 @@ Handles uploading and deleting images on Cloudinary.
 """
 
 import os
-from typing import Tuple, Dict
+from typing import Dict, Optional, Tuple
 
 import cloudinary
 import cloudinary.uploader
 from dotenv import load_dotenv
 
+from observability import traced
+
 load_dotenv()
 
 cloudinary.config(
@@ -18,7 +20,58 @@ cloudinary.config(
     api_secret=os.getenv("CLOUDINARY_API_SECRET")
 )
 
+# Widths (px) of the WebP derivatives generated for wardrobe images at upload
+IMAGE_VARIANT_WIDTHS = [int(width) for width in os.getenv("IMAGE_VARIANT_WIDTHS", "150,300,600").split(",")]
+
+_DELIVERY_PATH = "/image/upload/"
+
+
+def _variant_transformation(width: int) -> str:
+    """The derivative transformation; eager uploads and delivery URLs must use the same string."""
+    return f"c_limit,f_webp,q_auto,w_{width}"
+
+
+def variant_url(image_url: str, width: int) -> str:
+    """
+    Build the delivery URL of an image's derivative at a width.
+
+    Args:
+        image_url: The original Cloudinary delivery URL.
+        width: The derivative width.
+
+    Returns:
+        The derivative URL, or image_url unchanged if it is not a Cloudinary upload URL.
+    """
+    if _DELIVERY_PATH not in image_url:
+        return image_url
+    prefix, path = image_url.split(_DELIVERY_PATH, 1)
+    return f"{prefix}{_DELIVERY_PATH}{_variant_transformation(width)}/{path}"
+
+
+def select_image_url(image_url: str, image_variants: Optional[Dict[str, str]], min_width: int) -> str:
+    """
+    Pick the smallest derivative at least min_width wide.
+
+    Items uploaded before derivatives existed fall back to the delivery URL
+    of the same derivative, which Cloudinary generates on first request.
 
+    Args:
+        image_url: The original image URL.
+        image_variants: Stored derivative URLs keyed by width, if any.
+        min_width: The width the image is displayed or composed at.
+
+    Returns:
+        The URL to fetch; the original if no derivative is wide enough.
+    """
+    widths = sorted(width for width in IMAGE_VARIANT_WIDTHS if width >= min_width)
+    if not widths:
+        return image_url
+    if image_variants and str(widths[0]) in image_variants:
+        return image_variants[str(widths[0])]
+    return variant_url(image_url, widths[0])
+
+
+@traced("upload_image")
 def upload_image(image_path: str) -> Tuple[str, str]:
     """
     Upload an image to Cloudinary.
@@ -33,6 +86,32 @@ def upload_image(image_path: str) -> Tuple[str, str]:
     return response['secure_url'], response['public_id']
 
 
+@traced("upload_image")
+def upload_image_with_variants(image_path: str) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Upload an image to Cloudinary and generate its WebP derivatives once,
+    as part of the upload.
+
+    Args:
+        image_path: Path to the image file to upload.
+
+    Returns:
+        Tuple containing (secure_url, public_id, derivative URLs keyed by width).
+    """
+    transformations = [_variant_transformation(width) for width in IMAGE_VARIANT_WIDTHS]
+    response = cloudinary.uploader.upload(
+        image_path,
+        eager=[{"raw_transformation": transformation} for transformation in transformations]
+    )
+    secure_url = response['secure_url']
+    eager_urls = {eager.get("transformation"): eager.get("secure_url") for eager in response.get("eager") or []}
+    image_variants = {
+        str(width): eager_urls.get(transformation) or variant_url(secure_url, width)
+        for width, transformation in zip(IMAGE_VARIANT_WIDTHS, transformations)
+    }
+    return secure_url, response['public_id'], image_variants
+
+
 def delete_image(public_id: str) -> Dict:
     """
     Delete an image from Cloudinary.
@@ -0,0 +1,8 @@
+"""
+Admin Package
+Operator-only diagnostics endpoints.
+"""
+
+from .routes import router
+
+__all__ = ['router']
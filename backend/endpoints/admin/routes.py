@@ -0,0 +1,92 @@
+"""
+Admin Routes
+Profiling endpoints for diagnosing a slow or growing worker. They only exist
+when PROFILER_ADMIN_TOKEN is set, and require it in the X-Admin-Token header.
+"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from observability.profiler import (
+    is_admin_token, profile_for, profile_store, start_memory_tracing, stop_memory_tracing, memory_snapshot,
+    ProfilerBusyError, PROFILER_DEFAULT_INTERVAL_MS, PROFILER_ENABLED, PROFILER_MAX_SECONDS
+)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Reject requests without the admin token; hide the routes entirely when profiling is disabled."""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+router = APIRouter(
+    prefix="/admin/profiler",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False,
+)
+
+
+@router.post("/sample", response_class=PlainTextResponse)
+async def sample_endpoint(
+    seconds: float = Query(10.0, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(PROFILER_DEFAULT_INTERVAL_MS, ge=1, le=1000)
+):
+    """
+    Sample every thread of this worker for a time-boxed period while it
+    serves live traffic. Returns folded stacks, e.g. for flamegraph.pl or
+    speedscope.
+    """
+    try:
+        return await asyncio.to_thread(profile_for, seconds, interval_ms)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile_endpoint(profile_id: str):
+    """
+    Get the folded stacks of a request profiled with the X-Profile-Request
+    header; the ID is returned in the request's X-Profile-Id header.
+    """
+    folded = profile_store.get(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return folded
+
+
+@router.post("/memory/start")
+async def start_memory_endpoint(frames: int = Query(10, ge=1, le=100)):
+    """
+    Start tracing allocations. Tracing slows allocation-heavy code down
+    noticeably; stop it when done.
+    """
+    start_memory_tracing(frames)
+    return {"result": True, "message": "Memory tracing started"}
+
+
+@router.get("/memory/snapshot")
+async def memory_snapshot_endpoint(
+    top: int = Query(25, ge=1, le=500),
+    path_filter: Optional[str] = Query(None, alias="filter")
+):
+    """
+    Report the largest allocation sites and their growth since the previous
+    snapshot, e.g. with filter=image_composer for the composer.
+    """
+    try:
+        return await asyncio.to_thread(memory_snapshot, top, path_filter)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.post("/memory/stop")
+async def stop_memory_endpoint():
+    """Stop tracing allocations."""
+    stop_memory_tracing()
+    return {"result": True, "message": "Memory tracing stopped"}
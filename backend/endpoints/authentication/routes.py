@@ -1,14 +1,28 @@
-from fastapi import APIRouter, HTTPException, status, Response, Depends
+import asyncio
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, status, Request, Response, Depends, Cookie
+import jwt
 from endpoints.authentication.models import SignUpRequest, LoginRequest, SignUpResponse, LoginResponse
-from auth.user_db import login, sign_up, get_user_by_id
-from auth.cookie_utils import issue_token
+from auth.user_db import login, sign_up, get_user_by_id, get_user_profile, UserNotFoundError
+from auth.cookie_utils import issue_token, SECRET_KEY, get_session_timeout_seconds
 from auth.deps import require_user
+from auth.revocation import revocation_list
+from auth.password_utils import PasswordHashingBusyError
+from auth.rate_limit import login_guard, LoginRateLimitedError
 from dotenv import load_dotenv
 import os 
 load_dotenv()
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+def _busy_exception(error: PasswordHashingBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(error),
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/signup", response_model=SignUpResponse, status_code=status.HTTP_201_CREATED)
 async def signup_endpoint(request: SignUpRequest):
 
@@ -20,8 +34,11 @@ async def signup_endpoint(request: SignUpRequest):
             "latitude": request.latitude,
             "longitude": request.longitude
         }
-        user_id = sign_up(auth_data)
+        user_id = await sign_up(auth_data)
+        await asyncio.to_thread(login_guard.forget_unknown_email, request.email)
         return SignUpResponse(user_id=user_id)
+    except PasswordHashingBusyError as e:
+        raise _busy_exception(e)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -35,7 +52,23 @@ async def signup_endpoint(request: SignUpRequest):
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login_endpoint(request: LoginRequest, response: Response):
+async def login_endpoint(request: LoginRequest, response: Response, http_request: Request):
+
+    # Reject abusive or hopeless attempts before any database or bcrypt work
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    try:
+        email_may_exist = await asyncio.to_thread(login_guard.check, request.email, client_ip)
+    except LoginRateLimitedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, int(e.retry_after + 0.5)))}
+        )
+    if not email_may_exist:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
 
     auth_data = {
         "email": request.email,
@@ -44,19 +77,33 @@ async def login_endpoint(request: LoginRequest, response: Response):
         "longitude": request.longitude
     }
 
-    user_id, username, email = login(auth_data)
-    
+    try:
+        user_id, username, email = await login(auth_data)
+    except PasswordHashingBusyError as e:
+        raise _busy_exception(e)
+    except UserNotFoundError:
+        await asyncio.to_thread(login_guard.record_unknown_email, request.email)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid email or password"
+        )
+
     if not user_id or not username or not email:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
 
-    token = issue_token(user_id)
+    token = issue_token(user_id, get_user_profile(user_id))
     response.set_cookie(
         key="auth_token",
         value=token,
-        max_age=int(os.getenv('SESSION_TIMEOUT_SECONDS', '3600')),
+        max_age=get_session_timeout_seconds(),
         httponly=True,
         samesite="lax",
         secure=False,
@@ -73,7 +120,17 @@ async def session_endpoint(user=Depends(require_user)):
 
 
 @router.post("/logout")
-async def logout_endpoint(response: Response):
+async def logout_endpoint(response: Response, auth_token: str | None = Cookie(default=None)):
+
+    # Stateless tokens stay valid until they expire, so revoke this one explicitly
+    if auth_token:
+        try:
+            decoded = jwt.decode(auth_token, SECRET_KEY, algorithms=["HS256"])
+            if decoded.get("jti"):
+                expires_at = datetime.fromtimestamp(decoded["exp"], tz=timezone.utc)
+                await asyncio.to_thread(revocation_list.revoke_token, decoded["jti"], expires_at)
+        except jwt.InvalidTokenError:
+            pass
 
     response.delete_cookie(key="auth_token", path="/")
     return {"message": "Logged out"}
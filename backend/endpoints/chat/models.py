@@ -7,6 +7,7 @@ class ChatRequest(BaseModel):
     message: str
     temperature: Optional[float] = None
     context: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None  # Continue a conversation; a new session is started if omitted
 
 
 class ChatResponse(BaseModel):
@@ -15,3 +16,19 @@ class ChatResponse(BaseModel):
     image_urls: Optional[List[str]] = None
     result: bool
     message: str = "Chat response generated successfully"
+    session_id: Optional[str] = None
+
+
+class ChatMessage(BaseModel):
+    """A message of a chat session"""
+    role: str
+    content: str
+
+
+class ChatSessionResponse(BaseModel):
+    """Response model for a chat session"""
+    session_id: str
+    summary: str = ""
+    messages: List[ChatMessage] = []
+    result: bool
+    message: str = "Chat session retrieved successfully"
@@ -3,15 +3,25 @@ Chat Routes
 FastAPI routes for AI-powered outfit chat conversations.
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from endpoints.chat.models import ChatRequest, ChatResponse
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status, Depends
+from fastapi.responses import StreamingResponse
 import openai
-from dotenv import load_dotenv
-import os
-import random
+from endpoints.chat.models import ChatRequest, ChatResponse, ChatSessionResponse
+from outfit_chat import (
+    complete_chat, stream_chat, lookup_cached_chat, store_cached_chat, build_wardrobe_context, resolve_item_references,
+    get_session, open_session, append_messages, delete_session, compact_session, ChatNotConfiguredError, ChatSessionNotFoundError
+)
+from mongodb_uploader import get_items
+from weather_data.service import get_today_weather
 from auth.deps import require_user
+from endpoints.sse import sse_event
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/chat",
@@ -21,70 +31,48 @@ router = APIRouter(
 
 
 @router.post("/outfit-chat", response_model=ChatResponse, status_code=status.HTTP_200_OK)
-async def outfit_chat_endpoint(request: ChatRequest, user=Depends(require_user)):
+async def outfit_chat_endpoint(request: ChatRequest, background_tasks: BackgroundTasks, user=Depends(require_user)):
     """
     Chat about outfits and fashion with AI assistance.
-    """
+    Returns once the full response is generated; see /chat/outfit-chat/stream
+    to receive it token by token. Repeated and near-identical messages are
+    answered from the response cache.
 
-    openai_api_key = os.getenv('OPENAI_API_KEY')
-    if not openai_api_key:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="OpenAI API key not configured"
-        )
+    Responses are grounded in the user's wardrobe: the items most relevant
+    to the message are included in the prompt, and image_urls holds the
+    images of the items the response recommends.
+
+    Conversations are kept server-side: send back the returned session_id
+    to continue one. Older turns are summarized once the history grows
+    past its token budget. A session_id of another user's session is
+    answered with 404.
+    """
 
     try:
-        # Initialize OpenAI client
-        client = openai.OpenAI(api_key=openai_api_key)
-
-        # Create system prompt for fashion/outfit advice
-        system_prompt = """
-        You are a fashion stylist and outfit advisor. Help users with:
-        - Outfit suggestions and combinations
-        - Fashion advice and trends
-        - Clothing recommendations based on occasions
-        - Color coordination and style tips
-        - Wardrobe organization and planning
-
-        Be helpful, creative, and provide practical fashion advice.
-        Keep responses conversational but informative.
-        """
-
-        # Prepare messages for OpenAI
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": request.message}
-        ]
-
-        # Add context if provided
-        if request.context:
-            context_str = f"Additional context: {request.context}"
-            messages.insert(1, {"role": "system", "content": context_str})
-
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=500,
-            temperature=request.temperature or 0.7,
+        session_id = request.session_id or str(uuid.uuid4())
+        (wardrobe_context, item_map), (summary, history) = await asyncio.gather(
+            _wardrobe_context(user, request.message),
+            _session_history(user, session_id)
         )
+        ai_response, cache_slot = await _lookup_cached(request, wardrobe_context, summary, history)
+        if ai_response is None:
+            ai_response = await complete_chat(request.message, request.temperature, request.context, wardrobe_context, history, summary)
+            store_cached_chat(cache_slot, ai_response)
 
-        ai_response = response.choices[0].message.content.strip()
+        chat_response = _chat_response(ai_response, item_map, session_id)
+        await _save_turn(user, session_id, summary, history, request.message, chat_response.response, background_tasks)
+        return chat_response
 
-        # Randomly include images (40% chance for demo)
-        image_urls = None
-        if random.random() < 0.4:  # 40% chance
-            # Randomly choose 1-3 images
-            num_images = random.randint(1, 3)
-            image_urls = ["https://res.cloudinary.com/dnkrqpuqk/image/upload/v1767724850/tmp4o4i45wv_dig5uw.jpg"] * num_images
-
-        return ChatResponse(
-            response=ai_response,
-            image_urls=image_urls,
-            result=True,
-            message="Chat response generated successfully"
+    except ChatSessionNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ChatNotConfiguredError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
         )
-
     except openai.OpenAIError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -95,3 +83,209 @@ async def outfit_chat_endpoint(request: ChatRequest, user=Depends(require_user))
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Chat processing error: {str(e)}"
         )
+
+
+@router.post("/outfit-chat/stream", status_code=status.HTTP_200_OK)
+async def outfit_chat_stream_endpoint(
+    request: ChatRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    user=Depends(require_user)
+):
+    """
+    Chat about outfits and fashion with AI assistance, streamed as server-sent events.
+
+    Events:
+        token: {"text"} for every piece of the response as it is generated;
+            item references such as [i2] are sent as generated
+        done: {"response", "image_urls", "result", "message", "session_id"}, the
+            same fields as /chat/outfit-chat, with item references resolved
+        error: {"detail"} if generation failed; the stream ends after it
+
+    Generation stops as soon as the client disconnects, and an interrupted
+    turn is not added to the session. A session_id of another user's
+    session is answered with 404 before the stream starts.
+    """
+
+    session_id = request.session_id or str(uuid.uuid4())
+    try:
+        summary, history = await _session_history(user, session_id)
+    except ChatSessionNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+    async def event_stream():
+        chunks = []
+        try:
+            wardrobe_context, item_map = await _wardrobe_context(user, request.message)
+            cached_response, cache_slot = await _lookup_cached(request, wardrobe_context, summary, history)
+        except ChatNotConfiguredError as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat processing error: {str(e)}"})
+            return
+        if cached_response is not None:
+            chat_response = _chat_response(cached_response, item_map, session_id)
+            try:
+                await _save_turn(user, session_id, summary, history, request.message, chat_response.response, background_tasks)
+            except ChatSessionNotFoundError as e:
+                yield sse_event("error", {"detail": str(e)})
+                return
+            yield sse_event("token", {"text": cached_response})
+            yield sse_event("done", chat_response.dict())
+            return
+
+        tokens = stream_chat(request.message, request.temperature, request.context, wardrobe_context, history, summary)
+        try:
+            async for text in tokens:
+                if await http_request.is_disconnected():
+                    return
+                chunks.append(text)
+                yield sse_event("token", {"text": text})
+        except ChatNotConfiguredError as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        except openai.OpenAIError as e:
+            yield sse_event("error", {"detail": f"OpenAI API error: {str(e)}"})
+            return
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat processing error: {str(e)}"})
+            return
+        finally:
+            # Stops the upstream completion if we return early or are cancelled
+            await tokens.aclose()
+
+        ai_response = "".join(chunks).strip()
+        store_cached_chat(cache_slot, ai_response)
+        chat_response = _chat_response(ai_response, item_map, session_id)
+        # Background tasks run once the stream has been sent, so tasks added here still run
+        try:
+            await _save_turn(user, session_id, summary, history, request.message, chat_response.response, background_tasks)
+        except ChatSessionNotFoundError as e:
+            yield sse_event("error", {"detail": str(e)})
+            return
+        yield sse_event("done", chat_response.dict())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionResponse, status_code=status.HTTP_200_OK)
+async def get_chat_session_endpoint(session_id: str, user=Depends(require_user)):
+    """
+    Get the summary and the recent messages of a chat session.
+    """
+
+    session = await asyncio.to_thread(get_session, session_id, user["user_id"])
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found"
+        )
+    return ChatSessionResponse(
+        session_id=session_id,
+        summary=session.get("summary", ""),
+        messages=session.get("messages", []),
+        result=True
+    )
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_200_OK)
+async def delete_chat_session_endpoint(session_id: str, user=Depends(require_user)):
+    """
+    Delete a chat session, e.g. when the user starts a new conversation.
+    """
+
+    deleted = await asyncio.to_thread(delete_session, session_id, user["user_id"])
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found"
+        )
+    return {"result": True, "message": "Chat session deleted successfully"}
+
+
+async def _wardrobe_context(user: Dict[str, Any], message: str) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+    """Load the user's items and today's weather concurrently and pack the relevant items."""
+    items, weather = await asyncio.gather(
+        asyncio.to_thread(get_items, user["user_id"]),
+        _today_weather(user)
+    )
+    return build_wardrobe_context(items, message, weather)
+
+
+async def _today_weather(user: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    user_location = user.get("location")
+    if not user_location:
+        return None
+    try:
+        weather_result = await get_today_weather(user_location["latitude"], user_location["longitude"])
+        return weather_result.get("today") if weather_result else None
+    except Exception as e:
+        logger.warning("Failed to fetch weather data: %s", e)
+        return None
+
+
+async def _session_history(user: Dict[str, Any], session_id: str) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Load the summary and messages of a session; unknown or expired sessions start empty.
+    Raises ChatSessionNotFoundError if the ID belongs to another user's session.
+    """
+    session = await asyncio.to_thread(open_session, session_id, user["user_id"])
+    if not session:
+        return "", []
+    return session.get("summary", ""), session.get("messages", [])
+
+
+async def _lookup_cached(
+    request: ChatRequest,
+    wardrobe_context: str,
+    summary: str,
+    history: List[Dict[str, str]]
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Look up the response cache; follow-up turns depend on the conversation and are never cached."""
+    if summary or history:
+        return None, None
+    return await lookup_cached_chat(request.message, request.temperature, _cache_context(request.context, wardrobe_context))
+
+
+async def _save_turn(
+    user: Dict[str, Any],
+    session_id: str,
+    summary: str,
+    history: List[Dict[str, str]],
+    message: str,
+    ai_response: str,
+    background_tasks: BackgroundTasks
+) -> None:
+    """
+    Add a turn to the session before responding, and summarize old turns after responding.
+    The response is stored with item references resolved, since short item IDs only hold for one turn.
+    """
+    turn = [{"role": "user", "content": message}, {"role": "assistant", "content": ai_response}]
+    await asyncio.to_thread(append_messages, session_id, user["user_id"], turn)
+    background_tasks.add_task(compact_session, session_id, user["user_id"], summary, history + turn)
+
+
+def _cache_context(context: Optional[Dict[str, Any]], wardrobe_context: str) -> Optional[Dict[str, Any]]:
+    """The context the response cache keys on: grounded responses only match the same wardrobe section."""
+    if not wardrobe_context:
+        return context
+    return {**(context or {}), "wardrobe_context": wardrobe_context}
+
+
+def _chat_response(ai_response: str, item_map: Dict[str, Dict[str, Any]], session_id: str) -> ChatResponse:
+    response_text, image_urls = resolve_item_references(ai_response, item_map)
+    return ChatResponse(
+        response=response_text,
+        image_urls=image_urls,
+        result=True,
+        message="Chat response generated successfully",
+        session_id=session_id
+    )
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict
 
 class Outfit(BaseModel):
     """Model for an outfit"""
@@ -7,6 +7,8 @@ class Outfit(BaseModel):
     wardrobe_id: str
     image_url: str
     tags: dict
+    image_variants: Optional[Dict[str, str]] = None  # WebP derivative URLs keyed by width
+    thumbnail_url: Optional[str] = None  # Smallest derivative adequate for the wardrobe grid
 
 class UploadOutfitResponse(BaseModel):
     """Response model for uploading an outfit"""
@@ -18,6 +20,19 @@ class GetOutfitsResponse(BaseModel):
     """Response model for getting outfits"""
     outfits: List[Outfit]
 
+class SearchOutfitsRequest(BaseModel):
+    """Request model for searching outfits by tags"""
+    filters: Dict[str, List[str]] = {}  # Tag attribute -> accepted values, e.g. {"color": ["black", "navy"], "season": ["winter"]}
+    facets: Optional[List[str]] = Field(None, max_length=20)  # Tag attributes to count values of; defaults to the common ones
+    skip: int = Field(0, ge=0)
+    limit: int = Field(50, ge=1, le=200)
+
+class SearchOutfitsResponse(BaseModel):
+    """Response model for searching outfits"""
+    outfits: List[Outfit]
+    total: int  # Number of matching outfits
+    facets: Dict[str, Dict[str, int]]  # Attribute -> lowercase value -> number of outfits; ignores the attribute's own filter
+
 class DeleteOutfitRequest(BaseModel):
     """Request model for deleting an outfit"""
     outfit_id: str
@@ -44,6 +59,24 @@ class SuggestOutfitRequest(BaseModel):
     condition: Optional[str] = None
     latitude: Optional[float] = None
     longitude: Optional[float] = None
+    composite_mode: Literal["image", "manifest"] = "image"  # "manifest" skips rendering; the client composes from composite_manifest
+
+class LayoutCell(BaseModel):
+    """Model for one image of a layout manifest, placed with its top-left corner at (x, y)"""
+    x: int
+    y: int
+    outfit_id: str
+    image_url: str
+
+class LayoutManifest(BaseModel):
+    """Model for a composite layout the client composes itself, in canvas pixels"""
+    layout: str  # grid
+    width: int
+    height: int
+    cell_size: int  # Cells are square; images fit within cell_size - 2 * padding, centered on white
+    padding: int
+    border_radius: int
+    cells: List[LayoutCell]
 
 class WeatherData(BaseModel):
     """Weather data model"""
@@ -59,6 +92,7 @@ class SuggestOutfitResponse(BaseModel):
     """Response model for suggesting outfits"""
     outfits: List[Outfit]
     composite_image_url: Optional[str] = None
+    composite_manifest: Optional[LayoutManifest] = None
     weather: Optional[WeatherData] = None
     result: bool
     message: str = "Outfits suggested successfully"
\ No newline at end of file
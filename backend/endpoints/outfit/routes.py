@@ -1,15 +1,23 @@
+import asyncio
+import logging
 import os
 import tempfile
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, status, File, UploadFile, Depends
-from endpoints.outfit.models import UploadOutfitResponse, GetOutfitsResponse, DeleteOutfitResponse, UpdateOutfitResponse, UpdateOutfitRequest, SuggestOutfitRequest, SuggestOutfitResponse
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from endpoints.outfit.models import UploadOutfitResponse, GetOutfitsResponse, DeleteOutfitResponse, UpdateOutfitResponse, UpdateOutfitRequest, SuggestOutfitRequest, SuggestOutfitResponse, SearchOutfitsRequest, SearchOutfitsResponse
 from image_tagging import tag_image
-from mongodb_uploader import upload_item, get_items, delete_item, update_item, upload_weekly_plan, get_weekly_plan   
+from mongodb_uploader import upload_item, get_items, delete_item, update_item, search_items, upload_weekly_plan, get_weekly_plan, DEFAULT_FACETS
 from uuid import uuid4
-from cloudinary_uploader import upload_image
-from image_composer import create_composite_image
+from cloudinary_uploader import upload_image, upload_image_with_variants, select_image_url
+from image_composer import create_composite_image, prerender_cell_tile, build_layout_manifest, composite_source_url
+from image_ingest import spool_upload, prepare_upload, upload_limiter, UploadTooLargeError, InvalidImageError, UploadBusyError
 from auth.deps import require_user
 
+logger = logging.getLogger(__name__)
+
+# Width of the wardrobe grid thumbnails (cards are about 150 CSS px wide, so 2x for high-DPI screens)
+OUTFIT_THUMBNAIL_WIDTH = int(os.getenv("OUTFIT_THUMBNAIL_WIDTH", "300"))
+
 router = APIRouter(
     prefix="/outfit",
     tags=["outfit"],
@@ -17,28 +25,53 @@ router = APIRouter(
 )
 
 
-@router.post("/upload-outfit", response_model=UploadOutfitResponse, status_code=status.HTTP_201_CREATED)
+# The multipart body is parsed by the endpoint itself, so describe it for the API docs
+UPLOAD_OUTFIT_REQUEST_BODY = {
+    "required": True,
+    "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"],
+    }}},
+}
+
+
+@router.post(
+    "/upload-outfit",
+    response_model=UploadOutfitResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": UPLOAD_OUTFIT_REQUEST_BODY}
+)
 async def upload_outfit_endpoint(
-    file: UploadFile = File(...),
+    request: Request,
     user=Depends(require_user)
 ):
+    """
+    Upload a wardrobe item image (JPEG, PNG or WebP, at most MAX_UPLOAD_BYTES)
+    in the multipart form field "file".
+    The body is parsed as it arrives and the file written to disk once,
+    answering 413 as soon as it exceeds the limit; it is then validated from
+    its header and downscaled if oversized before it is tagged and stored.
+    Few uploads are decoded at once; beyond the queue limit the request is
+    answered 429.
+    """
     
-    temp_file_path = None
+    temp_file_paths = []
     try:
-        if not file.content_type or not file.content_type.startswith('image/'):
+        temp_file_path, content_type = await spool_upload(request.headers.get("content-type", ""), request.stream())
+        temp_file_paths.append(temp_file_path)
+        if not content_type.startswith('image/'):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File must be an image"
             )
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            temp_file_path = temp_file.name
-            content = await file.read()
-            temp_file.write(content)
-        
-        tagged_dict = tag_image(temp_file_path)
-        
-        image_url, public_id = upload_image(temp_file_path)
+        # Only decoding is bounded; tagging and uploading mostly wait on the network
+        image_path = await upload_limiter.run(prepare_upload, temp_file_path)
+        temp_file_paths.append(image_path)
+        tagged_dict = await asyncio.to_thread(tag_image, image_path)
+        image_url, public_id, image_variants = await asyncio.to_thread(upload_image_with_variants, image_path)
+        await _prerender_tile(image_url, image_variants, image_path)
         
         item_id = str(uuid4())
         
@@ -46,10 +79,11 @@ async def upload_outfit_endpoint(
             "wardrobe_id": user["user_id"],
             "item_id": item_id,
             "image_url": image_url,
+            "image_variants": image_variants,
             "tags": tagged_dict
         }
         
-        upload_item(document)
+        await asyncio.to_thread(upload_item, document)
         
         return UploadOutfitResponse(
             outfit_id=item_id,
@@ -59,38 +93,87 @@ async def upload_outfit_endpoint(
         
     except HTTPException:
         raise
+    except UploadTooLargeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except InvalidImageError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except UploadBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": "2"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred during upload: {str(e)}"
         )
     finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-            except Exception:
-                pass
+        for temp_file_path in set(temp_file_paths):
+            if os.path.exists(temp_file_path):
+                try:
+                    os.remove(temp_file_path)
+                except Exception:
+                    pass
 
 
+async def _prerender_tile(image_url: str, image_variants, image_path: str) -> None:
+    """Render the grid tile of a new item from its local copy, so its first composite needs no download."""
+    try:
+        url = composite_source_url({"image_url": image_url, "image_variants": image_variants})
+        await upload_limiter.run(prerender_cell_tile, url, image_path)
+    except Exception as e:
+        # The tile is rendered on first use instead
+        logger.warning("Failed to prerender tile of %s: %s", image_url, e)
 
 
 @router.get("/get-outfits", response_model=GetOutfitsResponse, status_code=status.HTTP_200_OK)
 async def get_outfits_endpoint(user=Depends(require_user)):
 
     items = get_items(user["user_id"])
-    outfits = []
-    for item in items:
-
-        outfit = {
-            "outfit_id": item.get("item_id", ""),
-            "wardrobe_id": item.get("wardrobe_id", ""),
-            "image_url": item.get("image_url", ""),
-            "tags": item.get("tags", {})
-        }
-        outfits.append(outfit)
+    outfits = [_outfit_from_item(item) for item in items]
     return GetOutfitsResponse(outfits=outfits)
 
 
+@router.post("/search", response_model=SearchOutfitsResponse, status_code=status.HTTP_200_OK)
+async def search_outfits_endpoint(request: SearchOutfitsRequest, user=Depends(require_user)):
+    """
+    Search the wardrobe by tags, e.g. black or navy items for winter, and
+    count the values of the requested tag attributes (facets).
+
+    Values of one attribute are alternatives, attributes must all match;
+    matching is case-insensitive. The facet counts of an attribute ignore
+    the filter on that attribute, so they show what selecting another value
+    would return. Items, total and facet counts come from one query.
+    """
+
+    facets = request.facets if request.facets is not None else DEFAULT_FACETS
+    result = await asyncio.to_thread(search_items, user["user_id"], request.filters, facets, request.skip, request.limit)
+    return SearchOutfitsResponse(
+        outfits=[_outfit_from_item(item) for item in result["items"]],
+        total=result["total"],
+        facets=result["facets"]
+    )
+
+
+def _outfit_from_item(item):
+    """Build the Outfit response fields of a stored item."""
+    return {
+        "outfit_id": item.get("item_id", ""),
+        "wardrobe_id": item.get("wardrobe_id", ""),
+        "image_url": item.get("image_url", ""),
+        "image_variants": item.get("image_variants"),
+        "thumbnail_url": select_image_url(item.get("image_url", ""), item.get("image_variants"), OUTFIT_THUMBNAIL_WIDTH),
+        "tags": item.get("tags", {})
+    }
+
+
 
 @router.delete("/delete-outfit", response_model=DeleteOutfitResponse, status_code=status.HTTP_200_OK)
 async def delete_outfit_endpoint(outfit_id: str):
@@ -113,23 +196,22 @@ async def suggest_outfit_endpoint(request: SuggestOutfitRequest, user=Depends(re
 
     # Log the weather-aware request for debugging
     if request.condition:
-        print(f"Suggesting outfit for user {user['user_id']}: {request.temperature}°C, {request.condition}, query: {request.query}")
+        logger.info("Suggesting outfit for user %s: %s°C, %s, query: %s", user["user_id"], request.temperature, request.condition, request.query)
 
-    # Fetch weather data using user's location from MongoDB
+    # Fetch weather data using the location loaded with the authenticated user
     weather_data = None
     try:
-        from auth.user_db import get_user_location
         from weather_data.service import get_today_weather
 
-        user_location = get_user_location(user["user_id"])
+        user_location = user.get("location")
         if user_location and user_location.get("latitude") is not None and user_location.get("longitude") is not None:
             weather_result = await get_today_weather(user_location["latitude"], user_location["longitude"])
             if weather_result and weather_result.get("today"):
                 weather_data = weather_result["today"]
         else:
-            print(f"Warning: No location data found for user {user['user_id']}")
+            logger.warning("No location data found for user %s", user["user_id"])
     except Exception as e:
-        print(f"Warning: Failed to fetch weather data: {str(e)}")
+        logger.warning("Failed to fetch weather data: %s", e)
         # Continue without weather data
 
     items = get_items(user["user_id"])  # ignore client-supplied wardrobe_id; use authenticated user_id
@@ -140,6 +222,7 @@ async def suggest_outfit_endpoint(request: SuggestOutfitRequest, user=Depends(re
             "outfit_id": item.get("item_id", ""),
             "wardrobe_id": item.get("wardrobe_id", ""),
             "image_url": item.get("image_url", ""),
+            "image_variants": item.get("image_variants"),
             "tags": item.get("tags", {})
         }
         all_outfits.append(outfit)
@@ -152,9 +235,11 @@ async def suggest_outfit_endpoint(request: SuggestOutfitRequest, user=Depends(re
         selected_outfits = random.sample(all_outfits, num_to_select)
     
     composite_image_url = None
-    if selected_outfits:
+    composite_manifest = build_layout_manifest(selected_outfits) if selected_outfits else None
+    # In manifest mode the client composes the suggestion itself
+    if selected_outfits and request.composite_mode == "image":
         try:
-            image_urls = [outfit["image_url"] for outfit in selected_outfits if outfit.get("image_url")]
+            image_urls = [composite_source_url(outfit) for outfit in selected_outfits if outfit.get("image_url")]
             
             if image_urls:
                 composite_image = create_composite_image(image_urls, layout="grid")
@@ -173,12 +258,13 @@ async def suggest_outfit_endpoint(request: SuggestOutfitRequest, user=Depends(re
                         except Exception:
                             pass
         except Exception as e:
-            print(f"Warning: Failed to create composite image: {str(e)}")
+            logger.exception("Failed to create composite image: %s", e)
             composite_image_url = None
     
     return SuggestOutfitResponse(
         outfits=selected_outfits,
         composite_image_url=composite_image_url,
+        composite_manifest=composite_manifest,
         weather=weather_data,
         result=True,
         message="Outfits suggested successfully"
@@ -0,0 +1,12 @@
+"""
+Server-Sent Events
+Formatting shared by the routes that stream responses as server-sent events.
+"""
+
+import json
+from typing import Any, Dict
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -1,5 +1,7 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
+
+from endpoints.outfit.models import LayoutManifest
 
 
 class DailyPlan(BaseModel):
@@ -11,6 +13,7 @@ class DailyPlan(BaseModel):
     temperature: Optional[float] = None  # Average temperature in Celsius
     condition: Optional[str] = None  # Weather condition text
     condition_icon: Optional[str] = None  # Weather condition icon URL
+    composite_manifest: Optional[LayoutManifest] = None  # Layout for composing the day on the client
 
 
 class WeeklyPlan(BaseModel):
@@ -18,18 +21,25 @@ class WeeklyPlan(BaseModel):
     plan_id: str
     wardrobe_id: str
     created_at: str  # ISO format datetime
+    updated_at: Optional[str] = None  # ISO format datetime of the last rolling update
     week_start: str  # ISO format date (YYYY-MM-DD)
-    daily_plans: Dict[str, DailyPlan]  # day1, day2, etc. as keys
+    daily_plans: Dict[str, DailyPlan]  # ISO dates (YYYY-MM-DD) as keys
+    status: str = "complete"  # pending while composite images are being rendered, then complete or failed
+    render_started_at: Optional[str] = None  # ISO format datetime the pending composites started rendering
 
 
 class PlanWeekRequest(BaseModel):
     """Request model for weekly planning"""
     temperature: Optional[float] = None
+    regenerate: bool = False  # Re-plan every day instead of rolling the existing plan forward
+    composite_mode: Literal["image", "manifest"] = "image"  # "manifest" skips rendering composites; days keep their composite_manifest
 
 
 class CreateWeeklyPlanResponse(BaseModel):
     """Response model for creating weekly plan"""
     result: bool
+    plan_id: Optional[str] = None
+    status: Optional[str] = None
     message: str = "Weekly plan created successfully"
 
 
@@ -0,0 +1,36 @@
+"""
+Weekly Plan Progress
+In-process notifications for plans whose composite images are still rendering.
+"""
+
+import asyncio
+from typing import Dict
+
+
+class PlanProgress:
+    """
+    Wakes up event streams waiting on a plan when one of its days changes.
+
+    Notifications only reach streams served by the same worker; streams on
+    other workers fall back to re-reading the plan after a timeout.
+    """
+
+    def __init__(self):
+        self._events: Dict[str, asyncio.Event] = {}
+
+    def notify(self, plan_id: str) -> None:
+        """Wake up everything waiting on plan_id."""
+        event = self._events.pop(plan_id, None)
+        if event is not None:
+            event.set()
+
+    async def wait(self, plan_id: str, timeout: float) -> None:
+        """Wait until plan_id changes or timeout seconds pass."""
+        event = self._events.setdefault(plan_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+plan_progress = PlanProgress()
@@ -3,16 +3,33 @@ Weekly Planning Routes
 FastAPI routes for weekly outfit planning.
 """
 
+import asyncio
+import hashlib
+import logging
 import os
 import tempfile
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Request, Response, status, Depends
+from fastapi.responses import StreamingResponse
 from uuid import uuid4
 
 from endpoints.weekly.models import PlanWeekRequest, CreateWeeklyPlanResponse, GetWeeklyPlanResponse, DailyPlan, WeeklyPlan
-from weekly_planner import generate_weekly_plan
-from mongodb_uploader import get_items, upload_weekly_plan, get_weekly_plan
+from endpoints.weekly.progress import plan_progress
+from weekly_planner import plan_days, render_daily_composites, days_to_render, diff_daily_plans, build_wear_history
+from mongodb_uploader import get_items, upload_weekly_plan, update_weekly_plan_days, get_weekly_plan, set_weekly_plan_day_image, set_weekly_plan_status, weekly_plan_cache
 from auth.deps import require_user
+from endpoints.sse import sse_event
+
+# How long an event stream waits for progress before re-reading the plan
+PLAN_EVENTS_POLL_SECONDS = float(os.getenv("PLAN_EVENTS_POLL_SECONDS", "2"))
+# Upper bound on how long an event stream stays open
+PLAN_EVENTS_TIMEOUT_SECONDS = float(os.getenv("PLAN_EVENTS_TIMEOUT_SECONDS", "120"))
+# A plan still pending this long after its render started was abandoned
+# (e.g. the worker rendering it restarted) and is marked failed
+PLAN_RENDER_TIMEOUT_SECONDS = float(os.getenv("PLAN_RENDER_TIMEOUT_SECONDS", "300"))
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/weekly",
@@ -22,9 +39,26 @@ router = APIRouter(
 
 
 @router.put("/create-plan", response_model=CreateWeeklyPlanResponse, status_code=status.HTTP_200_OK)
-async def create_weekly_plan_endpoint(request: PlanWeekRequest, user=Depends(require_user)):
+async def create_weekly_plan_endpoint(request: PlanWeekRequest, background_tasks: BackgroundTasks, user=Depends(require_user)):
     """
-    Create a weekly outfit plan for the authenticated user.
+    Create or roll forward the weekly outfit plan for the authenticated user.
+
+    The plan (dates, outfit IDs and weather) is stored and returned right
+    away with status "pending"; each day's composite image is rendered in
+    the background and filled in as soon as it is ready. Follow progress
+    with GET /weekly/plan/events. A render that does not finish within
+    PLAN_RENDER_TIMEOUT_SECONDS (e.g. because the worker restarted) is
+    marked failed; the next request renders the days still missing an image.
+
+    If a plan already exists it is updated incrementally: days that are
+    still valid keep their outfits and composite, and only new or changed
+    days are planned, rendered and written. Set regenerate to start over.
+
+    Every day carries a composite_manifest describing its grid composite.
+    With composite_mode "manifest" no composites are rendered: the plan is
+    complete right away and clients compose the days themselves. Days
+    without an image are rendered by a later request in "image" mode, e.g.
+    when a plan is shared.
     """
 
     # Get all outfits for the user
@@ -36,6 +70,7 @@ async def create_weekly_plan_endpoint(request: PlanWeekRequest, user=Depends(req
             "outfit_id": item.get("item_id", ""),
             "wardrobe_id": item.get("wardrobe_id", ""),
             "image_url": item.get("image_url", ""),
+            "image_variants": item.get("image_variants"),
             "tags": item.get("tags", {})
         }
         all_outfits.append(outfit)
@@ -46,45 +81,155 @@ async def create_weekly_plan_endpoint(request: PlanWeekRequest, user=Depends(req
             detail="No outfits found in wardrobe. Please add some outfits first."
         )
 
-    # Generate weekly plan using the planner service
+    # Regenerating starts the days over but keeps the wear history
+    stored_plan = get_weekly_plan(user["user_id"])
+    existing_plan = None if request.regenerate else stored_plan
+    wear_history = build_wear_history(stored_plan, all_outfits)
+
+    # Select outfits and weather for each day; composites are rendered later
     try:
-        daily_plans = await generate_weekly_plan(all_outfits, user["user_id"])
+        daily_plans = await plan_days(all_outfits, user.get("location"), existing_plan, wear_history=wear_history)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-    # Create weekly plan
+    # In manifest mode the client composes every day from its composite_manifest
+    pending_days = days_to_render(daily_plans) if request.composite_mode == "image" else {}
+    plan_status = "pending" if pending_days else "complete"
     now = datetime.now(timezone.utc)
     today = now.date()
-    plan_id = str(uuid4())
-    weekly_plan = WeeklyPlan(
-        plan_id=plan_id,
-        wardrobe_id=user["user_id"],
-        created_at=now.isoformat(),
-        week_start=today.isoformat(),
-        daily_plans=daily_plans
-    )
+    render_started_at = now.isoformat() if pending_days else None
+
+    if existing_plan:
+        # Only write the days that changed
+        plan_id = existing_plan.get("plan_id")
+        changed_days, removed_day_keys = diff_daily_plans(existing_plan, daily_plans)
+        update_weekly_plan_days(
+            user["user_id"],
+            {
+                "week_start": today.isoformat(),
+                "updated_at": now.isoformat(),
+                "status": plan_status,
+                "render_started_at": render_started_at,
+                "wear_history": wear_history
+            },
+            changed_days,
+            removed_day_keys
+        )
+    else:
+        # Create weekly plan
+        plan_id = str(uuid4())
+        weekly_plan = WeeklyPlan(
+            plan_id=plan_id,
+            wardrobe_id=user["user_id"],
+            created_at=now.isoformat(),
+            updated_at=now.isoformat(),
+            week_start=today.isoformat(),
+            daily_plans=daily_plans,
+            status=plan_status,
+            render_started_at=render_started_at
+        )
+        upload_weekly_plan({**weekly_plan.dict(), "wear_history": wear_history})
 
-    # Save to MongoDB
-    plan_doc = weekly_plan.dict()
-    upload_weekly_plan(plan_doc)
+    # Render the missing composites after responding
+    if pending_days:
+        background_tasks.add_task(_render_plan_composites, user["user_id"], plan_id, pending_days, all_outfits, render_started_at)
 
     return CreateWeeklyPlanResponse(
         result=True,
-        message="Weekly plan created successfully"
+        plan_id=plan_id,
+        status=plan_status,
+        message=(
+            "Weekly plan created; composite images are being generated" if pending_days
+            else "Weekly plan created successfully" if request.composite_mode == "manifest"
+            else "Weekly plan is up to date"
+        )
     )
 
 
+async def _render_plan_composites(
+    wardrobe_id: str,
+    plan_id: str,
+    daily_plans: Dict[str, DailyPlan],
+    outfits: List[Dict[str, Any]],
+    render_started_at: str
+):
+    """
+    Render a plan's composites, storing each day's image as soon as it is uploaded.
+    The final status is only stored if no newer render of the plan has started since.
+    """
+
+    async def _store_day_image(day_key: str, image_url: Optional[str]):
+        set_weekly_plan_day_image(wardrobe_id, plan_id, day_key, daily_plans[day_key].outfit_ids, image_url)
+        plan_progress.notify(plan_id)
+
+    plan_status = "complete"
+    try:
+        await render_daily_composites(daily_plans, outfits, _store_day_image)
+    except Exception as e:
+        logger.exception("Failed to render weekly plan %s: %s", plan_id, e)
+        plan_status = "failed"
+    set_weekly_plan_status(wardrobe_id, plan_id, plan_status, render_started_at)
+    plan_progress.notify(plan_id)
+
+
+def _expire_abandoned_render(wardrobe_id: str, plan_data: Optional[Dict[str, Any]]) -> None:
+    """
+    Mark a plan failed if it has been pending for longer than PLAN_RENDER_TIMEOUT_SECONDS,
+    e.g. because the worker rendering it restarted. Updates plan_data in place.
+    """
+    if not plan_data or plan_data.get("status") != "pending":
+        return
+    render_started_at = plan_data.get("render_started_at")
+    if render_started_at:
+        pending_seconds = (datetime.now(timezone.utc) - datetime.fromisoformat(render_started_at)).total_seconds()
+        if pending_seconds < PLAN_RENDER_TIMEOUT_SECONDS:
+            return
+    # Plans pending from before renders were timestamped are expired as well
+    logger.warning("Weekly plan %s render was abandoned; marking it failed", plan_data.get("plan_id"))
+    set_weekly_plan_status(wardrobe_id, plan_data.get("plan_id"), "failed", render_started_at)
+    plan_data["status"] = "failed"
+
+
 @router.get("/plan", response_model=GetWeeklyPlanResponse, status_code=status.HTTP_200_OK)
-async def get_weekly_plan_endpoint(user=Depends(require_user)):
+async def get_weekly_plan_endpoint(user=Depends(require_user), if_none_match: Optional[str] = Header(None)):
     """
     Get the weekly plan for the authenticated user.
     Returns at most one weekly plan since only one exists per wardrobe.
+
+    The response carries an ETag; a request whose If-None-Match matches the
+    current plan gets 304 Not Modified. Serialized responses are cached in
+    process, so repeated reads of an unchanged plan skip MongoDB entirely.
     """
 
-    plan_data = get_weekly_plan(user["user_id"])
+    cached = weekly_plan_cache.get(user["user_id"])
+    if cached is None:
+        generation = weekly_plan_cache.generation()
+        plan_data = get_weekly_plan(user["user_id"])
+        _expire_abandoned_render(user["user_id"], plan_data)
+        body = _serialize_weekly_plan(plan_data).encode()
+        cached = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+        # Pending plans change as composites are rendered; SSE covers those
+        if not plan_data or plan_data.get("status", "complete") != "pending":
+            weekly_plan_cache.set(user["user_id"], cached, generation)
+
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and _etag_matches(etag, if_none_match):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+
+def _serialize_weekly_plan(plan_data: Optional[Dict[str, Any]]) -> str:
+    """Build the JSON body of GET /weekly/plan from a stored plan document."""
     weekly_plans = []
 
     if plan_data:
@@ -97,9 +242,65 @@ async def get_weekly_plan_endpoint(user=Depends(require_user)):
             plan_id=plan_data.get("plan_id", ""),
             wardrobe_id=plan_data.get("wardrobe_id", ""),
             created_at=plan_data.get("created_at", ""),
+            updated_at=plan_data.get("updated_at"),
             week_start=plan_data.get("week_start", ""),
-            daily_plans=daily_plans_dict
+            daily_plans=daily_plans_dict,
+            status=plan_data.get("status", "complete"),
+            render_started_at=plan_data.get("render_started_at")
         )
         weekly_plans.append(weekly_plan)
 
-    return GetWeeklyPlanResponse(weekly_plans=weekly_plans)
+    return GetWeeklyPlanResponse(weekly_plans=weekly_plans).json()
+
+
+@router.get("/plan/events", status_code=status.HTTP_200_OK)
+async def weekly_plan_events_endpoint(request: Request, user=Depends(require_user)):
+    """
+    Stream the progress of the authenticated user's weekly plan as server-sent events.
+
+    Events:
+        plan: the full plan when the stream opens (days may not have images yet)
+        day: {"day_key", "image_url"} whenever a day's composite is ready
+        complete: {"status"} once rendering has finished, then the stream ends
+    """
+
+    async def event_stream():
+        sent_images: Dict[str, Optional[str]] = {}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + PLAN_EVENTS_TIMEOUT_SECONDS
+        plan_id = None
+
+        while True:
+            plan_data = get_weekly_plan(user["user_id"])
+            _expire_abandoned_render(user["user_id"], plan_data)
+            if not plan_data or (plan_id and plan_data.get("plan_id") != plan_id):
+                # No plan, or it was replaced by a newer one
+                yield sse_event("complete", {"status": "superseded" if plan_id else "missing"})
+                return
+
+            daily_plans = plan_data.get("daily_plans", {})
+            if plan_id is None:
+                plan_id = plan_data.get("plan_id")
+                plan_data.pop("_id", None)
+                yield sse_event("plan", plan_data)
+                sent_images = {key: day.get("image_url") for key, day in daily_plans.items()}
+            else:
+                for day_key, day in daily_plans.items():
+                    if day.get("image_url") != sent_images.get(day_key):
+                        sent_images[day_key] = day.get("image_url")
+                        yield sse_event("day", {"day_key": day_key, "image_url": day.get("image_url")})
+
+            plan_status = plan_data.get("status", "complete")
+            if plan_status != "pending":
+                yield sse_event("complete", {"status": plan_status})
+                return
+            if loop.time() >= deadline or await request.is_disconnected():
+                return
+
+            await plan_progress.wait(plan_id, PLAN_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -2,7 +2,15 @@
 Image Composer Package
 """
 
-from .composer import create_composite_image
-
-__all__ = ['create_composite_image']
+from .composer import (
+    create_composite_image, compose_images, compose_tiles, compute_grid_layout, download_image, download_images, decode_image,
+    download_tiles, load_cell_tile, prerender_cell_tile, render_cell_tile, COMPOSITE_SOURCE_WIDTH
+)
+from .manifest import build_layout_manifest, composite_source_url
+from .tiles import tile_cache
 
+__all__ = [
+    'create_composite_image', 'compose_images', 'compose_tiles', 'compute_grid_layout', 'download_image', 'download_images', 'decode_image',
+    'download_tiles', 'load_cell_tile', 'prerender_cell_tile', 'render_cell_tile', 'COMPOSITE_SOURCE_WIDTH',
+    'build_layout_manifest', 'composite_source_url', 'tile_cache'
+]
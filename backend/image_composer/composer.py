@@ -3,13 +3,35 @@ Image Composer Module
 Handles composing multiple outfit images into a single composite image.
 """
 
+import logging
 import os
 import tempfile
 import requests
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 from PIL import Image, ImageDraw
 import io
 
+from image_composer.tiles import tile_cache
+from observability import traced
+
+logger = logging.getLogger(__name__)
+
+# Widest an outfit image is drawn in any layout: sources need not be larger
+# (pass derivatives picked with cloudinary_uploader.select_image_url)
+COMPOSITE_SOURCE_WIDTH = 600
+# Smallest size images are decoded at: every layout draws them at most this
+# large, so larger photos are decoded at a reduced scale
+COMPOSITE_DECODE_SIZE = (COMPOSITE_SOURCE_WIDTH, COMPOSITE_SOURCE_WIDTH)
+# Resizes first shrink by an integer factor with a fast box filter until within
+# this factor of the target, then finish with LANCZOS (see Image.resize)
+RESIZE_REDUCING_GAP = 3.0
+
+# Grid layout geometry: square cells, padding around and between them
+GRID_CELL_SIZE = 600
+GRID_PADDING = 20
+GRID_BORDER_RADIUS = 20
+
 # Handle Pillow version compatibility
 try:
     RESAMPLE = Image.Resampling.LANCZOS
@@ -17,12 +39,15 @@ except AttributeError:
     RESAMPLE = Image.LANCZOS
 
 
-def download_image(url: str) -> Image.Image:
+@traced("download_image")
+def download_image(url: str, min_size: Optional[Tuple[int, int]] = COMPOSITE_DECODE_SIZE) -> Image.Image:
     """
     Download an image from a URL and return a PIL Image.
     
     Args:
         url: URL of the image to download.
+        min_size: Smallest (width, height) the image is needed at, or None
+            for full size (see decode_image).
         
     Returns:
         PIL Image object.
@@ -30,21 +55,139 @@ def download_image(url: str) -> Image.Image:
     try:
         response = requests.get(url, timeout=10)
         response.raise_for_status()
-        image = Image.open(io.BytesIO(response.content))
-        # Convert to RGB if necessary (handles RGBA, P, etc.)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        return image
+        return decode_image(response.content, min_size)
     except Exception as e:
         raise Exception(f"Failed to download image from {url}: {str(e)}")
 
 
+def decode_image(data: bytes, min_size: Optional[Tuple[int, int]] = COMPOSITE_DECODE_SIZE) -> Image.Image:
+    """
+    Decode an encoded image into an RGB PIL Image.
+    
+    Images larger than min_size are decoded at a reduced scale where the
+    format allows it: JPEGs at the smallest 1/2, 1/4 or 1/8 scale that is
+    still at least min_size (draft mode, so the full-size pixels are never
+    produced), other formats reduced by an integer factor after decoding.
+    Either way the result is never smaller than min_size, so the final
+    high-quality resize is unaffected.
+    
+    Args:
+        data: The encoded image.
+        min_size: Smallest (width, height) needed, or None for full size.
+        
+    Returns:
+        PIL Image object.
+    """
+    image = Image.open(io.BytesIO(data))
+    if min_size and image.format == 'JPEG':
+        image.draft('RGB', min_size)
+    # Decode now: a lazily decoded image shared between composites would be
+    # decoded by several threads at once
+    image.load()
+    if min_size:
+        factor = min(image.width // min_size[0], image.height // min_size[1])
+        if factor > 1:
+            image = image.reduce(factor)
+    # Convert to RGB if necessary (handles RGBA, P, etc.)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image
+
+
+def download_images(image_urls: List[str], max_workers: int = 8) -> Dict[str, Image.Image]:
+    """
+    Download several images concurrently, fetching each distinct URL once.
+    
+    Args:
+        image_urls: List of image URLs to download (duplicates allowed).
+        max_workers: Maximum number of concurrent downloads.
+        
+    Returns:
+        Dictionary mapping each successfully downloaded URL to its PIL Image.
+    """
+    unique_urls = list(dict.fromkeys(image_urls))
+    if not unique_urls:
+        return {}
+    
+    def _download(url: str):
+        try:
+            return url, download_image(url)
+        except Exception as e:
+            logger.warning("Failed to download image %s: %s", url, e)
+            return url, None
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls))) as executor:
+        results = executor.map(_download, unique_urls)
+    return {url: image for url, image in results if image is not None}
+
+
+def load_cell_tile(url: str) -> Image.Image:
+    """
+    Get the grid cell tile of an image URL, rendering and caching it on first use.
+    
+    Args:
+        url: URL of the outfit image.
+        
+    Returns:
+        The tile; shared, so it must not be modified.
+    """
+    tile = tile_cache.get(url)
+    if tile is None:
+        tile = render_cell_tile(download_image(url))
+        tile_cache.put(url, tile)
+    return tile
+
+
+def prerender_cell_tile(url: str, image_path: str) -> None:
+    """
+    Render and cache the grid cell tile of an image URL from a local copy of the image,
+    e.g. right after uploading it, so its first composite needs no download.
+    
+    Args:
+        url: URL the tile is looked up by.
+        image_path: Path of the image file.
+    """
+    with open(image_path, "rb") as f:
+        tile_cache.put(url, render_cell_tile(decode_image(f.read())))
+
+
+def download_tiles(image_urls: List[str], max_workers: int = 8) -> Dict[str, Image.Image]:
+    """
+    Get the grid cell tiles of several images, downloading and rendering
+    the missing ones concurrently.
+    
+    Args:
+        image_urls: List of image URLs (duplicates allowed).
+        max_workers: Maximum number of concurrent downloads.
+        
+    Returns:
+        Dictionary mapping each URL with a tile to its tile.
+    """
+    unique_urls = list(dict.fromkeys(image_urls))
+    if not unique_urls:
+        return {}
+    
+    def _load(url: str):
+        try:
+            return url, load_cell_tile(url)
+        except Exception as e:
+            logger.warning("Failed to load tile of %s: %s", url, e)
+            return url, None
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls))) as executor:
+        results = executor.map(_load, unique_urls)
+    return {url: tile for url, tile in results if tile is not None}
+
+
+@traced("create_composite_image")
 def create_composite_image(image_urls: List[str], layout: str = "grid") -> Image.Image:
     """
     Create a composite image from multiple outfit images.
     
     Args:
-        image_urls: List of image URLs to combine.
+        image_urls: List of image URLs to combine; derivatives at least
+            COMPOSITE_SOURCE_WIDTH wide are enough and far cheaper to fetch
+            and decode than originals.
         layout: Layout style - "grid" (2x2) or "vertical" (stacked)
         
     Returns:
@@ -53,16 +196,29 @@ def create_composite_image(image_urls: List[str], layout: str = "grid") -> Image
     if not image_urls:
         raise ValueError("No image URLs provided")
     
+    if layout == "grid":
+        tiles = download_tiles(image_urls)
+        return compose_tiles([tiles[url] for url in image_urls if url in tiles])
+    
     # Download all images
-    images = []
-    for url in image_urls:
-        try:
-            img = download_image(url)
-            images.append(img)
-        except Exception as e:
-            print(f"Warning: Failed to download image {url}: {e}")
-            continue
+    downloaded = download_images(image_urls)
+    images = [downloaded[url] for url in image_urls if url in downloaded]
+    
+    return compose_images(images, layout)
+
+
+def compose_images(images: List[Image.Image], layout: str = "grid") -> Image.Image:
+    """
+    Create a composite image from already downloaded images.
+    The input images are not modified, so they can be shared between composites.
     
+    Args:
+        images: List of PIL Images to combine.
+        layout: Layout style - "grid" (2x2) or "vertical" (stacked)
+        
+    Returns:
+        PIL Image object of the composite.
+    """
     if not images:
         raise ValueError("No images could be downloaded")
     
@@ -86,9 +242,51 @@ def _create_grid_layout(images: List[Image.Image]) -> Image.Image:
     Returns:
         Composite PIL Image.
     """
-    # Ensure we have at least 1 and at most 4 images
-    num_images = min(len(images), 4)
-    images = images[:num_images]
+    return compose_tiles([render_cell_tile(img) for img in images[:4]])
+
+
+def render_cell_tile(image: Image.Image) -> Image.Image:
+    """
+    Render an image as a grid cell: scaled to fit within the cell padding,
+    centered on a white cell with rounded corners.
+    
+    Args:
+        image: PIL Image of the outfit item (not modified).
+        
+    Returns:
+        The GRID_CELL_SIZE square tile.
+    """
+    # Resize maintaining aspect ratio, then center on white background
+    img = _fit_within(image, GRID_CELL_SIZE - GRID_PADDING * 2, GRID_CELL_SIZE - GRID_PADDING * 2)
+    
+    # Create a white background with rounded corners
+    bg = Image.new('RGB', (GRID_CELL_SIZE, GRID_CELL_SIZE), 'white')
+    
+    # Calculate position to center the image
+    x_offset = (GRID_CELL_SIZE - img.width) // 2
+    y_offset = (GRID_CELL_SIZE - img.height) // 2
+    
+    # Paste image on white background
+    bg.paste(img, (x_offset, y_offset), img if img.mode == 'RGBA' else None)
+    
+    # Apply rounded corners
+    return _apply_rounded_corners(bg, GRID_BORDER_RADIUS)
+
+
+def compute_grid_layout(count: int) -> Dict[str, Any]:
+    """
+    Compute the geometry of the grid layout for a number of images.
+    Shared by server-side rendering and layout manifests composed by clients.
+    
+    Args:
+        count: Number of images; only the first four are placed.
+        
+    Returns:
+        Dictionary with the canvas width and height, cell_size, padding,
+        border_radius and the top-left corner (x, y) of each cell.
+    """
+    # Ensure we have at most 4 images
+    num_images = min(count, 4)
     
     # Calculate grid dimensions
     if num_images == 1:
@@ -100,44 +298,41 @@ def _create_grid_layout(images: List[Image.Image]) -> Image.Image:
     else:  # 4 images
         cols, rows = 2, 2
     
-    # Resize all images to a consistent size
-    cell_width = 600
-    cell_height = 600
-    padding = 20
-    border_radius = 20
+    return {
+        "width": cols * GRID_CELL_SIZE + GRID_PADDING * (cols + 1),
+        "height": rows * GRID_CELL_SIZE + GRID_PADDING * (rows + 1),
+        "cell_size": GRID_CELL_SIZE,
+        "padding": GRID_PADDING,
+        "border_radius": GRID_BORDER_RADIUS,
+        "cells": [
+            {
+                "x": GRID_PADDING + (idx % cols) * (GRID_CELL_SIZE + GRID_PADDING),
+                "y": GRID_PADDING + (idx // cols) * (GRID_CELL_SIZE + GRID_PADDING),
+            }
+            for idx in range(num_images)
+        ],
+    }
+
+
+def compose_tiles(tiles: List[Image.Image]) -> Image.Image:
+    """
+    Paste up to four cell tiles (see render_cell_tile) into a grid.
     
-    # Resize images maintaining aspect ratio
-    resized_images = []
-    for img in images:
-        # Resize maintaining aspect ratio, then center on white background
-        img.thumbnail((cell_width - padding * 2, cell_height - padding * 2), RESAMPLE)
-        
-        # Create a white background with rounded corners
-        bg = Image.new('RGB', (cell_width, cell_height), 'white')
-        
-        # Calculate position to center the image
-        x_offset = (cell_width - img.width) // 2
-        y_offset = (cell_height - img.height) // 2
-        
-        # Paste image on white background
-        bg.paste(img, (x_offset, y_offset), img if img.mode == 'RGBA' else None)
+    Args:
+        tiles: List of tiles; only the first four are used.
         
-        # Apply rounded corners
-        bg = _apply_rounded_corners(bg, border_radius)
-        resized_images.append(bg)
+    Returns:
+        Composite PIL Image.
+    """
+    if not tiles:
+        raise ValueError("No images could be downloaded")
     
-    # Create canvas
-    canvas_width = cols * cell_width + padding * (cols + 1)
-    canvas_height = rows * cell_height + padding * (rows + 1)
-    canvas = Image.new('RGB', (canvas_width, canvas_height), 'white')
+    layout = compute_grid_layout(len(tiles))
+    canvas = Image.new('RGB', (layout["width"], layout["height"]), 'white')
     
-    # Paste images onto canvas
-    for idx, img in enumerate(resized_images):
-        row = idx // cols
-        col = idx % cols
-        x = padding + col * (cell_width + padding)
-        y = padding + row * (cell_height + padding)
-        canvas.paste(img, (x, y))
+    # Paste tiles onto canvas
+    for tile, cell in zip(tiles, layout["cells"]):
+        canvas.paste(tile, (cell["x"], cell["y"]))
     
     return canvas
 
@@ -153,7 +348,7 @@ def _create_vertical_layout(images: List[Image.Image]) -> Image.Image:
         Composite PIL Image.
     """
     # Resize all images to consistent width
-    target_width = 600
+    target_width = COMPOSITE_SOURCE_WIDTH
     padding = 20
     border_radius = 20
     
@@ -164,7 +359,7 @@ def _create_vertical_layout(images: List[Image.Image]) -> Image.Image:
         # Resize maintaining aspect ratio
         aspect_ratio = img.height / img.width
         target_height = int(target_width * aspect_ratio)
-        img_resized = img.resize((target_width, target_height), RESAMPLE)
+        img_resized = img.resize((target_width, target_height), RESAMPLE, reducing_gap=RESIZE_REDUCING_GAP)
         
         # Create white background with padding
         bg = Image.new('RGB', (target_width + padding * 2, target_height + padding * 2), 'white')
@@ -190,6 +385,27 @@ def _create_vertical_layout(images: List[Image.Image]) -> Image.Image:
     return canvas
 
 
+def _fit_within(image: Image.Image, max_width: int, max_height: int) -> Image.Image:
+    """
+    Scale an image down to fit within the given box.
+    Like Image.thumbnail, but returns a new image instead of modifying the
+    original, and never enlarges (images that already fit are returned as is).
+    
+    Args:
+        image: PIL Image to scale.
+        max_width: Maximum width in pixels.
+        max_height: Maximum height in pixels.
+        
+    Returns:
+        Scaled PIL Image.
+    """
+    scale = min(max_width / image.width, max_height / image.height)
+    if scale >= 1:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, RESAMPLE, reducing_gap=RESIZE_REDUCING_GAP)
+
+
 def _apply_rounded_corners(image: Image.Image, radius: int) -> Image.Image:
     """
     Apply rounded corners to an image.
@@ -0,0 +1,41 @@
+"""
+Layout Manifest Module
+Describes grid composites for clients to compose themselves: where each
+outfit image goes, instead of a rendered and uploaded image.
+"""
+
+from typing import Any, Dict, List
+
+from cloudinary_uploader import select_image_url
+from image_composer.composer import compute_grid_layout, COMPOSITE_SOURCE_WIDTH
+
+
+def composite_source_url(outfit: Dict[str, Any]) -> str:
+    """The smallest derivative of an outfit's image that is adequate for a composite."""
+    return select_image_url(outfit["image_url"], outfit.get("image_variants"), COMPOSITE_SOURCE_WIDTH)
+
+
+def build_layout_manifest(outfits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the layout manifest of the grid composite of outfits.
+
+    The geometry is the one the server renders (see compute_grid_layout):
+    each image is scaled to fit within its cell less the padding, centered
+    on a white cell with rounded corners.
+
+    Args:
+        outfits: Outfit dictionaries with outfit_id, image_url and
+            optionally image_variants; the first four with an image are placed.
+
+    Returns:
+        Dictionary with layout "grid", the canvas width and height, cell_size,
+        padding, border_radius and cells with x, y, outfit_id and image_url
+        (the derivative composites are rendered from).
+    """
+    outfits = [outfit for outfit in outfits if outfit.get("image_url")][:4]
+    layout = compute_grid_layout(len(outfits))
+    layout["cells"] = [
+        {**cell, "outfit_id": outfit.get("outfit_id", ""), "image_url": composite_source_url(outfit)}
+        for cell, outfit in zip(layout["cells"], outfits)
+    ]
+    return {"layout": "grid", **layout}
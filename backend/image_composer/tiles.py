@@ -0,0 +1,160 @@
+"""
+Cell Tile Cache
+Keeps the rendered grid cell of every outfit image (scaled, centered on a
+white cell, rounded corners) so composites only paste prebuilt tiles.
+Tiles are cached in memory (LRU) and on local disk, keyed by image URL.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from PIL import Image
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Directory tiles are stored in across restarts; empty keeps tiles in memory only
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "wearwhat-tiles"))
+# Tiles kept in memory (about 1 MB each)
+TILE_CACHE_MAX_ITEMS = int(os.getenv("TILE_CACHE_MAX_ITEMS", "64"))
+# Tiles kept on disk (about 60 KB each); the least recently written are removed beyond this
+TILE_CACHE_MAX_FILES = int(os.getenv("TILE_CACHE_MAX_FILES", "5000"))
+# Part of every key: bump when the tile rendering changes so old tiles are not used
+TILE_VERSION = 1
+
+
+class TileCache:
+    """
+    Thread-safe two-level cache of rendered cell tiles.
+
+    Counts lookups served from memory and from disk and misses, so tile
+    coverage can be followed on the metrics endpoint.
+    """
+
+    def __init__(self, directory: str = TILE_CACHE_DIR, max_items: int = TILE_CACHE_MAX_ITEMS, max_files: int = TILE_CACHE_MAX_FILES):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_files = max_files
+        self._tiles: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file_count: Optional[int] = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stored": 0}
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha1(f"{TILE_VERSION}:{url}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jpg")
+
+    def get(self, url: str) -> Optional[Image.Image]:
+        """
+        Return the tile of an image URL, or None if it has not been rendered.
+        Returned tiles are shared and must not be modified.
+        """
+        key = self._key(url)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return tile
+
+        tile = self._read(key)
+        with self._lock:
+            if tile is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, tile)
+        return tile
+
+    def put(self, url: str, tile: Image.Image) -> None:
+        """Store the tile of an image URL in memory and on disk."""
+        key = self._key(url)
+        with self._lock:
+            self._remember(key, tile)
+            self.stats["stored"] += 1
+        self._write(key, tile)
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Return lookup counters, the share of lookups served from a tile, and the tiles in memory."""
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = lookups - self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "tiles_in_memory": len(self._tiles),
+            }
+
+    def clear(self) -> None:
+        """Forget the tiles in memory (tiles on disk are kept)."""
+        with self._lock:
+            self._tiles.clear()
+
+    def _remember(self, key: str, tile: Image.Image) -> None:
+        """Add a tile to the memory LRU; the caller holds the lock."""
+        self._tiles[key] = tile
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.max_items:
+            self._tiles.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Image.Image]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                tile = Image.open(io.BytesIO(f.read()))
+                tile.load()
+                return tile
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Failed to read tile %s: %s", key, e)
+            return None
+
+    def _write(self, key: str, tile: Image.Image) -> None:
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Written under a temporary name so readers never see a partial file
+            temp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            tile.save(temp_path, format="JPEG", quality=95)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Failed to write tile %s: %s", key, e)
+            return
+        self._prune()
+
+    def _prune(self) -> None:
+        """Remove the oldest tile files once there are more than max_files."""
+        with self._lock:
+            if self._file_count is None:
+                self._file_count = sum(1 for name in os.listdir(self.directory) if name.endswith(".jpg"))
+            else:
+                self._file_count += 1
+            if self._file_count <= self.max_files:
+                return
+            self._file_count = None
+        entries = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".jpg")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        # Remove a tenth at once so pruning is rare
+        for entry in entries[:len(entries) - self.max_files * 9 // 10]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+tile_cache = TileCache()
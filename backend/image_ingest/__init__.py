@@ -0,0 +1,16 @@
+"""
+Image Ingest Package
+Bounded-memory handling of uploaded images.
+"""
+
+from image_ingest.ingest import (
+    spool_upload, inspect_image, prepare_upload, upload_limiter,
+    UploadTooLargeError, InvalidImageError, UploadBusyError, MAX_UPLOAD_BYTES
+)
+from image_ingest.middleware import UploadSizeLimitMiddleware
+
+__all__ = [
+    'spool_upload', 'inspect_image', 'prepare_upload', 'upload_limiter',
+    'UploadTooLargeError', 'InvalidImageError', 'UploadBusyError', 'MAX_UPLOAD_BYTES',
+    'UploadSizeLimitMiddleware'
+]
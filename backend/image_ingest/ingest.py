@@ -0,0 +1,272 @@
+"""
+Image Ingest Module
+Receives uploaded images with bounded memory: multipart uploads are parsed
+as they arrive and streamed to disk under a size limit, validated from
+their header alone, and oversized originals are downscaled before they are
+tagged and uploaded.
+"""
+
+import asyncio
+import os
+import tempfile
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from PIL import Image, ImageOps
+from dotenv import load_dotenv
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+
+from observability import traced
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Largest accepted upload
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+# Images with more pixels are rejected before decoding (decompression bombs)
+UPLOAD_MAX_PIXELS = int(os.getenv("UPLOAD_MAX_PIXELS", str(50_000_000)))
+# Originals wider or taller than this are downscaled before tagging and upload
+UPLOAD_MAX_DIMENSION = int(os.getenv("UPLOAD_MAX_DIMENSION", "2048"))
+# Uploads decoded (validated, downscaled, tile rendered) at once, and allowed to wait beyond that
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", "2"))
+UPLOAD_MAX_PENDING = int(os.getenv("UPLOAD_MAX_PENDING", str(UPLOAD_MAX_CONCURRENCY * 4)))
+
+ALLOWED_IMAGE_FORMATS = {"JPEG", "MPO", "PNG", "WEBP"}
+# Extensions for the allowed formats, used for temporary files
+_FORMAT_EXTENSIONS = {"JPEG": ".jpg", "MPO": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+class InvalidImageError(Exception):
+    """Raised when an upload is not an image of an allowed format and size."""
+
+
+class UploadBusyError(Exception):
+    """Raised when too many uploads are being processed and the request should be retried later."""
+
+
+async def spool_upload(
+    content_type: str,
+    body: AsyncIterator[bytes],
+    field_name: str = "file",
+    max_bytes: int = MAX_UPLOAD_BYTES
+) -> Tuple[str, str]:
+    """
+    Stream the file field of a multipart/form-data request body to a temporary file.
+
+    The body is parsed as it is received, so the file is written to disk
+    once, at most one received chunk is in memory, and the size limit is
+    enforced while the upload is still arriving.
+
+    Args:
+        content_type: The request's Content-Type header.
+        body: The request body chunks (Request.stream()).
+        field_name: The form field holding the file.
+        max_bytes: Largest accepted file.
+
+    Returns:
+        Tuple of (path of the temporary file, which the caller removes;
+        content type declared for the file part).
+
+    Raises:
+        UploadTooLargeError: As soon as more than max_bytes of the file have been received.
+        InvalidImageError: If the body is not multipart/form-data with a file in field_name.
+    """
+    mime_type, options = parse_options_header(content_type or "")
+    if mime_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise InvalidImageError("Upload must be sent as multipart/form-data")
+
+    part = {"header_field": b"", "header_value": b"", "headers": {}}
+    upload = {"found": False, "active": False, "content_type": "", "size": 0}
+    received: List[bytes] = []
+
+    def on_part_begin():
+        part.update(header_field=b"", header_value=b"", headers={})
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["header_field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["header_value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["header_field"].lower()] = part["header_value"]
+        part.update(header_field=b"", header_value=b"")
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        # Only the first file in the field is kept
+        upload["active"] = (
+            not upload["found"] and b"filename" in disposition
+            and disposition.get(b"name") == field_name.encode()
+        )
+        if upload["active"]:
+            upload["found"] = True
+            upload["content_type"] = part["headers"].get(b"content-type", b"").decode("latin-1")
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if upload["active"]:
+            received.append(data[start:end])
+
+    def on_part_end():
+        upload["active"] = False
+
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        try:
+            async for chunk in body:
+                parser.write(chunk)
+                if received:
+                    data = b"".join(received)
+                    received.clear()
+                    upload["size"] += len(data)
+                    if upload["size"] > max_bytes:
+                        raise UploadTooLargeError(f"Image must be at most {max_bytes // (1024 * 1024)} MB")
+                    await asyncio.to_thread(temp_file.write, data)
+            parser.finalize()
+            if not upload["found"]:
+                raise InvalidImageError("No image file in the upload")
+        except MultipartParseError:
+            temp_file.close()
+            os.remove(temp_file.name)
+            raise InvalidImageError("Malformed multipart upload")
+        except BaseException:
+            temp_file.close()
+            os.remove(temp_file.name)
+            raise
+    return temp_file.name, upload["content_type"]
+
+
+def inspect_image(path: str) -> Tuple[str, int, int]:
+    """
+    Read an image's format and size from its header, without decoding it.
+
+    Args:
+        path: Path of the image file.
+
+    Returns:
+        Tuple of (format, width, height).
+
+    Raises:
+        InvalidImageError: If the file is not an image of an allowed format
+            or has more than UPLOAD_MAX_PIXELS pixels.
+    """
+    try:
+        with Image.open(path) as image:
+            image_format, (width, height) = image.format, image.size
+    except (OSError, Image.DecompressionBombError):
+        raise InvalidImageError("File is not a valid image")
+    if image_format not in ALLOWED_IMAGE_FORMATS:
+        raise InvalidImageError("Image must be a JPEG, PNG or WebP")
+    if width * height > UPLOAD_MAX_PIXELS:
+        raise InvalidImageError("Image dimensions are too large")
+    return image_format, width, height
+
+
+@traced("prepare_upload")
+def prepare_upload(path: str, max_dimension: int = UPLOAD_MAX_DIMENSION) -> str:
+    """
+    Validate an uploaded image and downscale it if it is larger than needed.
+
+    Images within max_dimension are kept byte for byte. Larger ones are
+    decoded at a reduced scale where possible (JPEG draft mode), rotated
+    upright from their EXIF orientation and re-encoded, as the encoded copy
+    keeps no EXIF data.
+
+    Args:
+        path: Path of the spooled upload.
+        max_dimension: Largest width or height kept.
+
+    Returns:
+        Path of the image to tag and upload: path itself, or a new temporary
+        file the caller removes as well.
+
+    Raises:
+        InvalidImageError: See inspect_image.
+    """
+    image_format, width, height = inspect_image(path)
+    if max(width, height) <= max_dimension:
+        return path
+
+    scale = max_dimension / max(width, height)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    with Image.open(path) as image:
+        if image.format in ("JPEG", "MPO"):
+            image.draft("RGB", size)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS, reducing_gap=3.0)
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        with tempfile.NamedTemporaryFile(delete=False, suffix=_FORMAT_EXTENSIONS[image_format]) as temp_file:
+            save_format = "JPEG" if image_format == "MPO" else image_format
+            options = {"quality": 90} if save_format in ("JPEG", "WEBP") else {}
+            if save_format == "JPEG" and image.mode == "RGBA":
+                image = image.convert("RGB")
+            image.save(temp_file, format=save_format, **options)
+            return temp_file.name
+
+
+class UploadProcessingLimiter:
+    """
+    Limits how many uploads are decoded at once, with queue-length-based
+    load shedding.
+
+    At most max_concurrency decodes run at once and at most max_pending more
+    may wait; beyond that run raises UploadBusyError, so a burst of large
+    uploads cannot hold more decoded images in memory than the limit allows.
+    Only the decoding steps are run through it: tagging and uploading hold
+    no decoded image and are not limited.
+    """
+
+    def __init__(self, max_concurrency: int = UPLOAD_MAX_CONCURRENCY, max_pending: int = UPLOAD_MAX_PENDING):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of decodes running or waiting."""
+        return self._in_flight
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Run the blocking func(*args) on a worker thread once a slot is free.
+
+        Raises:
+            UploadBusyError: If the limiter is saturated.
+        """
+        if self._in_flight >= self.max_concurrency + self.max_pending:
+            self._rejected += 1
+            raise UploadBusyError("Too many uploads in progress")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._in_flight += 1
+        try:
+            async with self._semaphore:
+                return await asyncio.to_thread(func, *args)
+        finally:
+            self._in_flight -= 1
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Return the current load and the number of rejected decodes."""
+        return {"in_flight": self._in_flight, "rejected": self._rejected}
+
+
+upload_limiter = UploadProcessingLimiter()
@@ -0,0 +1,39 @@
+"""
+Upload Size Limit Middleware
+ASGI middleware rejecting oversized request bodies from their Content-Length
+header, before the body is received and parsed.
+"""
+
+import json
+from typing import Iterable
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Responds 413 to requests under the given path prefixes that declare a
+    body larger than max_bytes. Bodies sent without a Content-Length
+    (chunked) pass through; the endpoint enforces the limit while reading.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefixes: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = tuple(path_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            body = json.dumps({"detail": f"Request body must be at most {self.max_bytes // (1024 * 1024)} MB"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        await self.app(scope, receive, send)
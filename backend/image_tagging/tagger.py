@@ -8,6 +8,7 @@ from typing import Dict
 from pathlib import Path
 
 from image_tagging.classifier import tag_category
+from observability import traced
 
 
 def _load_tag_configs(tags_dir: str = "tags") -> Dict:
@@ -99,6 +100,7 @@ def _tag_generic_attributes(image_path: str, generic_attributes_data: Dict) -> D
     return generic_attributes
 
 
+@traced("tag_image")
 def tag_image(image_path: str, tags_dir: str = "tags") -> Dict[str, any]:
     """
     Tag an image with all categories and attributes.
@@ -0,0 +1,14 @@
+"""
+Load Testing Package
+Locust scenario replaying a realistic mix of user traffic against the API,
+and a launcher serving the app with every external service stubbed locally.
+
+Run from the backend directory:
+    pip install -r loadtest/requirements.txt
+    python -m loadtest.server --port 8000
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:8000 \\
+        --headless --users 200 --spawn-rate 20 --run-time 5m --csv results/load
+
+Locust reports requests per second, p50/p95/p99 latencies and failures per
+endpoint; the same summary is printed when the run ends.
+"""
@@ -0,0 +1,104 @@
+"""
+Load Test Scenario
+Each simulated user signs up, logs in and uploads a few items, then
+browses like a real user: mostly wardrobe and plan reads, some outfit
+suggestions and chat, occasional uploads and plan regeneration.
+"""
+
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from locust import HttpUser, between, events, task
+from locust.exception import StopUser
+
+# Allow importing the backend packages when run as `locust -f loadtest/locustfile.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.stubs import synthetic_image
+
+IMAGES = [synthetic_image(seed) for seed in range(16)]
+QUERIES = ["casual", "office", "date night", "something warm", "summer party", None]
+CHAT_MESSAGES = [
+    "What should I wear to a casual date tonight?",
+    "Which shoes go with my jeans?",
+    "Something formal for a winter office party",
+]
+INITIAL_UPLOADS = 4
+# Signup and login answer 429 while the password hashing pool is saturated
+AUTH_ATTEMPTS = 10
+
+
+class WardrobeUser(HttpUser):
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        email = f"load-{uuid.uuid4().hex}@example.com"
+        password = "load-test-password"
+        location = {"latitude": random.uniform(-60, 60), "longitude": random.uniform(-180, 180)}
+        self._post_with_retry("/auth/signup", {"username": "load", "email": email, "password": password, **location})
+        self._post_with_retry("/auth/login", {"email": email, "password": password})
+        for _ in range(INITIAL_UPLOADS):
+            self.upload_outfit()
+        self.plan_etag = None
+
+    def _post_with_retry(self, path, body):
+        """
+        POST, retrying after Retry-After on 429 like a real client; 429s still
+        count as failures. Users that cannot authenticate stop instead of
+        flooding the other endpoints with 401s.
+        """
+        for _ in range(AUTH_ATTEMPTS):
+            response = self.client.post(path, json=body)
+            if response.status_code != 429:
+                break
+            time.sleep(float(response.headers.get("Retry-After", "1")) + random.random())
+        if response.status_code >= 400:
+            raise StopUser()
+        return response
+
+    @task(10)
+    def get_outfits(self):
+        self.client.get("/outfit/get-outfits")
+
+    @task(4)
+    def get_weekly_plan(self):
+        headers = {"If-None-Match": self.plan_etag} if self.plan_etag else {}
+        with self.client.get("/weekly/plan", headers=headers, catch_response=True) as response:
+            if response.status_code in (200, 304):
+                self.plan_etag = response.headers.get("ETag", self.plan_etag)
+                response.success()
+
+    @task(5)
+    def suggest_outfit(self):
+        self.client.post("/outfit/suggest-outfit", json={"query": random.choice(QUERIES)})
+
+    @task(2)
+    def outfit_chat(self):
+        self.client.post("/chat/outfit-chat", json={"message": random.choice(CHAT_MESSAGES)})
+
+    @task(2)
+    def upload_outfit(self):
+        files = {"file": ("outfit.jpg", random.choice(IMAGES), "image/jpeg")}
+        self.client.post("/outfit/upload-outfit", files=files)
+
+    @task(1)
+    def create_plan(self):
+        self.client.put("/weekly/create-plan", json={"regenerate": random.random() < 0.2})
+
+
+@events.quitting.add_listener
+def print_summary(environment, **kwargs):
+    """Print throughput, latency percentiles and error rate per endpoint."""
+    stats = environment.stats
+    print(f"\n{'endpoint':<32} {'requests':>9} {'req/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'errors':>8}")
+    for entry in sorted(stats.entries.values(), key=lambda entry: (entry.name, entry.method)) + [stats.total]:
+        name = f"{entry.method or ''} {entry.name}".strip()
+        error_rate = entry.num_failures / entry.num_requests if entry.num_requests else 0.0
+        print(
+            f"{name:<32} {entry.num_requests:>9} {entry.total_rps:>8.1f} "
+            f"{entry.get_response_time_percentile(0.5):>7.0f} {entry.get_response_time_percentile(0.95):>7.0f} "
+            f"{entry.get_response_time_percentile(0.99):>7.0f} {error_rate:>8.2%}"
+        )
@@ -0,0 +1,49 @@
+"""
+Load Test Server
+Serves the app with uvicorn with MongoDB, Cloudinary, the weather API and
+OpenAI replaced by local stand-ins with simulated latency.
+
+The Mongo stand-in lives in process memory, so the server always runs a
+single worker: exactly what a load test of one uvicorn worker needs.
+"""
+
+import argparse
+import os
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the app with all external services stubbed")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mongo-round-trip-ms", type=float, default=1.0, help="simulated MongoDB latency per operation")
+    parser.add_argument("--service-latency-ms", type=float, default=30.0, help="simulated image CDN and weather API latency")
+    parser.add_argument("--openai-first-token-ms", type=float, default=400.0)
+    parser.add_argument("--openai-token-ms", type=float, default=15.0)
+    args = parser.parse_args()
+
+    # Every simulated user logs in from the same address
+    os.environ.setdefault("LOGIN_IP_BURST", "1000000")
+    os.environ.setdefault("LOGIN_IP_PER_MINUTE", "1000000")
+    os.environ.setdefault("SECRET_KEY", "load-test-secret-key-with-32-bytes!")
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+    from benchmarks.stubs import install_mongo_stand_in
+
+    install_mongo_stand_in(args.mongo_round_trip_ms)
+
+    from benchmarks.fake_openai import start_fake_openai
+    from benchmarks.fake_services import start_fake_services, install_cloudinary_stand_in, install_weather_stand_in
+
+    os.environ["OPENAI_BASE_URL"] = start_fake_openai(args.openai_first_token_ms, args.openai_token_ms, tokens=120)
+    services_url = start_fake_services(latency_ms=args.service_latency_ms)
+    install_cloudinary_stand_in(services_url)
+    install_weather_stand_in(services_url)
+
+    import uvicorn
+    from app import app
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
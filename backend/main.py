@@ -38,12 +38,12 @@ print(response)
 
 # Sign up example
 # auth = {"email": "test@gmmail.com", "password": "test123", "username": "testuser"}
-# response = sign_up(auth)
+# response = asyncio.run(sign_up(auth))
 # print(f"Sign up successful. User ID: {response}")
 
 # Login example
 # login_auth = {"email": "test@gmmail.com", "password": "test123"}
-# login_result = login(login_auth)
+# login_result = asyncio.run(login(login_auth))
 # print(f"Login result: {login_result}")
 
 
@@ -3,7 +3,9 @@ MongoDB Uploader Package
 A modular package for uploading and managing documents in MongoDB.
 """
 
-from mongodb_uploader.uploader import upload_item, get_item, delete_item, get_items, delete_items, update_item, get_weekly_plan, upload_weekly_plan
+from mongodb_uploader.uploader import upload_item, get_item, delete_item, get_items, get_items_for_wardrobes, delete_items, update_item, search_items, backfill_tag_index, get_weekly_plan, upload_weekly_plan, update_weekly_plan_days, weekly_plan_days_update, set_weekly_plan_day_image, set_weekly_plan_status, get_weekly_plans, bulk_write_weekly_plans
+from mongodb_uploader.plan_cache import weekly_plan_cache
+from mongodb_uploader.tag_index import normalize_tags, DEFAULT_FACETS
 
-__all__ = ['upload_item', 'get_item', 'delete_item', 'get_items', 'delete_items', 'update_item', 'get_weekly_plan', 'upload_weekly_plan']
+__all__ = ['upload_item', 'get_item', 'delete_item', 'get_items', 'get_items_for_wardrobes', 'delete_items', 'update_item', 'search_items', 'backfill_tag_index', 'get_weekly_plan', 'upload_weekly_plan', 'update_weekly_plan_days', 'weekly_plan_days_update', 'set_weekly_plan_day_image', 'set_weekly_plan_status', 'get_weekly_plans', 'bulk_write_weekly_plans', 'weekly_plan_cache', 'normalize_tags', 'DEFAULT_FACETS']
 
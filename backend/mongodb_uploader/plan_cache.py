@@ -0,0 +1,117 @@
+"""
+Weekly Plan Cache
+Short-lived in-process cache of rendered weekly plan reads keyed by wardrobe_id.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+WEEKLY_PLAN_CACHE_TTL_SECONDS = float(os.getenv("WEEKLY_PLAN_CACHE_TTL_SECONDS", "60"))
+WEEKLY_PLAN_CACHE_MAX_ENTRIES = int(os.getenv("WEEKLY_PLAN_CACHE_MAX_ENTRIES", "10000"))
+
+
+class WeeklyPlanCache:
+    """
+    Thread-safe TTL cache with LRU eviction for weekly plan reads.
+
+    Every weekly plan write in this package invalidates the wardrobe's entry.
+    Writes made by another process (another worker, the batch planner CLI)
+    become visible after at most one TTL.
+
+    A read that raced with a write must not cache what it read, so callers
+    take a generation() before reading from MongoDB and pass it to set();
+    the entry is dropped if anything was invalidated in between.
+    """
+
+    def __init__(self, ttl_seconds: float = WEEKLY_PLAN_CACHE_TTL_SECONDS, max_entries: int = WEEKLY_PLAN_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation = 0
+        self.metrics = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        """Return the current invalidation generation."""
+        with self._lock:
+            return self._generation
+
+    def get(self, wardrobe_id: str) -> Optional[Any]:
+        """
+        Return the cached value for wardrobe_id, or None if missing or expired.
+
+        Args:
+            wardrobe_id: The wardrobe_id to look up.
+
+        Returns:
+            The cached value, or None.
+        """
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(wardrobe_id)
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[wardrobe_id]
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(wardrobe_id)
+            self.metrics["hits"] += 1
+            return value
+
+    def set(self, wardrobe_id: str, value: Any, generation: int) -> None:
+        """
+        Store a value for wardrobe_id unless a write happened since generation.
+
+        Args:
+            wardrobe_id: The wardrobe_id the value belongs to.
+            value: The value to cache; it is not copied, so it must not be mutated.
+            generation: The generation() taken before the value was read.
+        """
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[wardrobe_id] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(wardrobe_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, wardrobe_id: str) -> None:
+        """
+        Drop any cached value for wardrobe_id.
+
+        Args:
+            wardrobe_id: The wardrobe_id to evict.
+        """
+        with self._lock:
+            self._generation += 1
+            self.metrics["invalidations"] += 1
+            self._entries.pop(wardrobe_id, None)
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get_metrics(self) -> Dict[str, int]:
+        """Return a snapshot of hit, miss and invalidation counts and the entry count."""
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["entries"] = len(self._entries)
+        return metrics
+
+
+weekly_plan_cache = WeeklyPlanCache()
@@ -0,0 +1,123 @@
+"""
+Tag Index Module
+Normalizes an item's free-form tags dict into a flat list of "attr:value"
+strings, stored on the item as tag_index and covered by a multikey index,
+and builds the faceted search aggregations over it.
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Facets counted when a search does not ask for specific ones
+DEFAULT_FACETS = ["categoryGroup", "category", "color", "season", "occasion", "material", "pattern"]
+# Values that carry no information and are left out of the index
+_SKIPPED_VALUES = {"", "etc"}
+
+
+def _normalize(text: Any) -> str:
+    return str(text).strip().lower()
+
+
+def tag_term(attribute: str, value: Any) -> str:
+    """The index term of an attribute value, e.g. ("color", "Navy Blue") -> "color:navy blue"."""
+    return f"{_normalize(attribute)}:{_normalize(value)}"
+
+
+def normalize_tags(tags: Optional[Dict[str, Any]]) -> List[str]:
+    """
+    Build the tag_index of an item from its tags.
+
+    Args:
+        tags: The item's tags; values may be strings or lists of strings.
+
+    Returns:
+        Sorted, distinct "attr:value" terms, lowercase.
+    """
+    terms = set()
+    for attribute, values in (tags or {}).items():
+        for value in values if isinstance(values, list) else [values]:
+            if value is not None and _normalize(value) not in _SKIPPED_VALUES:
+                terms.add(tag_term(attribute, value))
+    return sorted(terms)
+
+
+def _filter_clauses(filters: Dict[str, List[str]], exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Values of one attribute match any (OR), attributes must all match (AND)."""
+    return [
+        {"tag_index": {"$in": [tag_term(attribute, value) for value in values]}}
+        for attribute, values in filters.items()
+        if values and _normalize(attribute) != exclude
+    ]
+
+
+def _match(wardrobe_id: str, clauses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"$match": {"wardrobe_id": wardrobe_id, **({"$and": clauses} if clauses else {})}}
+
+
+def build_search_pipeline(
+    wardrobe_id: str,
+    filters: Dict[str, List[str]],
+    skip: int,
+    limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Build the aggregation returning a page of matching items and their total.
+
+    The whole filter is matched before the $facet, on the (wardrobe_id,
+    tag_index) index; stages inside a $facet can't use indexes.
+
+    Args:
+        wardrobe_id: The wardrobe to search.
+        filters: Attribute -> accepted values.
+        skip: Matching items to skip.
+        limit: Maximum matching items to return.
+
+    Returns:
+        The pipeline; its single result has items and total ([{"count"}] or []).
+    """
+    return [
+        _match(wardrobe_id, _filter_clauses(filters)),
+        {"$facet": {
+            "items": [{"$sort": {"_id": 1}}, {"$skip": skip}, {"$limit": limit}, {"$project": {"_id": 0}}],
+            "total": [{"$count": "count"}],
+        }},
+    ]
+
+
+def build_facet_pipeline(
+    wardrobe_id: str,
+    filters: Dict[str, List[str]],
+    facets: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Build the aggregation counting the values of each facet in one pass over the wardrobe.
+
+    Facet counts are disjunctive: the counts of an attribute apply every
+    filter except the one on that attribute, so they show how many items
+    each alternative value would match. Filters on attributes that are not
+    counted apply to every facet and are matched before the $facet.
+
+    Args:
+        wardrobe_id: The wardrobe to search.
+        filters: Attribute -> accepted values.
+        facets: Attributes to count values of.
+
+    Returns:
+        The pipeline; its single result has facet_0, facet_1, ... with the
+        {"_id": term, "count"} list of each facet in order.
+    """
+    attributes = [_normalize(facet) for facet in facets]
+    faceted_filters = {attribute: values for attribute, values in filters.items() if _normalize(attribute) in attributes}
+    shared_filters = {attribute: values for attribute, values in filters.items() if attribute not in faceted_filters}
+    branches = {}
+    for position, attribute in enumerate(attributes):
+        clauses = _filter_clauses(faceted_filters, exclude=attribute)
+        branches[f"facet_{position}"] = ([{"$match": {"$and": clauses}}] if clauses else []) + [
+            {"$unwind": "$tag_index"},
+            {"$match": {"tag_index": {"$regex": f"^{_escape_regex(attribute)}:"}}},
+            {"$group": {"_id": "$tag_index", "count": {"$sum": 1}}},
+        ]
+    return [_match(wardrobe_id, _filter_clauses(shared_filters)), {"$facet": branches}]
+
+
+def _escape_regex(text: str) -> str:
+    return "".join(f"\\{char}" if not char.isalnum() else char for char in text)
@@ -6,16 +6,21 @@ Handles uploading, retrieving, and deleting documents in MongoDB.
 import os
 from typing import Dict, Optional, Any, List
 
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.results import BulkWriteResult
 from pymongo.collection import Collection
 from pymongo.database import Database
 from bson import ObjectId
 from dotenv import load_dotenv
 
+from observability import mongo_command_listener
+from mongodb_uploader.plan_cache import weekly_plan_cache
+from mongodb_uploader.tag_index import normalize_tags, build_search_pipeline, build_facet_pipeline, tag_term
+
 load_dotenv()
 
 # MongoDB connection setup
-mongodb_client = MongoClient(os.getenv("MONGODB_URI"))
+mongodb_client = MongoClient(os.getenv("MONGODB_URI"), event_listeners=[mongo_command_listener])
 DB_NAME = "WearWhat"
 OUTFITS_COLLECTION_NAME = "outfits"
 WEEKLY_PLANS_COLLECTION_NAME = "weekly_plans"
@@ -32,11 +37,23 @@ if WEEKLY_PLANS_COLLECTION_NAME not in database.list_collection_names():
 outfits_collection: Collection = database[OUTFITS_COLLECTION_NAME]
 weekly_plans_collection: Collection = database[WEEKLY_PLANS_COLLECTION_NAME]
 
+# Faceted wardrobe search: the multikey tag_index within a wardrobe
+try:
+    outfits_collection.create_index([("wardrobe_id", 1), ("tag_index", 1)])
+except Exception:
+    pass  # Index might already exist
+
+# One plan per wardrobe; also lets upload_weekly_plan upsert on wardrobe_id
+try:
+    weekly_plans_collection.create_index("wardrobe_id", unique=True)
+except Exception:
+    pass  # Index might already exist, or duplicate plans from before need cleaning up
 
 
 def upload_item(outfit: Dict[str, Any]) -> str:
     """
     Upload a document to MongoDB.
+    The tag_index used by search_items is derived from the tags.
     
     Args:
         outfit: Dictionary containing the outfit data to upload.
@@ -44,6 +61,8 @@ def upload_item(outfit: Dict[str, Any]) -> str:
     Returns:
         The inserted document ID as a string.
     """
+    if "tags" in outfit:
+        outfit = {**outfit, "tag_index": normalize_tags(outfit["tags"])}
     result = outfits_collection.insert_one(outfit)
     return str(result.inserted_id)
 
@@ -90,6 +109,22 @@ def get_items(wardrobe_id: str) -> List[Dict[str, Any]]:
     result = outfits_collection.find({"wardrobe_id": wardrobe_id})
     return list(result)
 
+def get_items_for_wardrobes(wardrobe_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Retrieve the documents of several wardrobes with a single query.
+
+    Args:
+        wardrobe_ids: The IDs of the wardrobes to retrieve documents from.
+
+    Returns:
+        Dictionary mapping each wardrobe ID that has documents to its documents.
+    """
+    items_by_wardrobe: Dict[str, List[Dict[str, Any]]] = {}
+    for item in outfits_collection.find({"wardrobe_id": {"$in": wardrobe_ids}}):
+        items_by_wardrobe.setdefault(item["wardrobe_id"], []).append(item)
+    return items_by_wardrobe
+
+
 def delete_items(wardrobe_id: str) -> int:
     """
     Delete all documents from MongoDB by wardrobe ID.
@@ -107,6 +142,7 @@ def delete_items(wardrobe_id: str) -> int:
 def update_item(item_id: str, item: Dict[str, Any]) -> int:
     """
     Update a document in MongoDB by ID.
+    Updating the tags also updates the tag_index.
 
     Args:
         item_id: The ID of the document to update.
@@ -115,31 +151,86 @@ def update_item(item_id: str, item: Dict[str, Any]) -> int:
     Returns:
         The number of documents updated (0 or 1).
     """
+    if "tags" in item:
+        item = {**item, "tag_index": normalize_tags(item["tags"])}
     result = outfits_collection.update_one({"item_id": item_id}, {"$set": item})
     return result.modified_count
 
 
+def search_items(
+    wardrobe_id: str,
+    filters: Dict[str, List[str]],
+    facets: List[str],
+    skip: int = 0,
+    limit: int = 50
+) -> Dict[str, Any]:
+    """
+    Search the documents of a wardrobe by tags and count tag values, with
+    one aggregation for the page and total and one for the facet counts.
+
+    Args:
+        wardrobe_id: The ID of the wardrobe to search.
+        filters: Tag attribute -> accepted values; an item matches if it has
+            any of the values of every attribute (case-insensitive).
+        facets: Tag attributes to count the values of.
+        skip: Number of matching documents to skip.
+        limit: Maximum number of matching documents to return.
+
+    Returns:
+        Dictionary with items (the page of matching documents), total (number
+        of matching documents) and facets (attribute -> value -> count; the
+        counts of an attribute ignore the filter on that attribute).
+    """
+    result = next(outfits_collection.aggregate(build_search_pipeline(wardrobe_id, filters, skip, limit)), {})
+    facet_result = next(outfits_collection.aggregate(build_facet_pipeline(wardrobe_id, filters, facets)), {}) if facets else {}
+    facet_counts = {}
+    for position, facet in enumerate(facets):
+        prefix_length = len(tag_term(facet, ""))
+        counts = sorted(facet_result.get(f"facet_{position}", []), key=lambda entry: (-entry["count"], entry["_id"]))
+        facet_counts[facet] = {entry["_id"][prefix_length:]: entry["count"] for entry in counts}
+    total = result.get("total") or [{"count": 0}]
+    return {"items": result.get("items", []), "total": total[0]["count"], "facets": facet_counts}
+
+
+def backfill_tag_index(batch_size: int = 500) -> int:
+    """
+    Add the tag_index to documents stored before it existed.
+
+    Args:
+        batch_size: Number of documents updated per bulk write.
+
+    Returns:
+        The number of documents updated.
+    """
+    updated = 0
+    operations = []
+    for item in outfits_collection.find({"tag_index": {"$exists": False}}, {"tags": 1}):
+        operations.append(UpdateOne({"_id": item["_id"]}, {"$set": {"tag_index": normalize_tags(item.get("tags"))}}))
+        if len(operations) >= batch_size:
+            updated += outfits_collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += outfits_collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+
 # Weekly Plans Functions
 
 def upload_weekly_plan(weekly_plan: Dict[str, Any]) -> str:
     """
     Upload a weekly plan document to MongoDB.
-    Only one weekly plan per wardrobe - deletes existing plan if it exists.
+    Only one weekly plan per wardrobe - replaces the existing plan atomically if it exists.
 
     Args:
         weekly_plan: Dictionary containing the weekly plan data to upload.
 
     Returns:
-        The inserted document ID as a string.
+        The plan ID.
     """
     wardrobe_id = weekly_plan.get("wardrobe_id")
-
-    # Delete existing weekly plan for this wardrobe
-    weekly_plans_collection.delete_many({"wardrobe_id": wardrobe_id})
-
-    # Insert the new weekly plan
-    result = weekly_plans_collection.insert_one(weekly_plan)
-    return str(result.inserted_id)
+    weekly_plans_collection.replace_one({"wardrobe_id": wardrobe_id}, weekly_plan, upsert=True)
+    weekly_plan_cache.invalidate(wardrobe_id)
+    return weekly_plan.get("plan_id")
 
 
 def get_weekly_plan(wardrobe_id: str) -> Optional[Dict[str, Any]]:
@@ -154,4 +245,129 @@ def get_weekly_plan(wardrobe_id: str) -> Optional[Dict[str, Any]]:
         The weekly plan document if found, None otherwise.
     """
     result = weekly_plans_collection.find_one({"wardrobe_id": wardrobe_id})
-    return result
\ No newline at end of file
+    return result
+
+
+def update_weekly_plan_days(
+    wardrobe_id: str,
+    plan_fields: Dict[str, Any],
+    changed_days: Dict[str, Dict[str, Any]],
+    removed_day_keys: List[str]
+) -> int:
+    """
+    Incrementally update a weekly plan: only the given days are written.
+
+    Args:
+        wardrobe_id: The ID of the wardrobe the plan belongs to.
+        plan_fields: Top-level plan fields to set (week_start, status, etc.).
+        changed_days: Daily plans to write, keyed by day key (ISO date).
+        removed_day_keys: Day keys to remove from the plan.
+
+    Returns:
+        The number of documents updated (0 or 1).
+    """
+    update = weekly_plan_days_update(plan_fields, changed_days, removed_day_keys)
+    result = weekly_plans_collection.update_one({"wardrobe_id": wardrobe_id}, update)
+    weekly_plan_cache.invalidate(wardrobe_id)
+    return result.modified_count
+
+
+def weekly_plan_days_update(
+    plan_fields: Dict[str, Any],
+    changed_days: Dict[str, Dict[str, Any]],
+    removed_day_keys: List[str]
+) -> Dict[str, Any]:
+    """
+    Build the update document that writes only the given days of a weekly plan.
+
+    Args:
+        plan_fields: Top-level plan fields to set (week_start, status, etc.).
+        changed_days: Daily plans to write, keyed by day key (ISO date).
+        removed_day_keys: Day keys to remove from the plan.
+
+    Returns:
+        A MongoDB update document.
+    """
+    update: Dict[str, Any] = {"$set": dict(plan_fields)}
+    for day_key, daily_plan in changed_days.items():
+        update["$set"][f"daily_plans.{day_key}"] = daily_plan
+    if removed_day_keys:
+        update["$unset"] = {f"daily_plans.{day_key}": "" for day_key in removed_day_keys}
+    return update
+
+
+def set_weekly_plan_day_image(wardrobe_id: str, plan_id: str, day_key: str, outfit_ids: List[str], image_url: Optional[str]) -> int:
+    """
+    Set the composite image URL of one day of a weekly plan.
+    Has no effect if the plan or that day has been re-planned in the meantime.
+
+    Args:
+        wardrobe_id: The ID of the wardrobe the plan belongs to.
+        plan_id: The ID of the plan being rendered.
+        day_key: The day to update (its ISO date).
+        outfit_ids: The outfit IDs the composite was rendered from.
+        image_url: The composite image URL.
+
+    Returns:
+        The number of documents updated (0 or 1).
+    """
+    result = weekly_plans_collection.update_one(
+        {"wardrobe_id": wardrobe_id, "plan_id": plan_id, f"daily_plans.{day_key}.outfit_ids": outfit_ids},
+        {"$set": {f"daily_plans.{day_key}.image_url": image_url}}
+    )
+    weekly_plan_cache.invalidate(wardrobe_id)
+    return result.modified_count
+
+
+def set_weekly_plan_status(wardrobe_id: str, plan_id: str, status: str, render_started_at: Optional[str] = None) -> int:
+    """
+    Set the rendering status of a weekly plan.
+
+    Args:
+        wardrobe_id: The ID of the wardrobe the plan belongs to.
+        plan_id: The ID of the plan.
+        status: The new status (pending, complete or failed).
+        render_started_at: If given, the status is only set while the plan is
+            pending for the render started at this time, so a superseded or
+            abandoned render never overwrites the status of a newer one.
+
+    Returns:
+        The number of documents updated (0 or 1).
+    """
+    query = {"wardrobe_id": wardrobe_id, "plan_id": plan_id}
+    if render_started_at is not None:
+        query.update(status="pending", render_started_at=render_started_at)
+    result = weekly_plans_collection.update_one(query, {"$set": {"status": status}})
+    weekly_plan_cache.invalidate(wardrobe_id)
+    return result.modified_count
+
+
+def get_weekly_plans(wardrobe_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Retrieve the weekly plans of several wardrobes with a single query.
+
+    Args:
+        wardrobe_ids: The IDs of the wardrobes to retrieve plans for.
+
+    Returns:
+        Dictionary mapping each wardrobe ID that has a plan to its plan document.
+    """
+    return {plan["wardrobe_id"]: plan for plan in weekly_plans_collection.find({"wardrobe_id": {"$in": wardrobe_ids}})}
+
+
+def bulk_write_weekly_plans(operations: List[Any]) -> Optional[BulkWriteResult]:
+    """
+    Apply many weekly plan writes in one unordered bulk write.
+
+    Args:
+        operations: pymongo write operations (UpdateOne, ReplaceOne, etc.).
+
+    Returns:
+        The bulk write result, or None if there was nothing to write.
+    """
+    if not operations:
+        return None
+    try:
+        return weekly_plans_collection.bulk_write(operations, ordered=False)
+    finally:
+        weekly_plan_cache.clear()
@@ -0,0 +1,12 @@
+"""
+Observability Package
+Latency histograms exported in the Prometheus text format, stage-level
+spans and optional OpenTelemetry traces.
+"""
+
+from observability.metrics import registry, http_request_duration, stage_duration, mongo_command_duration, PROMETHEUS_CONTENT_TYPE, METRICS_ENABLED
+from observability.tracing import span, otel_span, traced, TRACING_ENABLED
+from observability.mongo import mongo_command_listener
+from observability.middleware import RequestMetricsMiddleware
+
+__all__ = ['registry', 'http_request_duration', 'stage_duration', 'mongo_command_duration', 'PROMETHEUS_CONTENT_TYPE', 'METRICS_ENABLED', 'span', 'otel_span', 'traced', 'TRACING_ENABLED', 'mongo_command_listener', 'RequestMetricsMiddleware']
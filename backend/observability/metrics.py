@@ -0,0 +1,124 @@
+"""
+Metrics
+Thread-safe latency histograms and gauge collectors, rendered in the
+Prometheus text exposition format for the /metrics endpoint.
+"""
+
+import bisect
+import os
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cache hits through slow image tagging calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """A histogram with fixed buckets, one series per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record one observation for the series with the given label values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text format."""
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, counts, total in sorted(snapshot):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _labels(self.label_names, label_values, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, label_values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, label_values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's histograms and the gauge collectors read at scrape time."""
+
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        self._collectors: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Create and register a histogram."""
+        histogram = Histogram(name, documentation, label_names, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register_collector(self, name: str, documentation: str, collect: Callable[[], Dict[str, float]]) -> None:
+        """
+        Register a function returning a dict of numbers, exported as a gauge
+        with one series per key, e.g. a cache's get_metrics().
+        """
+        self._collectors.append((name, documentation, collect))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for name, documentation, collect in self._collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(collect().items()):
+                lines.append(f'{name}{{key="{_escape(key)}"}} {float(value)}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "wearwhat_http_request_duration_seconds",
+    "Time until the response starts, by route template.",
+    ("method", "route", "status"),
+)
+stage_duration = registry.histogram(
+    "wearwhat_stage_duration_seconds",
+    "Duration of instrumented stages such as tagging, image downloads and uploads.",
+    ("stage", "outcome"),
+)
+mongo_command_duration = registry.histogram(
+    "wearwhat_mongo_command_duration_seconds",
+    "Duration of MongoDB commands.",
+    ("command", "outcome"),
+)
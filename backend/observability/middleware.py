@@ -0,0 +1,54 @@
+"""
+Request Metrics Middleware
+ASGI middleware recording the latency of every HTTP request by route
+template, and wrapping it in an OpenTelemetry span if tracing is enabled.
+"""
+
+import time
+
+from observability.metrics import http_request_duration, METRICS_ENABLED
+from observability.tracing import otel_span
+
+
+class RequestMetricsMiddleware:
+    """
+    Records the time until the response starts, so streamed responses
+    (server-sent events) are measured to their first byte, not their end.
+    Requests that match no route share the route label "unmatched" to keep
+    the number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status_code: int) -> None:
+            nonlocal recorded
+            recorded = True
+            route = getattr(scope.get("route"), "path", "unmatched")
+            if METRICS_ENABLED:
+                http_request_duration.observe(time.perf_counter() - started, scope["method"], route, str(status_code))
+            if request_span is not None:
+                request_span.update_name(f"{scope['method']} {route}")
+                request_span.set_attribute("http.route", route)
+                request_span.set_attribute("http.status_code", status_code)
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start" and not recorded:
+                record(message["status"])
+            await send(message)
+
+        with otel_span("http.request", {"http.method": scope["method"], "http.target": scope["path"]}) as request_span:
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            except Exception:
+                if not recorded:
+                    record(500)
+                raise
@@ -0,0 +1,44 @@
+"""
+MongoDB Command Monitoring
+A pymongo command listener recording the duration of every command, passed
+to the MongoClients via event_listeners.
+"""
+
+import time
+
+from pymongo import monitoring
+
+from observability.metrics import mongo_command_duration, METRICS_ENABLED
+from observability.tracing import get_tracer
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records command durations into the Mongo histogram and, if tracing is enabled, as spans."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, "error")
+
+    def _record(self, event, outcome: str) -> None:
+        seconds = event.duration_micros / 1_000_000
+        if METRICS_ENABLED:
+            mongo_command_duration.observe(seconds, event.command_name, outcome)
+        tracer = get_tracer()
+        if tracer is not None:
+            # Listeners run on the calling thread once the command finished,
+            # so the span is recorded after the fact, under the current span
+            end_ns = time.time_ns()
+            command_span = tracer.start_span(
+                f"mongo.{event.command_name}",
+                start_time=end_ns - event.duration_micros * 1000,
+                attributes={"db.system": "mongodb", "db.name": event.database_name, "db.operation": event.command_name},
+            )
+            command_span.end(end_time=end_ns)
+
+
+mongo_command_listener = MongoCommandListener()
@@ -0,0 +1,295 @@
+"""
+Profiler
+Opt-in, low-overhead diagnosis of a live worker: a pure-Python sampling
+profiler producing folded stacks (the input format of flamegraph.pl,
+speedscope and inferno), and tracemalloc snapshots for memory growth.
+
+Everything is disabled unless PROFILER_ADMIN_TOKEN is set; the admin
+routes and the per-request profiling header then require that token.
+"""
+
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROFILER_ADMIN_TOKEN = os.getenv("PROFILER_ADMIN_TOKEN", "")
+PROFILER_ENABLED = bool(PROFILER_ADMIN_TOKEN)
+PROFILER_DEFAULT_INTERVAL_MS = float(os.getenv("PROFILER_DEFAULT_INTERVAL_MS", "5"))
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+# Per-request profiles kept for retrieval
+PROFILER_MAX_STORED_PROFILES = int(os.getenv("PROFILER_MAX_STORED_PROFILES", "20"))
+
+PROFILE_REQUEST_HEADER = b"x-profile-request"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against PROFILER_ADMIN_TOKEN in constant time."""
+    return PROFILER_ENABLED and token is not None and hmac.compare_digest(token.encode(), PROFILER_ADMIN_TOKEN.encode())
+
+
+# Longest first, so files are shown relative to the most specific import root
+_PATH_PREFIXES = sorted({os.path.abspath(path) + os.sep for path in sys.path if path}, key=len, reverse=True)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread except its own at a fixed interval.
+
+    Sampling reads sys._current_frames() from a background thread, so the
+    profiled code runs unmodified; the cost is one stack walk per thread
+    per interval while a profile runs, and nothing otherwise.
+    """
+
+    def __init__(self, interval_seconds: float = PROFILER_DEFAULT_INTERVAL_MS / 1000):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        # Sample before waiting, so even a request shorter than the interval gets a sample
+        while True:
+            for thread in threading.enumerate():
+                names.setdefault(thread.ident, thread.name)
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+            if self._stop.wait(self.interval_seconds):
+                return
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the folded stacks."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.folded()
+
+    def folded(self) -> str:
+        """Return one 'frame;frame;... count' line per distinct stack, most sampled first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# Only one profile runs at a time, so profiles never sample each other
+_profile_slot = threading.Lock()
+
+
+def _acquire_slot() -> None:
+    if not _profile_slot.acquire(blocking=False):
+        raise ProfilerBusyError("Another profile is running")
+
+
+def profile_for(seconds: float, interval_ms: float = PROFILER_DEFAULT_INTERVAL_MS) -> str:
+    """
+    Sample all threads for a time-boxed period; blocks the calling thread.
+
+    Args:
+        seconds: Duration, capped at PROFILER_MAX_SECONDS.
+        interval_ms: Sampling interval.
+
+    Returns:
+        Folded stacks.
+
+    Raises:
+        ProfilerBusyError: If another profile is running.
+    """
+    _acquire_slot()
+    try:
+        profiler = SamplingProfiler(max(interval_ms, 1.0) / 1000)
+        profiler.start()
+        time.sleep(min(seconds, PROFILER_MAX_SECONDS))
+        return profiler.stop()
+    finally:
+        _profile_slot.release()
+
+
+class ProfileStore:
+    """The most recent per-request profiles, by profile ID."""
+
+    def __init__(self, max_entries: int = PROFILER_MAX_STORED_PROFILES):
+        self.max_entries = max_entries
+        self._profiles: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, profile_id: str, folded: str) -> None:
+        with self._lock:
+            self._profiles[profile_id] = folded
+            while len(self._profiles) > self.max_entries:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[str]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+profile_store = ProfileStore()
+
+
+class RequestProfilerMiddleware:
+    """
+    Profiles a single request sent with the X-Profile-Request header and a
+    valid X-Admin-Token. The response is unchanged apart from an
+    X-Profile-Id header; the folded stacks are stored under that ID once the
+    request completes. Every thread is sampled, so the profile also shows
+    whatever else the worker was doing at the time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        if PROFILE_REQUEST_HEADER not in headers or not is_admin_token(headers.get(ADMIN_TOKEN_HEADER, b"").decode()):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            _acquire_slot()
+        except ProfilerBusyError:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile_store.put(profile_id, profiler.stop())
+            _profile_slot.release()
+
+
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+def start_memory_tracing(frames: int = 10) -> None:
+    """Start tracing allocations, keeping frames stack frames per allocation."""
+    global _last_snapshot
+    _last_snapshot = None
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_memory_tracing() -> None:
+    """Stop tracing allocations and drop the traces."""
+    global _last_snapshot
+    _last_snapshot = None
+    tracemalloc.stop()
+
+
+def memory_snapshot(top: int = 25, path_filter: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Take a tracemalloc snapshot and report the largest allocation sites.
+
+    Args:
+        top: Number of allocation sites to report.
+        path_filter: Only count allocations made in files whose path contains
+            this (e.g. "image_composer" or "PIL").
+
+    Only allocations made through Python's allocator are traced; Pillow's
+    pixel buffers are not, so compare traced_kb with max_rss_kb.
+
+    Returns:
+        Dict with the traced totals, the process's peak resident size and,
+        per site, the current size and count and the growth since the
+        previous snapshot.
+
+    Raises:
+        RuntimeError: If memory tracing was not started.
+    """
+    global _last_snapshot
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("Memory tracing is not started")
+
+    # The baseline is kept unfiltered, so each call can use a different path_filter
+    raw_snapshot = tracemalloc.take_snapshot()
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    snapshot = _filter_snapshot(raw_snapshot, filters, path_filter)
+    if _last_snapshot is not None:
+        stats = snapshot.compare_to(_filter_snapshot(_last_snapshot, filters, path_filter), "lineno")
+    else:
+        stats = snapshot.statistics("lineno")
+    _last_snapshot = raw_snapshot
+
+    sites: List[Dict[str, Any]] = []
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        sites.append({
+            "location": f"{frame.filename}:{frame.lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+            "size_diff_kb": round(getattr(stat, "size_diff", stat.size) / 1024, 1),
+        })
+    current, peak = tracemalloc.get_traced_memory()
+    return {"traced_kb": round(current / 1024, 1), "peak_kb": round(peak / 1024, 1), "max_rss_kb": _max_rss_kb(), "top": sites}
+
+
+def _filter_snapshot(
+    snapshot: tracemalloc.Snapshot,
+    filters: List[tracemalloc.Filter],
+    path_filter: Optional[str]
+) -> tracemalloc.Snapshot:
+    snapshot = snapshot.filter_traces(filters)
+    if path_filter:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(True, f"*{path_filter}*")])
+    return snapshot
+
+
+def _max_rss_kb() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
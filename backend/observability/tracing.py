@@ -0,0 +1,107 @@
+"""
+Tracing
+Stage spans that time a block into the stage histogram and, if enabled,
+into an OpenTelemetry span.
+
+OpenTelemetry is optional: set TRACING_ENABLED=true and install
+opentelemetry-api. Spans are exported by whatever SDK is configured for the
+process (e.g. by running under opentelemetry-instrument); without one they
+are no-ops. With metrics and tracing both disabled, traced() returns the
+function unchanged and span() a shared no-op context manager.
+"""
+
+import contextlib
+import functools
+import inspect
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from observability.metrics import stage_duration, METRICS_ENABLED
+
+load_dotenv()
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+
+_tracer = None
+if TRACING_ENABLED:
+    try:
+        from opentelemetry import trace
+        _tracer = trace.get_tracer("wearwhat")
+    except ImportError:
+        TRACING_ENABLED = False
+
+_NOOP = contextlib.nullcontext()
+
+
+def get_tracer():
+    """Return the OpenTelemetry tracer, or None if tracing is disabled."""
+    return _tracer
+
+
+def otel_span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Return a context manager for an OpenTelemetry span, or a no-op if tracing is disabled."""
+    if _tracer is None:
+        return _NOOP
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+class _StageSpan:
+    """Times a stage into the stage histogram and the optional OpenTelemetry span."""
+
+    __slots__ = ("stage", "attributes", "_started", "_otel")
+
+    def __init__(self, stage: str, attributes: Optional[Dict[str, Any]]):
+        self.stage = stage
+        self.attributes = attributes
+
+    def __enter__(self):
+        self._otel = otel_span(self.stage, self.attributes)
+        self._otel.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if METRICS_ENABLED:
+            stage_duration.observe(time.perf_counter() - self._started, self.stage, "error" if exc_type else "ok")
+        return self._otel.__exit__(exc_type, exc, tb)
+
+
+def span(stage: str, attributes: Optional[Dict[str, Any]] = None):
+    """
+    Instrument a block as a stage.
+
+    Args:
+        stage: Stage name, used as the histogram label and the span name.
+        attributes: Optional span attributes (not exported as labels).
+
+    Returns:
+        A context manager.
+    """
+    if not METRICS_ENABLED and _tracer is None:
+        return _NOOP
+    return _StageSpan(stage, attributes)
+
+
+def traced(stage: str) -> Callable[[Callable], Callable]:
+    """Decorator instrumenting every call of a sync or async function as a stage."""
+    def decorator(func: Callable) -> Callable:
+        if not METRICS_ENABLED and _tracer is None:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _StageSpan(stage, None):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _StageSpan(stage, None):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
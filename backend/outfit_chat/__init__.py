@@ -0,0 +1,11 @@
+"""
+Outfit Chat Package
+Chat completions for outfit and fashion advice.
+"""
+
+from outfit_chat.service import complete_chat, stream_chat, build_messages, get_chat_client, lookup_cached_chat, store_cached_chat, compact_session, ChatNotConfiguredError
+from outfit_chat.cache import chat_response_cache
+from outfit_chat.context import build_wardrobe_context, resolve_item_references
+from outfit_chat.sessions import get_session, open_session, append_messages, delete_session, ChatSessionNotFoundError
+
+__all__ = ['complete_chat', 'stream_chat', 'build_messages', 'get_chat_client', 'lookup_cached_chat', 'store_cached_chat', 'compact_session', 'get_session', 'open_session', 'append_messages', 'delete_session', 'chat_response_cache', 'build_wardrobe_context', 'resolve_item_references', 'ChatNotConfiguredError', 'ChatSessionNotFoundError']
@@ -0,0 +1,191 @@
+"""
+Chat Response Cache
+In-process cache of chat responses for repeated and near-identical messages.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2000"))
+# Requests sampled above this temperature want variety, so they are never cached
+CHAT_CACHE_MAX_TEMPERATURE = float(os.getenv("CHAT_CACHE_MAX_TEMPERATURE", "0.8"))
+# Near-duplicate lookup through embeddings; costs one embedding call per cache miss
+CHAT_CACHE_EMBEDDINGS_ENABLED = os.getenv("CHAT_CACHE_EMBEDDINGS_ENABLED", "false").lower() in ("1", "true", "yes")
+CHAT_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("CHAT_CACHE_SIMILARITY_THRESHOLD", "0.92"))
+
+OUTCOME_METRICS = {"exact_hit": "exact_hits", "semantic_hit": "semantic_hits", "miss": "misses", "bypassed": "bypassed"}
+
+# Context keys that make a response specific to one user's wardrobe
+WARDROBE_CONTEXT_KEYS = {"wardrobe", "wardrobe_id", "items", "item_ids", "outfits", "outfit_ids", "image_urls", "user_id"}
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase a message and strip punctuation and extra whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", message.lower()).split())
+
+
+def context_hash(context: Optional[Dict[str, Any]]) -> str:
+    """Hash a request context independently of key order."""
+    if not context:
+        return ""
+    return hashlib.sha1(json.dumps(context, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _has_wardrobe_data(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(key in WARDROBE_CONTEXT_KEYS or _has_wardrobe_data(item) for key, item in value.items())
+    if isinstance(value, list):
+        return any(_has_wardrobe_data(item) for item in value)
+    return False
+
+
+class ChatResponseCache:
+    """
+    Thread-safe TTL cache with LRU eviction for chat responses.
+
+    Entries are keyed by the normalized message and a hash of the context.
+    With embeddings enabled, a miss on the exact key falls back to the most
+    similar cached message with the same context, if it is similar enough.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = CHAT_CACHE_TTL_SECONDS,
+        max_entries: int = CHAT_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = CHAT_CACHE_SIMILARITY_THRESHOLD
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        # key -> (expires_at, response, embedding or None)
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "bypassed": 0, "hit_seconds": 0.0, "miss_seconds": 0.0}
+
+    def is_cacheable(self, temperature: Optional[float], context: Optional[Dict[str, Any]]) -> bool:
+        """
+        Check whether a request may be answered from, and stored in, the cache.
+
+        Args:
+            temperature: The requested sampling temperature, or None for the default.
+            context: The request context.
+
+        Returns:
+            False for high temperatures and contexts with wardrobe-specific data.
+        """
+        if self.ttl_seconds <= 0:
+            return False
+        if temperature is not None and temperature > CHAT_CACHE_MAX_TEMPERATURE:
+            return False
+        return not _has_wardrobe_data(context)
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        """
+        Return the cached response for key, or None if missing or expired.
+
+        Args:
+            key: (context hash, normalized message).
+
+        Returns:
+            The cached response, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def get_similar(self, key: Tuple[str, str], embedding: np.ndarray) -> Optional[str]:
+        """
+        Return the response of the most similar cached message with the same context.
+
+        Args:
+            key: (context hash, normalized message).
+            embedding: Unit-length embedding of the message.
+
+        Returns:
+            The cached response if its similarity reaches the threshold, None otherwise.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (candidate_key, entry)
+                for candidate_key, entry in self._entries.items()
+                if candidate_key[0] == key[0] and entry[2] is not None and entry[0] >= now
+            ]
+            if not candidates:
+                return None
+            similarities = np.stack([entry[2] for _, entry in candidates]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            self._entries.move_to_end(candidates[best][0])
+            return candidates[best][1][1]
+
+    def set(self, key: Tuple[str, str], response: str, embedding: Optional[np.ndarray] = None) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: (context hash, normalized message).
+            response: The response text.
+            embedding: Unit-length embedding of the message, if computed.
+        """
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, outcome: str, seconds: float = 0.0) -> None:
+        """
+        Record the outcome of a request for the metrics.
+
+        Args:
+            outcome: exact_hit, semantic_hit, miss or bypassed.
+            seconds: How long the response took to produce.
+        """
+        with self._lock:
+            self.metrics[OUTCOME_METRICS[outcome]] += 1
+            if outcome == "miss":
+                self.metrics["miss_seconds"] += seconds
+            elif outcome != "bypassed":
+                self.metrics["hit_seconds"] += seconds
+
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Return a snapshot of hit counts, hit rate and average latencies."""
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["entries"] = len(self._entries)
+        hits = metrics["exact_hits"] + metrics["semantic_hits"]
+        lookups = hits + metrics["misses"]
+        metrics["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        metrics["avg_hit_ms"] = round(metrics["hit_seconds"] / hits * 1000, 3) if hits else 0.0
+        metrics["avg_miss_ms"] = round(metrics["miss_seconds"] / metrics["misses"] * 1000, 3) if metrics["misses"] else 0.0
+        return metrics
+
+
+chat_response_cache = ChatResponseCache()
@@ -0,0 +1,196 @@
+"""
+Wardrobe Context
+Retrieves the wardrobe items relevant to a chat message and packs them into
+a compact, token-budgeted prompt section.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Number of items considered for the prompt
+CHAT_CONTEXT_TOP_K = int(os.getenv("CHAT_CONTEXT_TOP_K", "12"))
+# Upper bound on the (estimated) tokens spent on the wardrobe section
+CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv("CHAT_CONTEXT_TOKEN_BUDGET", "300"))
+
+# Short codes for tag keys; unknown keys fall back to their first three letters
+TAG_KEY_CODES = {
+    "category": "c",
+    "color": "col",
+    "season": "s",
+    "material": "m",
+    "pattern": "p",
+    "occasion": "o",
+    "neckline": "nk",
+    "sleeveLength": "sl",
+    "topLength": "tl",
+    "fit": "f",
+    "length": "len",
+    "rise": "r",
+    "thickness": "th",
+    "usageType": "u",
+    "attributes": "a",
+}
+# Tags that carry no information for the model
+_SKIPPED_TAG_KEYS = {"categoryGroup"}
+_SKIPPED_TAG_VALUES = {"", "etc"}
+
+ITEM_REFERENCE_PATTERN = re.compile(r"\[(i\d+)\]")
+
+WARDROBE_INSTRUCTIONS = (
+    "The user's wardrobe items relevant to this message follow, one per line as "
+    "'id tag=value ...' (c=category col=color s=season m=material p=pattern o=occasion). "
+    "Recommend items from this list where possible and cite each recommended item by its id "
+    "in square brackets, e.g. [i2]."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of model tokens in a text (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def _terms(text: str) -> set:
+    """Split text into lowercase word terms, splitting camelCase and dropping plural s."""
+    words = re.findall(r"[a-z0-9]+", re.sub(r"([a-z])([A-Z])", r"\1 \2", text).lower())
+    return {word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words}
+
+
+def _season_for_temperature(temperature: Optional[float]) -> Optional[str]:
+    if temperature is None:
+        return None
+    if temperature < 8:
+        return "winter"
+    if temperature < 16:
+        return "fall"
+    if temperature < 24:
+        return "spring"
+    return "summer"
+
+
+def retrieve_items(
+    items: List[Dict[str, Any]],
+    message: str,
+    weather: Optional[Dict[str, Any]] = None,
+    k: int = CHAT_CONTEXT_TOP_K
+) -> List[Dict[str, Any]]:
+    """
+    Select the wardrobe items most relevant to a message.
+
+    Items score one point per message term found in their tags and half a
+    point if their season suits today's temperature. Ties keep wardrobe
+    order, and the selection alternates category groups so that a short
+    list still covers complete outfits.
+
+    Args:
+        items: Wardrobe item documents with item_id, image_url and tags.
+        message: The user's message.
+        weather: Today's weather with temp_c, if known.
+        k: Maximum number of items to return.
+
+    Returns:
+        Up to k items, most relevant first.
+    """
+    message_terms = _terms(message)
+    season = _season_for_temperature((weather or {}).get("temp_c"))
+
+    scored = []
+    for index, item in enumerate(items):
+        tags = item.get("tags") or {}
+        tag_terms = _terms(" ".join(str(value) for value in tags.values()))
+        score = len(message_terms & tag_terms)
+        if season and str(tags.get("season", "")).lower() == season:
+            score += 0.5
+        scored.append((-score, index, item))
+    scored.sort(key=lambda entry: entry[:2])
+
+    # Round-robin over category groups in order of each group's best item
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for _, _, item in scored:
+        groups.setdefault((item.get("tags") or {}).get("categoryGroup", ""), []).append(item)
+    selected = []
+    queues = list(groups.values())
+    while len(selected) < k and queues:
+        for queue in queues:
+            if queue and len(selected) < k:
+                selected.append(queue.pop(0))
+        queues = [queue for queue in queues if queue]
+    return selected
+
+
+def _pack_item(short_id: str, item: Dict[str, Any]) -> str:
+    parts = [short_id]
+    for key, value in (item.get("tags") or {}).items():
+        value = str(value).strip()
+        if key in _SKIPPED_TAG_KEYS or value.lower() in _SKIPPED_TAG_VALUES:
+            continue
+        parts.append(f"{TAG_KEY_CODES.get(key, key[:3].lower())}={value.replace(' ', '')}")
+    return " ".join(parts)
+
+
+def build_wardrobe_context(
+    items: List[Dict[str, Any]],
+    message: str,
+    weather: Optional[Dict[str, Any]] = None,
+    token_budget: int = CHAT_CONTEXT_TOKEN_BUDGET,
+    k: int = CHAT_CONTEXT_TOP_K
+) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+    """
+    Build the wardrobe section of the prompt.
+
+    Args:
+        items: Wardrobe item documents with item_id, image_url and tags.
+        message: The user's message.
+        weather: Today's weather with temp_c and condition_text, if known.
+        token_budget: Maximum estimated tokens for the section.
+        k: Maximum number of items to include.
+
+    Returns:
+        Tuple of (prompt text, or "" for an empty wardrobe; short item ID -> item document)
+    """
+    lines = [WARDROBE_INSTRUCTIONS]
+    if weather and weather.get("temp_c") is not None:
+        lines.append(f"Weather today: {weather['temp_c']}C {weather.get('condition_text') or ''}".rstrip())
+
+    used = estimate_tokens("\n".join(lines))
+    item_map = {}
+    for item in retrieve_items(items, message, weather, k):
+        short_id = f"i{len(item_map) + 1}"
+        line = _pack_item(short_id, item)
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        item_map[short_id] = item
+        used += cost
+
+    if not item_map:
+        return "", {}
+    return "\n".join(lines), item_map
+
+
+def resolve_item_references(response: str, item_map: Dict[str, Dict[str, Any]]) -> Tuple[str, Optional[List[str]]]:
+    """
+    Replace item references in a response and collect the referenced images.
+
+    Args:
+        response: The model response, citing items as [i2].
+        item_map: Short item ID -> item document, from build_wardrobe_context.
+
+    Returns:
+        Tuple of (response without the references; image URLs of the
+        referenced items in order of first mention, or None if there are none)
+    """
+    image_urls = []
+    for short_id in ITEM_REFERENCE_PATTERN.findall(response):
+        image_url = (item_map.get(short_id) or {}).get("image_url")
+        if image_url and image_url not in image_urls:
+            image_urls.append(image_url)
+
+    text = ITEM_REFERENCE_PATTERN.sub("", response)
+    text = re.sub(r"[ \t]+([.,;:!?)])", r"\1", re.sub(r"[ \t]{2,}", " ", text))
+    return text.strip(), image_urls or None
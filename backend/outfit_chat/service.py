@@ -0,0 +1,302 @@
+"""
+Outfit Chat Service
+Handles chat completions with OpenAI for outfit and fashion advice.
+"""
+
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+import openai
+from dotenv import load_dotenv
+
+from outfit_chat.cache import chat_response_cache, normalize_message, context_hash, CHAT_CACHE_EMBEDDINGS_ENABLED
+from outfit_chat.sessions import needs_summary, replace_with_summary, CHAT_HISTORY_KEEP_MESSAGES
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-3.5-turbo")
+CHAT_MAX_TOKENS = int(os.getenv("CHAT_MAX_TOKENS", "500"))
+CHAT_DEFAULT_TEMPERATURE = 0.7
+CHAT_EMBEDDING_MODEL = os.getenv("CHAT_EMBEDDING_MODEL", "text-embedding-3-small")
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "200"))
+# Point the client at another OpenAI-compatible server (e.g. benchmarks/fake_openai.py)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+SYSTEM_PROMPT = """
+You are a fashion stylist and outfit advisor. Help users with:
+- Outfit suggestions and combinations
+- Fashion advice and trends
+- Clothing recommendations based on occasions
+- Color coordination and style tips
+- Wardrobe organization and planning
+
+Be helpful, creative, and provide practical fashion advice.
+Keep responses conversational but informative.
+"""
+
+
+SUMMARY_PROMPT = """
+Summarize the conversation between a user and their fashion stylist so far,
+in at most five sentences. Keep the user's preferences, constraints, occasions
+and the items or outfits discussed; drop greetings and small talk.
+"""
+
+
+class ChatNotConfiguredError(RuntimeError):
+    """Raised when no OpenAI API key is configured."""
+
+
+_client: Optional[openai.AsyncOpenAI] = None
+
+
+def get_chat_client() -> openai.AsyncOpenAI:
+    """
+    Return the shared async OpenAI client.
+    The client is created once so its connection pool is reused across requests.
+
+    Raises:
+        ChatNotConfiguredError: If OPENAI_API_KEY is not set.
+    """
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ChatNotConfiguredError("OpenAI API key not configured")
+        _client = openai.AsyncOpenAI(api_key=api_key, base_url=OPENAI_BASE_URL)
+    return _client
+
+
+def build_messages(
+    message: str,
+    context: Optional[Dict[str, Any]] = None,
+    wardrobe_context: str = "",
+    history: Optional[List[Dict[str, str]]] = None,
+    summary: str = ""
+) -> List[Dict[str, str]]:
+    """
+    Build the messages sent to the model.
+
+    Messages are ordered from most to least stable - system prompt, session
+    summary, earlier turns, then per-message context - so that consecutive
+    turns share the longest possible prompt prefix and the provider can
+    serve it from its prompt cache.
+
+    Args:
+        message: The user's message.
+        context: Optional additional context supplied by the client.
+        wardrobe_context: The packed wardrobe section (see build_wardrobe_context), if any.
+        history: Earlier messages of the session, oldest first.
+        summary: Summary of the session's messages older than history.
+
+    Returns:
+        List of chat messages.
+    """
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+
+    if summary:
+        messages.append({"role": "system", "content": f"Summary of the conversation so far: {summary}"})
+    messages.extend({"role": turn["role"], "content": turn["content"]} for turn in history or [])
+
+    if wardrobe_context:
+        messages.append({"role": "system", "content": wardrobe_context})
+
+    # Add context if provided
+    if context:
+        messages.append({"role": "system", "content": f"Additional context: {context}"})
+
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+async def complete_chat(
+    message: str,
+    temperature: Optional[float] = None,
+    context: Optional[Dict[str, Any]] = None,
+    wardrobe_context: str = "",
+    history: Optional[List[Dict[str, str]]] = None,
+    summary: str = ""
+) -> str:
+    """
+    Get a complete chat response.
+
+    Args:
+        message: The user's message.
+        temperature: Sampling temperature, or None for the default.
+        context: Optional additional context supplied by the client.
+        wardrobe_context: The packed wardrobe section, if any.
+        history: Earlier messages of the session, oldest first.
+        summary: Summary of the session's older messages.
+
+    Returns:
+        The response text.
+    """
+    response = await get_chat_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=build_messages(message, context, wardrobe_context, history, summary),
+        max_tokens=CHAT_MAX_TOKENS,
+        temperature=temperature or CHAT_DEFAULT_TEMPERATURE,
+    )
+    return response.choices[0].message.content.strip()
+
+
+async def stream_chat(
+    message: str,
+    temperature: Optional[float] = None,
+    context: Optional[Dict[str, Any]] = None,
+    wardrobe_context: str = "",
+    history: Optional[List[Dict[str, str]]] = None,
+    summary: str = ""
+) -> AsyncIterator[str]:
+    """
+    Stream a chat response as text deltas, as soon as the model produces them.
+
+    Closing the iterator (e.g. when the HTTP client disconnects) closes the
+    upstream stream, so OpenAI stops generating tokens nobody will read.
+
+    Args:
+        message: The user's message.
+        temperature: Sampling temperature, or None for the default.
+        context: Optional additional context supplied by the client.
+        wardrobe_context: The packed wardrobe section, if any.
+        history: Earlier messages of the session, oldest first.
+        summary: Summary of the session's older messages.
+
+    Yields:
+        Pieces of the response text.
+    """
+    stream = await get_chat_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=build_messages(message, context, wardrobe_context, history, summary),
+        max_tokens=CHAT_MAX_TOKENS,
+        temperature=temperature or CHAT_DEFAULT_TEMPERATURE,
+        stream=True,
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+
+
+async def get_embedding(text: str) -> np.ndarray:
+    """
+    Embed a text with the embedding model.
+
+    Returns:
+        The unit-length embedding vector.
+    """
+    response = await get_chat_client().embeddings.create(model=CHAT_EMBEDDING_MODEL, input=text)
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+
+async def lookup_cached_chat(
+    message: str,
+    temperature: Optional[float] = None,
+    context: Optional[Dict[str, Any]] = None
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Look up a cached response for a chat request.
+
+    Args:
+        message: The user's message.
+        temperature: Sampling temperature, or None for the default.
+        context: Optional additional context supplied by the client.
+
+    Returns:
+        Tuple of (cached response or None, cache slot). On a miss, pass the
+        slot and the generated response to store_cached_chat. The slot is
+        None when the request must not be cached.
+    """
+    started = time.perf_counter()
+    if not chat_response_cache.is_cacheable(temperature, context):
+        chat_response_cache.record("bypassed")
+        return None, None
+
+    key = (context_hash(context), normalize_message(message))
+    response = chat_response_cache.get(key)
+    if response is not None:
+        chat_response_cache.record("exact_hit", time.perf_counter() - started)
+        return response, None
+
+    embedding = None
+    if CHAT_CACHE_EMBEDDINGS_ENABLED:
+        try:
+            embedding = await get_embedding(key[1])
+        except openai.OpenAIError as e:
+            logger.warning("Failed to embed chat message: %s", e)
+        if embedding is not None:
+            response = chat_response_cache.get_similar(key, embedding)
+            if response is not None:
+                chat_response_cache.record("semantic_hit", time.perf_counter() - started)
+                return response, None
+
+    return None, {"key": key, "embedding": embedding, "started": started}
+
+
+def store_cached_chat(slot: Optional[Dict[str, Any]], response: str) -> None:
+    """
+    Store a generated response for a request that missed the cache.
+
+    Args:
+        slot: The cache slot returned by lookup_cached_chat (None does nothing).
+        response: The full generated response.
+    """
+    if slot is None:
+        return
+    chat_response_cache.record("miss", time.perf_counter() - slot["started"])
+    if response:
+        chat_response_cache.set(slot["key"], response, slot["embedding"])
+
+
+async def summarize_history(summary: str, messages: List[Dict[str, str]]) -> str:
+    """
+    Fold messages into a conversation summary.
+
+    Args:
+        summary: The current summary, if any.
+        messages: The messages to fold in, oldest first.
+
+    Returns:
+        The new summary.
+    """
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    if summary:
+        transcript = f"Earlier summary: {summary}\n{transcript}"
+    response = await get_chat_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": transcript}
+        ],
+        max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+        temperature=0.2,
+    )
+    return response.choices[0].message.content.strip()
+
+
+async def compact_session(session_id: str, user_id: str, summary: str, messages: List[Dict[str, str]]) -> None:
+    """
+    Summarize the oldest messages of a session if its history exceeds the token budget.
+
+    Args:
+        session_id: The session ID.
+        user_id: The user the session belongs to.
+        summary: The session's current summary.
+        messages: All messages of the session, oldest first, as currently stored.
+    """
+    if not needs_summary(summary, messages):
+        return
+    summarized = len(messages) - CHAT_HISTORY_KEEP_MESSAGES
+    try:
+        new_summary = await summarize_history(summary, messages[:summarized])
+    except openai.OpenAIError as e:
+        logger.warning("Failed to summarize chat session %s: %s", session_id, e)
+        return
+    replace_with_summary(session_id, user_id, new_summary, summarized, len(messages))
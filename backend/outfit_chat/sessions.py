@@ -0,0 +1,149 @@
+"""
+Chat Sessions
+Server-side multi-turn chat history, stored per user in MongoDB with a TTL
+index, and kept within a token budget by summarizing the oldest turns.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError
+from dotenv import load_dotenv
+
+from mongodb_uploader.uploader import database
+from outfit_chat.context import estimate_tokens
+
+load_dotenv()
+
+CHAT_SESSIONS_COLLECTION_NAME = "chat_sessions"
+# Sessions expire this long after their last turn
+CHAT_SESSION_TTL_HOURS = float(os.getenv("CHAT_SESSION_TTL_HOURS", "24"))
+# Summary plus turns above this many (estimated) tokens get summarized
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "800"))
+# Most recent messages always kept verbatim
+CHAT_HISTORY_KEEP_MESSAGES = int(os.getenv("CHAT_HISTORY_KEEP_MESSAGES", "4"))
+
+chat_sessions_collection: Collection = database[CHAT_SESSIONS_COLLECTION_NAME]
+
+try:
+    chat_sessions_collection.create_index("expires_at", expireAfterSeconds=0)
+    chat_sessions_collection.create_index("user_id")
+except Exception:
+    pass  # Indexes might already exist
+
+
+class ChatSessionNotFoundError(LookupError):
+    """Raised when a session ID is taken by another user's session."""
+
+
+def get_session(session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve a chat session of a user.
+
+    Args:
+        session_id: The session ID.
+        user_id: The user the session must belong to.
+
+    Returns:
+        The session document (summary, messages, message_count) if found, None otherwise.
+    """
+    return chat_sessions_collection.find_one({"_id": session_id, "user_id": user_id})
+
+
+def open_session(session_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve the session a turn continues, checking that the user may use the ID.
+
+    Args:
+        session_id: The session ID sent by the client.
+        user_id: The user continuing the session.
+
+    Returns:
+        The session document, or None for an unknown or expired session,
+        which the turn starts under this ID.
+
+    Raises:
+        ChatSessionNotFoundError: If the ID belongs to another user's session.
+    """
+    session = chat_sessions_collection.find_one({"_id": session_id})
+    if session and session.get("user_id") != user_id:
+        raise ChatSessionNotFoundError("Chat session not found")
+    return session
+
+
+def append_messages(session_id: str, user_id: str, messages: List[Dict[str, str]]) -> None:
+    """
+    Append messages to a session, creating it if needed, and extend its expiry.
+
+    Args:
+        session_id: The session ID.
+        user_id: The user the session belongs to.
+        messages: Chat messages with role and content.
+
+    Raises:
+        ChatSessionNotFoundError: If another user's session has this ID, e.g.
+            because it was created since open_session.
+    """
+    now = datetime.now(timezone.utc)
+    try:
+        chat_sessions_collection.update_one(
+            {"_id": session_id, "user_id": user_id},
+            {
+                "$push": {"messages": {"$each": messages}},
+                "$inc": {"message_count": len(messages)},
+                "$set": {"expires_at": now + timedelta(hours=CHAT_SESSION_TTL_HOURS)},
+                "$setOnInsert": {"created_at": now, "summary": ""},
+            },
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The filter missed because the _id is taken by another user's session
+        raise ChatSessionNotFoundError("Chat session not found")
+
+
+def delete_session(session_id: str, user_id: str) -> int:
+    """
+    Delete a chat session of a user.
+
+    Returns:
+        The number of sessions deleted (0 or 1).
+    """
+    return chat_sessions_collection.delete_one({"_id": session_id, "user_id": user_id}).deleted_count
+
+
+def needs_summary(summary: str, messages: List[Dict[str, str]]) -> bool:
+    """Check whether a history exceeds the token budget and has messages old enough to summarize."""
+    if len(messages) <= CHAT_HISTORY_KEEP_MESSAGES:
+        return False
+    tokens = estimate_tokens(summary) + sum(estimate_tokens(message["content"]) + 4 for message in messages)
+    return tokens > CHAT_HISTORY_TOKEN_BUDGET
+
+
+def replace_with_summary(session_id: str, user_id: str, summary: str, summarized: int, message_count: int) -> bool:
+    """
+    Replace the oldest messages of a session with a summary.
+
+    The update only applies if no messages were appended since the session
+    was read, so concurrent turns are never lost; the next turn retries.
+
+    Args:
+        session_id: The session ID.
+        user_id: The user the session belongs to.
+        summary: The new summary, covering the old summary and the summarized messages.
+        summarized: Number of oldest messages the summary replaces.
+        message_count: The session's message_count when it was read.
+
+    Returns:
+        True if the session was updated.
+    """
+    result = chat_sessions_collection.update_one(
+        {"_id": session_id, "user_id": user_id, "message_count": message_count},
+        {
+            "$set": {"summary": summary},
+            "$push": {"messages": {"$each": [], "$slice": -(message_count - summarized)}},
+            "$inc": {"message_count": -summarized},
+        }
+    )
+    return result.modified_count == 1
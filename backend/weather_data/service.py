@@ -4,18 +4,25 @@ Handles weather API integration with weatherapi.com
 Utility functions for internal use only.
 """
 
+import logging
 import os
 import httpx
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 
+from observability import traced
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Weather API configuration
-WEATHER_API_BASE_URL = "https://api.weatherapi.com/v1"
+# Point at another weatherapi.com-compatible server (e.g. benchmarks/fake_services.py)
+WEATHER_API_BASE_URL = os.getenv("WEATHER_API_BASE_URL", "https://api.weatherapi.com/v1")
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
 
 
+@traced("weather_forecast")
 async def get_weather_forecast(latitude: float, longitude: float, days: int = 3) -> Optional[Dict[str, Any]]:
     """
     Get weather forecast from weatherapi.com
@@ -70,13 +77,14 @@ async def get_weather_forecast(latitude: float, longitude: float, days: int = 3)
             }
 
     except httpx.HTTPError as e:
-        print(f"HTTP error while fetching weather data: {e}")
+        logger.warning("HTTP error while fetching weather data: %s", e)
         return None
     except Exception as e:
-        print(f"Error fetching weather data: {e}")
+        logger.exception("Error fetching weather data: %s", e)
         return None
 
 
+@traced("weather_today")
 async def get_today_weather(latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
     """
     Get today's current weather from weatherapi.com
@@ -124,10 +132,10 @@ async def get_today_weather(latitude: float, longitude: float) -> Optional[Dict[
             }
 
     except httpx.HTTPError as e:
-        print(f"HTTP error while fetching today's weather: {e}")
+        logger.warning("HTTP error while fetching today's weather: %s", e)
         return None
     except Exception as e:
-        print(f"Error fetching today's weather: {e}")
+        logger.exception("Error fetching today's weather: %s", e)
         return None
 
 
@@ -3,93 +3,485 @@ Weekly Planner Module
 Handles the business logic for generating weekly outfit plans with random selection and composite image creation.
 """
 
+import asyncio
+import logging
 import random
 import tempfile
 import os
-from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Iterable, List, Dict, Any, Optional, Tuple
+import numpy as np
+from PIL import Image
 from endpoints.weekly.models import DailyPlan
+from endpoints.outfit.models import LayoutManifest
 
-from image_composer import create_composite_image
+from image_composer import compose_tiles, load_cell_tile, build_layout_manifest, composite_source_url
 from cloudinary_uploader import upload_image
 from weather_data.service import get_weather_forecast
-from auth.user_db import get_user_location
 
+logger = logging.getLogger(__name__)
 
-async def generate_weekly_plan(outfits: List[Dict[str, Any]], user_id: str) -> Dict[str, DailyPlan]:
+# Number of days in a rolling plan, starting today
+PLAN_DAYS = int(os.getenv("PLAN_DAYS", "7"))
+# Forecast temperature change (in Celsius) that makes a planned day worth re-planning
+FORECAST_TEMP_CHANGE_THRESHOLD = float(os.getenv("FORECAST_TEMP_CHANGE_THRESHOLD", "3"))
+# How outfits are picked for new days: "rotation" selects across all days jointly,
+# favouring items worn least recently and mixing category groups; "random"
+# samples each day independently
+PLANNER_MODE = os.getenv("PLANNER_MODE", "rotation").lower()
+# Shared, bounded pool for image downloads, composition and uploads so that
+# concurrent plan requests can't spawn unbounded threads
+PLANNER_MAX_WORKERS = int(os.getenv("PLANNER_MAX_WORKERS", "8"))
+_planner_executor = ThreadPoolExecutor(max_workers=PLANNER_MAX_WORKERS, thread_name_prefix="planner")
+
+
+async def generate_weekly_plan(
+    outfits: List[Dict[str, Any]],
+    user_location: Optional[Dict[str, float]],
+    existing_plan: Optional[Dict[str, Any]] = None
+) -> Dict[str, DailyPlan]:
     """
-    Generate a weekly plan with random outfit selections, composite images, and weather data.
+    Generate a weekly plan with outfit selections, composite images, and weather data.
+    With an existing plan, only new or re-planned days get a new composite.
+
+    The weather forecast and the loading of the new days' tiles run
+    concurrently, every distinct image is turned into its tile once even if
+    it appears on several days, and all daily composites are built and
+    uploaded in parallel.
 
     Args:
         outfits: List of outfit dictionaries with outfit_id, wardrobe_id, image_url, tags
-        user_id: User ID to fetch location and weather data
+        user_location: Dict with latitude and longitude for weather data, or None
+        existing_plan: The currently stored weekly plan document, if any
 
     Returns:
-        Dictionary mapping day keys (day1, day2, etc.) to DailyPlan objects
+        Dictionary mapping day keys (ISO dates) to DailyPlan objects
+    """
+    wear_history = build_wear_history(existing_plan, outfits)
+    outfits_by_id = {outfit["outfit_id"]: outfit for outfit in outfits}
+    prefetches = []
+
+    def _prefetch_tiles(outfit_ids: List[str]):
+        # Load the tiles of the days selected before the forecast arrives while it is fetched
+        prefetches.append(asyncio.ensure_future(_load_tiles(_tile_urls(outfits_by_id[outfit_id] for outfit_id in outfit_ids))))
+
+    daily_plans = await plan_days(outfits, user_location, existing_plan, wear_history=wear_history, on_outfits_selected=_prefetch_tiles)
+    tiles = {}
+    for prefetch in prefetches:
+        tiles.update(await prefetch)
+
+    async def _set_image_url(day_key: str, image_url: Optional[str]):
+        daily_plans[day_key].image_url = image_url
+
+    await render_daily_composites(days_to_render(daily_plans), outfits, _set_image_url, tiles)
+    return daily_plans
+
+
+def diff_daily_plans(
+    existing_plan: Dict[str, Any],
+    daily_plans: Dict[str, DailyPlan]
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """
+    Compare freshly planned days with a stored plan.
+
+    Days are keyed by date, so when the plan rolls forward only the new
+    date is written and the past one removed; kept days are identical to
+    their stored value and are not written. Day keys of plans stored
+    before days were keyed by date are all replaced.
+
+    Args:
+        existing_plan: The currently stored weekly plan document
+        daily_plans: Dictionary mapping day keys to the new DailyPlan objects
+
+    Returns:
+        Tuple of (days whose stored value differs, keyed by day key;
+        day keys stored but no longer part of the plan)
+    """
+    existing_days = existing_plan.get("daily_plans", {})
+    changed_days = {}
+    for day_key, daily_plan in daily_plans.items():
+        day_doc = daily_plan.dict()
+        if existing_days.get(day_key) != day_doc:
+            changed_days[day_key] = day_doc
+    removed_day_keys = [day_key for day_key in existing_days if day_key not in daily_plans]
+    return changed_days, removed_day_keys
+
+
+def days_to_render(daily_plans: Dict[str, DailyPlan]) -> Dict[str, DailyPlan]:
+    """Return the days of a plan that have no composite image yet."""
+    return {day_key: daily_plan for day_key, daily_plan in daily_plans.items() if not daily_plan.image_url}
+
+
+async def plan_days(
+    outfits: List[Dict[str, Any]],
+    user_location: Optional[Dict[str, float]],
+    existing_plan: Optional[Dict[str, Any]] = None,
+    weather_data: Optional[Dict[str, Any]] = None,
+    wear_history: Optional[Dict[str, List]] = None,
+    on_outfits_selected: Optional[Callable[[List[str]], None]] = None
+) -> Dict[str, DailyPlan]:
+    """
+    Select outfits and attach weather for each day, without rendering composites.
+    This only waits for the weather forecast, so it is fast enough to answer
+    a request with while the composites are rendered afterwards. The outfits
+    of days that need new ones are selected while the forecast is fetched.
+
+    When an existing plan is given, the plan rolls forward: a day that was
+    already planned is kept as stored, including the forecast its outfits
+    were chosen for, unless its outfits are no longer in the wardrobe or the
+    latest forecast differs materially from that one. Only new or re-planned
+    days are left without an image_url.
+
+    Args:
+        outfits: List of outfit dictionaries with outfit_id, wardrobe_id, image_url, tags
+        user_location: Dict with latitude and longitude for weather data, or None
+        existing_plan: The currently stored weekly plan document, if any
+        weather_data: An already fetched forecast to use instead of fetching one for user_location
+        wear_history: The wardrobe's wear history before today (see build_wear_history), if any
+        on_outfits_selected: Called with the outfit IDs selected before the
+            forecast has arrived, e.g. to start loading their tiles
+
+    Returns:
+        Dictionary mapping day keys (ISO dates) to DailyPlan objects
+        with their composite_manifest; image_url is None for the days whose
+        composite must be rendered
     """
     if not outfits:
         raise ValueError("No outfits provided for weekly plan generation")
 
-    # Get user's location for weather data
-    user_location = get_user_location(user_id)
-    weather_data = None
-
-    if user_location:
-        # Get weather forecast for the user's location
-        weather_data = await get_weather_forecast(
-            latitude=user_location["latitude"],
-            longitude=user_location["longitude"],
-            days=3
-        )
+    # Days already planned, by date
+    existing_days = {}
+    if existing_plan:
+        existing_days = {day.get("date"): day for day in existing_plan.get("daily_plans", {}).values()}
+    wardrobe_outfit_ids = {outfit["outfit_id"] for outfit in outfits}
 
-    # Generate daily plans for the next 3 days
+    # Plan the next days
     now = datetime.now(timezone.utc)
     today = now.date()
-    daily_plans = {}
-
-    for i in range(3):
-        current_date = today + timedelta(days=i)
-        day_name = current_date.strftime("%A")  # Monday, Tuesday, etc.
+    day_keys = [(today + timedelta(days=i)).isoformat() for i in range(PLAN_DAYS)]
+    past_wear = _past_wear(wear_history, today)
 
-        # Select random outfits for the day (3-5 outfits)
-        num_outfits = min(random.randint(3, 5), len(outfits))
-        selected_outfits = random.sample(outfits, num_outfits)
+    # Stored days whose outfits all still exist are kept unless their forecast
+    # changed, which is only known once it arrives; the other days are
+    # selected while it is fetched
+    kept_days = {
+        day_key: existing_days[day_key] for day_key in day_keys
+        if day_key in existing_days and _outfits_exist(existing_days[day_key], wardrobe_outfit_ids)
+    }
+    forecast = asyncio.ensure_future(get_plan_forecast(user_location)) if weather_data is None else None
+    try:
+        selections = _select_days(
+            outfits,
+            [day_key for day_key in day_keys if day_key not in kept_days],
+            {day_key: day["outfit_ids"] for day_key, day in kept_days.items()},
+            past_wear
+        )
+        if on_outfits_selected and selections:
+            on_outfits_selected([outfit_id for outfit_ids in selections.values() for outfit_id in outfit_ids])
+        if forecast is not None:
+            weather_data = await forecast
+    finally:
+        if forecast is not None and not forecast.done():
+            forecast.cancel()
 
-        # Create composite image for the day
-        composite_image_url = _create_composite_image_for_outfits(selected_outfits)
+    # Get weather data for each day if available
+    forecast_days = (weather_data or {}).get("forecast") or []
+    day_weather = {
+        day_key: forecast_days[i] if len(forecast_days) > i else {}
+        for i, day_key in enumerate(day_keys)
+    }
 
-        # Get weather data for this day if available
-        temperature = None
-        condition = None
-        condition_icon = None
+    # Re-plan the kept days whose forecast changed materially
+    replanned_days = [
+        day_key for day_key, day in kept_days.items()
+        if not _forecast_unchanged(day, day_weather[day_key].get("avg_temp_c"), day_weather[day_key].get("condition_text"))
+    ]
+    for day_key in replanned_days:
+        del kept_days[day_key]
+    if replanned_days:
+        planned = {**{day_key: day["outfit_ids"] for day_key, day in kept_days.items()}, **selections}
+        selections.update(_select_days(outfits, replanned_days, planned, past_wear))
 
-        if weather_data and weather_data.get("forecast") and len(weather_data["forecast"]) > i:
-            day_weather = weather_data["forecast"][i]
-            temperature = day_weather.get("avg_temp_c")
-            condition = day_weather.get("condition_text")
-            condition_icon = day_weather.get("condition_icon")
+    daily_plans = {}
+    for day_key in day_keys:
+        if day_key in kept_days:
+            # Kept as stored, so gradual forecast drift adds up until the day is re-planned
+            daily_plans[day_key] = DailyPlan(**kept_days[day_key])
+            continue
 
-        # Create daily plan
-        day_key = f"day{i+1}"
         daily_plans[day_key] = DailyPlan(
-            date=current_date.isoformat(),
-            day=day_name,
-            image_url=composite_image_url,
-            outfit_ids=[outfit["outfit_id"] for outfit in selected_outfits],
-            temperature=temperature,
-            condition=condition,
-            condition_icon=condition_icon
+            date=day_key,
+            day=date.fromisoformat(day_key).strftime("%A"),  # Monday, Tuesday, etc.
+            image_url=None,
+            outfit_ids=selections[day_key],
+            temperature=day_weather[day_key].get("avg_temp_c"),
+            condition=day_weather[day_key].get("condition_text"),
+            condition_icon=day_weather[day_key].get("condition_icon")
         )
 
+    # Every day can be composed by the client, whether or not its composite is rendered
+    outfits_by_id = {outfit["outfit_id"]: outfit for outfit in outfits}
+    for daily_plan in daily_plans.values():
+        daily_plan.composite_manifest = LayoutManifest(**build_layout_manifest(
+            [outfits_by_id[outfit_id] for outfit_id in daily_plan.outfit_ids if outfit_id in outfits_by_id]
+        ))
+
     return daily_plans
 
 
-def _create_composite_image_for_outfits(outfits: List[Dict[str, Any]]) -> str:
+def _select_days(
+    outfits: List[Dict[str, Any]],
+    day_keys: List[str],
+    planned: Dict[str, List[str]],
+    past_wear: Dict[str, int]
+) -> Dict[str, List[str]]:
+    """
+    Select 3-5 outfits for each of the given days.
+
+    Args:
+        outfits: List of outfit dictionaries with outfit_id and tags
+        day_keys: The days to select outfits for, in date order
+        planned: Outfit IDs of the other planned days, by day key
+        past_wear: Date ordinal each outfit_id was last worn before today
+
+    Returns:
+        The selected outfit IDs, by day key
+    """
+    if not day_keys:
+        return {}
+    counts = [min(random.randint(3, 5), len(outfits)) for _ in day_keys]
+    if PLANNER_MODE == "rotation":
+        # Planned days count as worn on their date, so new days avoid their items
+        last_worn = dict(past_wear)
+        _mark_planned_days(last_worn, planned)
+        selections = select_rotation(outfits, last_worn, counts)
+    else:
+        selections = [[outfit["outfit_id"] for outfit in random.sample(outfits, count)] for count in counts]
+    return dict(zip(day_keys, selections))
+
+
+def select_rotation(
+    outfits: List[Dict[str, Any]],
+    last_worn: Dict[str, int],
+    counts: List[int],
+    rng: Optional[np.random.Generator] = None
+) -> List[List[str]]:
+    """
+    Select outfits for several consecutive days jointly, in one vectorized pass.
+
+    Items are ranked by when they were last worn (never worn first, ties
+    broken randomly), then interleaved across category groups so that the
+    stalest item of every group comes before the second stalest of any.
+    Days take consecutive runs of that order, so every item is used once
+    before any item repeats, and a day mixes category groups.
+
+    Args:
+        outfits: List of outfit dictionaries with outfit_id and tags
+        last_worn: Date ordinal each outfit_id was last worn or planned; missing means never
+        counts: Number of outfits to select for each day, in date order (each at most len(outfits))
+        rng: Random generator for tie-breaking
+
+    Returns:
+        The selected outfit IDs for each day
+    """
+    rng = rng or np.random.default_rng()
+    outfit_ids = np.array([outfit["outfit_id"] for outfit in outfits], dtype=object)
+    n = len(outfit_ids)
+
+    worn = np.array([last_worn.get(outfit_id, -1) for outfit_id in outfit_ids], dtype=np.int64)
+    _, groups = np.unique(
+        np.array([str((outfit.get("tags") or {}).get("categoryGroup", "")) for outfit in outfits]),
+        return_inverse=True
+    )
+
+    # Order by staleness, then rank every item within its category group
+    by_staleness = np.lexsort((rng.random(n), worn))
+    sorted_groups = groups[by_staleness]
+    group_order = np.argsort(sorted_groups, kind="stable")
+    group_sizes = np.bincount(sorted_groups)
+    group_rank = np.empty(n, dtype=np.int64)
+    group_rank[group_order] = np.arange(n) - np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes)
+    order = by_staleness[np.lexsort((np.arange(n), group_rank))]
+
+    # Deal consecutive runs to the days, wrapping around only once all items are used
+    counts = np.asarray(counts, dtype=np.int64)
+    picks = outfit_ids[order[np.arange(counts.sum()) % n]]
+    return [list(day_picks) for day_picks in np.split(picks, np.cumsum(counts)[:-1])]
+
+
+def _past_wear(wear_history: Optional[Dict[str, List]], today: date) -> Dict[str, int]:
+    """Return the wear history entries from before today as outfit_id -> date ordinal."""
+    if not wear_history:
+        return {}
+    cutoff = today.toordinal()
+    return {
+        outfit_id: ordinal
+        for outfit_id, ordinal in zip(wear_history.get("item_ids", []), wear_history.get("last_worn", []))
+        if ordinal < cutoff
+    }
+
+
+def _mark_planned_days(last_worn: Dict[str, int], planned: Dict[str, List[str]]) -> None:
+    """Record the outfits of planned days (outfit IDs by ISO date) as worn on their date."""
+    for day_date, outfit_ids in planned.items():
+        ordinal = date.fromisoformat(day_date).toordinal()
+        for outfit_id in outfit_ids:
+            last_worn[outfit_id] = max(last_worn.get(outfit_id, ordinal), ordinal)
+
+
+def build_wear_history(
+    stored_plan: Optional[Dict[str, Any]],
+    outfits: List[Dict[str, Any]]
+) -> Dict[str, List]:
+    """
+    Build the wear history to plan with and to store with the new plan.
+
+    The history holds, for every outfit in the wardrobe that was planned for
+    a day before today, the ordinal of the last such date, as two parallel
+    arrays. It combines the stored history with the stored plan's days that
+    have passed. Days from today on are left out: they are not worn yet, and
+    the days of the plan being built count as worn while it is selected.
+    Outfits no longer in the wardrobe are dropped.
+
+    Args:
+        stored_plan: The currently stored weekly plan document, if any, even when regenerating
+        outfits: List of outfit dictionaries currently in the wardrobe
+
+    Returns:
+        Dict with item_ids (list of outfit IDs) and last_worn (list of date ordinals)
+    """
+    today = datetime.now(timezone.utc).date()
+    last_worn = _past_wear(stored_plan.get("wear_history") if stored_plan else None, today)
+    past_days = {
+        day["date"]: day.get("outfit_ids", [])
+        for day in (stored_plan or {}).get("daily_plans", {}).values()
+        if day.get("date") and date.fromisoformat(day["date"]) < today
+    }
+    _mark_planned_days(last_worn, past_days)
+
+    wardrobe_outfit_ids = {outfit["outfit_id"] for outfit in outfits}
+    item_ids = [outfit_id for outfit_id in last_worn if outfit_id in wardrobe_outfit_ids]
+    return {"item_ids": item_ids, "last_worn": [last_worn[outfit_id] for outfit_id in item_ids]}
+
+
+def _outfits_exist(previous_day: Dict[str, Any], wardrobe_outfit_ids: set) -> bool:
+    """Check whether a previously planned day has outfits and all of them are still in the wardrobe."""
+    outfit_ids = previous_day.get("outfit_ids") or []
+    return bool(outfit_ids) and wardrobe_outfit_ids.issuperset(outfit_ids)
+
+
+def _forecast_unchanged(
+    previous_day: Dict[str, Any],
+    temperature: Optional[float],
+    condition: Optional[str]
+) -> bool:
+    """
+    Check whether the latest forecast for a previously planned day is close
+    enough to the forecast its outfits were chosen for to keep them.
+
+    Args:
+        previous_day: The stored daily plan for the same date, with the
+            forecast its outfits were chosen for
+        temperature: The latest forecast average temperature for the date
+        condition: The latest forecast condition text for the date
+
+    Returns:
+        True if the latest forecast does not differ materially
+    """
+    previous_temperature = previous_day.get("temperature")
+    if (previous_temperature is None) != (temperature is None):
+        return False
+    if temperature is not None and abs(temperature - previous_temperature) >= FORECAST_TEMP_CHANGE_THRESHOLD:
+        return False
+
+    return (previous_day.get("condition") or "").lower() == (condition or "").lower()
+
+
+async def render_daily_composites(
+    daily_plans: Dict[str, DailyPlan],
+    outfits: List[Dict[str, Any]],
+    on_day_ready: Callable[[str, Optional[str]], Awaitable[None]],
+    tiles: Optional[Dict[str, Image.Image]] = None
+) -> None:
+    """
+    Build and upload the composite image of every day concurrently.
+
+    Every distinct image is turned into its grid cell tile once even if it
+    appears on several days, and only downloaded if no tile is cached. on_day_ready is awaited for each day as soon as its composite is
+    uploaded (with None if it could not be created), in completion order.
+
+    Args:
+        daily_plans: Dictionary mapping day keys to DailyPlan objects
+        outfits: List of outfit dictionaries the plans were selected from
+        on_day_ready: Coroutine function called with (day_key, image_url)
+        tiles: Tiles already loaded, by image URL; only the others are loaded
+    """
+    outfits_by_id = {outfit["outfit_id"]: outfit for outfit in outfits}
+    daily_selections = {
+        day_key: [outfits_by_id[outfit_id] for outfit_id in daily_plan.outfit_ids if outfit_id in outfits_by_id]
+        for day_key, daily_plan in daily_plans.items()
+    }
+
+    tiles = dict(tiles or {})
+    image_urls = _tile_urls(outfit for selection in daily_selections.values() for outfit in selection)
+    tiles.update(await _load_tiles([url for url in image_urls if url not in tiles]))
+
+    async def _render_day(day_key: str, selection: List[Dict[str, Any]]):
+        image_url = await _run_in_planner_pool(_create_composite_image_for_outfits, selection, tiles)
+        await on_day_ready(day_key, image_url)
+
+    await asyncio.gather(*(_render_day(day_key, selection) for day_key, selection in daily_selections.items()))
+
+
+async def _run_in_planner_pool(func, *args):
+    """Run a blocking function on the shared planner pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_planner_executor, func, *args)
+
+
+async def get_plan_forecast(user_location: Optional[Dict[str, float]]) -> Optional[Dict[str, Any]]:
+    """Get the weather forecast for the plan, or None without a location."""
+    if not user_location:
+        return None
+    return await get_weather_forecast(
+        latitude=user_location["latitude"],
+        longitude=user_location["longitude"],
+        days=PLAN_DAYS
+    )
+
+
+def _tile_urls(outfits: Iterable[Dict[str, Any]]) -> List[str]:
+    """The distinct image URLs the tiles of outfits are looked up by."""
+    return list(dict.fromkeys(composite_source_url(outfit) for outfit in outfits if outfit.get("image_url")))
+
+
+async def _load_tiles(image_urls: List[str]) -> Dict[str, Image.Image]:
+    """
+    Load the grid cell tiles of images concurrently on the planner pool,
+    downloading and rendering those not cached yet.
+
+    Returns:
+        Dictionary mapping each URL with a tile to its tile
+    """
+    async def _load(url: str):
+        try:
+            return url, await _run_in_planner_pool(load_cell_tile, url)
+        except Exception as e:
+            logger.warning("Failed to load tile of image %s: %s", url, e)
+            return url, None
+
+    results = await asyncio.gather(*(_load(url) for url in image_urls))
+    return {url: tile for url, tile in results if tile is not None}
+
+
+def _create_composite_image_for_outfits(outfits: List[Dict[str, Any]], tiles: Dict[str, Image.Image]) -> str:
     """
-    Create a composite image from outfit image URLs.
+    Create a composite image from the outfit images' cell tiles.
 
     Args:
         outfits: List of outfit dictionaries
+        tiles: Dictionary mapping image URLs to their cell tiles
 
     Returns:
         URL of the uploaded composite image, or None if creation failed
@@ -97,10 +489,13 @@ def _create_composite_image_for_outfits(outfits: List[Dict[str, Any]]) -> str:
     composite_image_url = None
 
     try:
-        image_urls = [outfit["image_url"] for outfit in outfits if outfit.get("image_url")]
+        outfit_tiles = [
+            tiles[composite_source_url(outfit)] for outfit in outfits
+            if outfit.get("image_url") and composite_source_url(outfit) in tiles
+        ]
 
-        if image_urls:
-            composite_image = create_composite_image(image_urls, layout="grid")
+        if outfit_tiles:
+            composite_image = compose_tiles(outfit_tiles)
 
             temp_file_path = None
             try:
@@ -116,7 +511,7 @@ def _create_composite_image_for_outfits(outfits: List[Dict[str, Any]]) -> str:
                     except Exception:
                         pass
     except Exception as e:
-        print(f"Warning: Failed to create composite image: {str(e)}")
+        logger.exception("Failed to create composite image: %s", e)
         composite_image_url = None
 
     return composite_image_url
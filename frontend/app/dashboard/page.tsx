@@ -16,15 +16,18 @@ import { useOutfits } from '@/components/dashboard/hooks/useOutfits';
 import { useSuggestions } from '@/components/dashboard/hooks/useSuggestions';
 import { useWeekPlanning } from '@/components/dashboard/hooks/useWeekPlanning';
 import { useModals } from '@/components/dashboard/hooks/useModals';
-import { outfitChat } from '@/lib/api';
+import { streamOutfitChat } from '@/lib/api';
+
+type ChatMessage = { role: 'user' | 'ai'; content: string; image_urls?: string[] };
 
 export default function DashboardPage() {
   const [activeSection, setActiveSection] = useState('today');
   const [temperature] = useState<number>(0); // Default static temperature in Celsius
-  const [chatMessages, setChatMessages] = useState<Array<{ role: 'user' | 'ai'; content: string; image_urls?: string[] }>>([
+  const [chatMessages, setChatMessages] = useState<ChatMessage[]>([
     { role: 'ai', content: "Hi! I'm your Style AI assistant. Ask me anything about styling, outfit suggestions, or fashion advice!" }
   ]);
   const [chatInput, setChatInput] = useState('');
+  const [chatSessionId, setChatSessionId] = useState<string | undefined>();
   const fileInputRef = useRef<HTMLInputElement>(null);
   const [editedTags, setEditedTags] = useState<Record<string, any>>({});
   const [originalTags, setOriginalTags] = useState<Record<string, any>>({});
@@ -32,7 +35,7 @@ export default function DashboardPage() {
   // Custom hooks
   const { userId, userEmail, userName, logout } = useAuth();
   const { outfits, loading: loadingOutfits, uploading, uploadMessage, uploadOutfit, deleteOutfit, updateOutfit } = useOutfits(userId, activeSection);
-  const { suggestedOutfits, compositeImageUrl, loading: loadingSuggestions, query, setQuery, getSuggestions, suggestionQuery, setSuggestionQuery, todayWeather } = useSuggestions(userId, temperature, activeSection);
+  const { suggestedOutfits, compositeImageUrl, compositeManifest, loading: loadingSuggestions, query, setQuery, getSuggestions, suggestionQuery, setSuggestionQuery, todayWeather } = useSuggestions(userId, temperature, activeSection);
   const { weeklyOutfits, loading: loadingWeekPlan, progress: weekPlanProgress, planWeek } = useWeekPlanning(temperature);
   const { outfitModal, confirmModal, alertModal } = useModals();
 
@@ -127,23 +130,31 @@ export default function DashboardPage() {
   };
 
   const handleChatSend = async (message: string) => {
-    setChatMessages(prev => [...prev, { role: 'user', content: message }]);
+    // Add the user message and an empty AI message that fills in as tokens arrive
+    setChatMessages(prev => [...prev, { role: 'user', content: message }, { role: 'ai', content: '' }]);
     setChatInput('');
 
+    const updateLastMessage = (update: (last: ChatMessage) => ChatMessage) => {
+      setChatMessages(prev => [...prev.slice(0, -1), update(prev[prev.length - 1])]);
+    };
+
     try {
-      // Call the outfit chat API
-      const response = await outfitChat(message, temperature);
-      setChatMessages(prev => [...prev, {
+      // Stream the outfit chat response
+      const response = await streamOutfitChat(message, (text) => {
+        updateLastMessage(last => ({ ...last, content: last.content + text }));
+      }, { temperature, sessionId: chatSessionId });
+      setChatSessionId(response.session_id);
+      updateLastMessage(() => ({
         role: 'ai',
         content: response.response,
         image_urls: response.image_urls
-      }]);
+      }));
     } catch (error) {
       console.error('Chat error:', error);
-      setChatMessages(prev => [...prev, {
+      updateLastMessage(() => ({
         role: 'ai',
         content: 'Sorry, I encountered an error while processing your message. Please try again.'
-      }]);
+      }));
     }
   };
 
@@ -183,6 +194,7 @@ export default function DashboardPage() {
           onGetSuggestions={handleGetSuggestions}
           suggestedOutfits={suggestedOutfits}
           compositeImageUrl={compositeImageUrl}
+          compositeManifest={compositeManifest}
           loadingSuggestions={loadingSuggestions}
           query={query}
           onQueryChange={setQuery}
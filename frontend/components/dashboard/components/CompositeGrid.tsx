@@ -0,0 +1,57 @@
+'use client';
+
+import { memo } from 'react';
+import type { LayoutManifest } from '@/lib/api';
+
+interface CompositeGridProps {
+  manifest: LayoutManifest;
+  alt: string;
+  className?: string;
+}
+
+/**
+ * Composes an outfit grid from a layout manifest, matching the composite
+ * image the backend renders. Size it through className (full width by default);
+ * the manifest's aspect ratio is kept.
+ */
+function CompositeGrid({ manifest, alt, className = 'w-full' }: CompositeGridProps) {
+  const percentX = (value: number) => `${(value / manifest.width) * 100}%`;
+  const percentY = (value: number) => `${(value / manifest.height) * 100}%`;
+  // Percentage padding is relative to the grid's width, border radius to the cell's own size
+  const cellPadding = percentX(manifest.padding);
+  const cellRadius = `${(manifest.border_radius / manifest.cell_size) * 100}%`;
+
+  return (
+    <div
+      role="img"
+      aria-label={alt}
+      className={`relative bg-white ${className}`}
+      style={{ aspectRatio: `${manifest.width} / ${manifest.height}` }}
+    >
+      {manifest.cells.map((cell) => (
+        <div
+          key={cell.outfit_id}
+          className="absolute bg-white overflow-hidden"
+          style={{
+            left: percentX(cell.x),
+            top: percentY(cell.y),
+            width: percentX(manifest.cell_size),
+            height: percentY(manifest.cell_size),
+            padding: cellPadding,
+            borderRadius: cellRadius,
+          }}
+        >
+          <img
+            src={cell.image_url}
+            alt=""
+            className="w-full h-full object-contain"
+            loading="lazy"
+            decoding="async"
+          />
+        </div>
+      ))}
+    </div>
+  );
+}
+
+export default memo(CompositeGrid);
@@ -2,7 +2,7 @@
 
 import { useState, memo } from 'react';
 import { Shirt, AlertCircle } from 'lucide-react';
-import type { Outfit } from '@/lib/api';
+import { outfitSrcSet, type Outfit } from '@/lib/api';
 
 interface OutfitCardProps {
   outfit: Outfit;
@@ -63,7 +63,9 @@ function OutfitCard({
       {/* Image */}
       {!imageError && (
         <img 
-          src={outfit.image_url} 
+          src={outfit.thumbnail_url || outfit.image_url}
+          srcSet={outfitSrcSet(outfit)}
+          sizes="(min-width: 1280px) 20vw, (min-width: 1024px) 25vw, (min-width: 640px) 33vw, 50vw"
           alt={`${outfit.tags?.category || 'Outfit'} ${outfit.outfit_id}`}
           className={`w-full h-full object-cover transition-opacity duration-300 ${
             imageLoaded ? 'opacity-100' : 'opacity-0'
@@ -1,6 +1,7 @@
 'use client';
 
 import { Shirt, Thermometer, Calendar } from 'lucide-react';
+import CompositeGrid from './CompositeGrid';
 import type { WeeklyOutfitDay } from '@/lib/api';
 
 interface WeekCarouselProps {
@@ -105,6 +106,13 @@ export default function WeekCarousel({ weeklyOutfits }: WeekCarouselProps) {
                     }}
                     loading="lazy"
                   />
+                ) : dayOutfit.composite_manifest ? (
+                  // Composed in the browser until the rendered composite is ready
+                  <CompositeGrid
+                    manifest={dayOutfit.composite_manifest}
+                    alt={`${dayOutfit.day} outfit`}
+                    className="h-full max-w-full mx-auto"
+                  />
                 ) : (
                   <div className="w-full h-full flex items-center justify-center bg-gray-200 text-gray-400">
                     <Shirt className="w-16 h-16" />
@@ -2,11 +2,12 @@
 
 import { useState, useEffect } from 'react';
 import { suggestOutfits } from '@/lib/api';
-import type { Outfit, SuggestOutfitResponse } from '@/lib/api';
+import type { LayoutManifest, Outfit, SuggestOutfitResponse } from '@/lib/api';
 
 export function useSuggestions(userId: string | null, temperature: number, activeSection: string) {
   const [suggestedOutfits, setSuggestedOutfits] = useState<Outfit[]>([]);
   const [compositeImageUrl, setCompositeImageUrl] = useState<string | null>(null);
+  const [compositeManifest, setCompositeManifest] = useState<LayoutManifest | null>(null);
   const [loading, setLoading] = useState(false);
   const [query, setQuery] = useState<string>('');
   const [suggestionQuery, setSuggestionQuery] = useState<string>('');
@@ -22,11 +23,13 @@ export function useSuggestions(userId: string | null, temperature: number, activ
           const response = await suggestOutfits(
             temperature,
             query.trim() || undefined,
-            undefined // condition will be fetched from weather
+            undefined, // condition will be fetched from weather
+            'manifest' // composed in the browser; nothing is rendered or uploaded
           );
 
           setSuggestedOutfits(response.outfits || []);
           setCompositeImageUrl(response.composite_image_url || null);
+          setCompositeManifest(response.composite_manifest || null);
 
           // Set weather data from response
           if (response.weather) {
@@ -53,11 +56,13 @@ export function useSuggestions(userId: string | null, temperature: number, activ
       const response = await suggestOutfits(
         temperature,
         queryParam || query.trim() || undefined,
-        undefined // condition will be fetched from weather
+        undefined, // condition will be fetched from weather
+        'manifest'
       );
 
       setSuggestedOutfits(response.outfits || []);
       setCompositeImageUrl(response.composite_image_url || null);
+      setCompositeManifest(response.composite_manifest || null);
 
       // Update weather data from response
       if (response.weather) {
@@ -80,6 +85,7 @@ export function useSuggestions(userId: string | null, temperature: number, activ
   return {
     suggestedOutfits,
     compositeImageUrl,
+    compositeManifest,
     loading,
     query,
     setQuery,
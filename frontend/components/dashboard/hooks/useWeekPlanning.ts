@@ -1,13 +1,16 @@
 'use client';
 
 import { useState, useEffect } from 'react';
-import { createWeeklyPlan, getWeeklyPlan } from '@/lib/api';
+import { createWeeklyPlan, getWeeklyPlan, openWeeklyPlanEvents } from '@/lib/api';
 import type { WeeklyPlan, DailyPlan, WeeklyOutfitDay } from '@/lib/api';
 
+// Days in the rolling plan generated by the backend
+const PLAN_DAYS = 7;
+
 export function useWeekPlanning(temperature: number) {
   const [weeklyPlan, setWeeklyPlan] = useState<WeeklyPlan | null>(null);
   const [loading, setLoading] = useState(false);
-  const [progress, setProgress] = useState({ current: 0, total: 3 });
+  const [progress, setProgress] = useState({ current: 0, total: PLAN_DAYS });
 
   // Load existing weekly plan on mount
   useEffect(() => {
@@ -24,24 +27,49 @@ export function useWeekPlanning(temperature: number) {
     loadWeeklyPlan();
   }, []);
 
-  const planWeek = async () => {
-    setLoading(true);
-    setProgress({ current: 0, total: 3 });
+  // Follow the plan's event stream, updating day cards as composites are ready
+  const followPlanEvents = () =>
+    new Promise<void>((resolve) => {
+      const events = openWeeklyPlanEvents();
+      const finish = () => {
+        events.close();
+        resolve();
+      };
 
-    try {
-      // Simulate progress for 3 days
-      setProgress({ current: 1, total: 3 });
-      await new Promise(resolve => setTimeout(resolve, 500));
+      events.addEventListener('plan', (event) => {
+        const plan: WeeklyPlan = JSON.parse((event as MessageEvent).data);
+        const days = Object.values(plan.daily_plans);
+        setWeeklyPlan(plan);
+        setProgress({ current: days.filter(day => day.image_url).length, total: days.length });
+        setLoading(false);
+      });
 
-      setProgress({ current: 2, total: 3 });
-      await new Promise(resolve => setTimeout(resolve, 500));
+      events.addEventListener('day', (event) => {
+        const { day_key, image_url } = JSON.parse((event as MessageEvent).data);
+        setWeeklyPlan(plan => plan && {
+          ...plan,
+          daily_plans: {
+            ...plan.daily_plans,
+            [day_key]: { ...plan.daily_plans[day_key], image_url },
+          },
+        });
+        setProgress(progress => ({ ...progress, current: Math.min(progress.current + 1, progress.total) }));
+      });
 
-      // Create new weekly plan
-      await createWeeklyPlan(temperature);
+      events.addEventListener('complete', finish);
+      events.onerror = finish;
+    });
 
-      setProgress({ current: 3, total: 3 });
+  const planWeek = async () => {
+    setLoading(true);
+    setProgress({ current: 0, total: PLAN_DAYS });
+
+    try {
+      // Plan is stored immediately; composites arrive through the event stream
+      await createWeeklyPlan(temperature, true);
+      await followPlanEvents();
 
-      // Load the newly created plan
+      // Load the final plan in case any events were missed
       const response = await getWeeklyPlan();
       if (response.weekly_plans && response.weekly_plans.length > 0) {
         setWeeklyPlan(response.weekly_plans[0]);
@@ -50,7 +78,7 @@ export function useWeekPlanning(temperature: number) {
       throw error;
     } finally {
       setLoading(false);
-      setProgress({ current: 0, total: 3 });
+      setProgress({ current: 0, total: PLAN_DAYS });
     }
   };
 
@@ -58,8 +86,9 @@ export function useWeekPlanning(temperature: number) {
   const getWeeklyOutfits = () => {
     if (!weeklyPlan) return [];
 
-    const daysOfWeek = ['day1', 'day2', 'day3'];
-    return daysOfWeek.map(dayKey => {
+    const dayKeys = Object.keys(weeklyPlan.daily_plans)
+      .sort((a, b) => weeklyPlan.daily_plans[a].date.localeCompare(weeklyPlan.daily_plans[b].date));
+    return dayKeys.map(dayKey => {
       const dailyPlan = weeklyPlan.daily_plans[dayKey];
       if (!dailyPlan || !dailyPlan.outfit_ids.length) return null;
 
@@ -76,6 +105,7 @@ export function useWeekPlanning(temperature: number) {
         day: dailyPlan.day,
         outfit: mockOutfit,
         composite_image_url: dailyPlan.image_url,
+        composite_manifest: dailyPlan.composite_manifest,
         temperature: dailyPlan.temperature,
         condition: dailyPlan.condition,
         condition_icon: dailyPlan.condition_icon
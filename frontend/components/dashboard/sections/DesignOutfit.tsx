@@ -133,7 +133,7 @@ export default function DesignOutfit({ outfits, loadingOutfits }: DesignOutfitPr
                   <div className="relative group">
                     <div className="aspect-square rounded-lg overflow-hidden border-2 border-[#0095da] bg-gray-100">
                       <img
-                        src={outfit.image_url}
+                        src={outfit.thumbnail_url || outfit.image_url}
                         alt={category}
                         className="w-full h-full object-cover"
                       />
@@ -166,7 +166,7 @@ export default function DesignOutfit({ outfits, loadingOutfits }: DesignOutfitPr
                 {selectedItemsArray.map((outfit, index) => (
                   <img
                     key={index}
-                    src={outfit.image_url}
+                    src={outfit.thumbnail_url || outfit.image_url}
                     alt={`Item ${index + 1}`}
                     className="w-full h-32 object-cover rounded"
                   />
@@ -3,7 +3,8 @@
 import { Sparkles, MessageCircle } from 'lucide-react';
 import TemperatureDisplay from '../components/TemperatureDisplay';
 import QueryInput from '../components/QueryInput';
-import type { Outfit } from '@/lib/api';
+import CompositeGrid from '../components/CompositeGrid';
+import type { LayoutManifest, Outfit } from '@/lib/api';
 
 interface TodaysSuggestionsProps {
   temperature: number;
@@ -11,6 +12,7 @@ interface TodaysSuggestionsProps {
   onGetSuggestions: (query?: string) => Promise<void>;
   suggestedOutfits: Outfit[];
   compositeImageUrl: string | null;
+  compositeManifest: LayoutManifest | null;
   loadingSuggestions: boolean;
   query: string;
   onQueryChange: (query: string) => void;
@@ -25,6 +27,7 @@ export default function TodaysSuggestions({
   onGetSuggestions,
   suggestedOutfits,
   compositeImageUrl,
+  compositeManifest,
   loadingSuggestions,
   query,
   onQueryChange,
@@ -135,12 +138,18 @@ export default function TodaysSuggestions({
                 <p className="text-sm sm:text-base text-gray-600 font-medium">Loading new outfit...</p>
               </div>
             </div>
-            {compositeImageUrl && (
+            {compositeImageUrl ? (
               <img 
                 src={compositeImageUrl} 
                 alt="Previous outfit"
                 className="w-full h-full object-contain opacity-30 rounded-xl sm:rounded-2xl"
               />
+            ) : compositeManifest && (
+              <CompositeGrid
+                manifest={compositeManifest}
+                alt="Previous outfit"
+                className="w-full opacity-30 rounded-xl sm:rounded-2xl"
+              />
             )}
           </div>
         ) : compositeImageUrl ? (
@@ -166,6 +175,12 @@ export default function TodaysSuggestions({
               />
             </div>
           </div>
+        ) : compositeManifest ? (
+          <div className="w-full overflow-hidden rounded-xl sm:rounded-2xl">
+            <div className="rounded-xl sm:rounded-2xl overflow-hidden shadow-2xl w-full border-2 sm:border-4 border-gray-100">
+              <CompositeGrid manifest={compositeManifest} alt="Suggested outfit composite" />
+            </div>
+          </div>
         ) : (
           <div className="w-full min-h-[300px] sm:min-h-[400px] bg-gradient-to-br from-gray-50 to-gray-100 rounded-xl sm:rounded-2xl flex items-center justify-center border-2 border-dashed border-gray-300">
             <div className="text-center">
@@ -32,7 +32,7 @@ export default function WeekPlanning({
               Generating Your Weekly Plan
             </h2>
             <p className="text-gray-600">
-              Creating outfits for the next 3 days...
+              Creating outfits for the next 7 days...
             </p>
           </div>
           
@@ -72,7 +72,7 @@ export default function WeekPlanning({
             Plan your week
           </h2>
           <p className="text-gray-600 mb-2">
-            Plan outfits for the next 3 days based on your schedule and weather
+            Plan outfits for the next 7 days based on your schedule and weather
           </p>
           <button 
             onClick={onPlanWeek}
@@ -83,7 +83,7 @@ export default function WeekPlanning({
             Plan Week
           </button>
           <p className="mt-4 text-sm text-gray-500">
-            3-Day view • Weather forecast • Schedule integration
+            7-Day view • Weather forecast • Schedule integration
           </p>
         </div>
       </div>
@@ -98,7 +98,7 @@ export default function WeekPlanning({
             Your Weekly Plan
           </h2>
           <p className="text-sm text-gray-500 mt-1">
-            Outfits for the next 3 days
+            Outfits for the next 7 days
           </p>
         </div>
         <button 
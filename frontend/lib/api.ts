@@ -129,6 +129,20 @@ export interface Outfit {
   wardrobe_id: string;
   image_url: string;
   tags: Record<string, any>;
+  /** Smaller WebP copy of the image for grids, if the item has one */
+  thumbnail_url?: string;
+  /** WebP copies of the image by width in pixels */
+  image_variants?: Record<string, string>;
+}
+
+/**
+ * Build an img srcSet from an outfit's image variants
+ */
+export function outfitSrcSet(outfit: Outfit): string | undefined {
+  if (!outfit.image_variants) return undefined;
+  return Object.entries(outfit.image_variants)
+    .map(([width, url]) => `${url} ${width}w`)
+    .join(', ');
 }
 
 export interface GetOutfitsResponse {
@@ -156,6 +170,30 @@ export async function getOutfits(wardrobeId: string): Promise<GetOutfitsResponse
   return apiFetch<GetOutfitsResponse>('/outfit/get-outfits', { method: 'GET' });
 }
 
+export interface SearchOutfitsResponse {
+  outfits: Outfit[];
+  total: number;
+  /** Attribute -> lowercase value -> number of outfits, ignoring the attribute's own filter */
+  facets: Record<string, Record<string, number>>;
+}
+
+/**
+ * Search the wardrobe by tags, e.g. { color: ['black', 'navy'], season: ['winter'] },
+ * with value counts for the given tag attributes
+ */
+export async function searchOutfits(
+  filters: Record<string, string[]> = {},
+  facets?: string[],
+  skip = 0,
+  limit = 50
+): Promise<SearchOutfitsResponse> {
+  return apiFetch<SearchOutfitsResponse>('/outfit/search', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filters, facets, skip, limit }),
+  });
+}
+
 export interface DeleteOutfitResponse {
   result: boolean;
   message: string;
@@ -187,6 +225,26 @@ export interface SuggestOutfitRequest {
   temperature?: number;
   query?: string;
   condition?: string;
+  composite_mode?: 'image' | 'manifest';
+}
+
+export interface LayoutCell {
+  x: number;
+  y: number;
+  outfit_id: string;
+  image_url: string;
+}
+
+/** Composite layout for composing on the client, in canvas pixels */
+export interface LayoutManifest {
+  layout: 'grid';
+  width: number;
+  height: number;
+  /** Cells are square; images fit within cell_size - 2 * padding, centered on white */
+  cell_size: number;
+  padding: number;
+  border_radius: number;
+  cells: LayoutCell[];
 }
 
 export interface WeatherData {
@@ -202,19 +260,26 @@ export interface WeatherData {
 export interface SuggestOutfitResponse {
   outfits: Outfit[];
   composite_image_url?: string;
+  composite_manifest?: LayoutManifest;
   weather?: WeatherData;
   result: boolean;
   message: string;
 }
 
 /**
- * Get suggested outfits
+ * Get suggested outfits. In 'manifest' mode no composite image is rendered;
+ * compose it from composite_manifest instead.
  */
-export async function suggestOutfits(temperature?: number, query?: string, condition?: string): Promise<SuggestOutfitResponse> {
+export async function suggestOutfits(
+  temperature?: number,
+  query?: string,
+  condition?: string,
+  compositeMode: 'image' | 'manifest' = 'image'
+): Promise<SuggestOutfitResponse> {
   return apiFetch<SuggestOutfitResponse>('/outfit/suggest-outfit', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ temperature, query, condition }),
+    body: JSON.stringify({ temperature, query, condition, composite_mode: compositeMode }),
   });
 }
 
@@ -223,6 +288,10 @@ export interface DailyPlan {
   day: string;
   image_url?: string;
   outfit_ids: string[];
+  temperature?: number;
+  condition?: string;
+  condition_icon?: string;
+  composite_manifest?: LayoutManifest;
 }
 
 export interface WeeklyPlan {
@@ -231,10 +300,13 @@ export interface WeeklyPlan {
   created_at: string;
   week_start: string;
   daily_plans: Record<string, DailyPlan>;
+  status?: 'pending' | 'complete' | 'failed';
 }
 
 export interface CreateWeeklyPlanResponse {
   result: boolean;
+  plan_id?: string;
+  status?: string;
   message: string;
 }
 
@@ -246,6 +318,7 @@ export interface WeeklyOutfitDay {
   day: string;
   outfit: Outfit;
   composite_image_url?: string;
+  composite_manifest?: LayoutManifest;
   temperature?: number;
   condition?: string;
   condition_icon?: string;
@@ -255,6 +328,7 @@ export interface ChatRequest {
   message: string;
   temperature?: number;
   context?: Record<string, any>;
+  session_id?: string;
 }
 
 export interface ChatResponse {
@@ -262,16 +336,17 @@ export interface ChatResponse {
   image_urls?: string[];
   result: boolean;
   message: string;
+  session_id?: string;
 }
 
 /**
- * Create weekly outfit plan
+ * Create weekly outfit plan, or roll the existing one forward unless regenerate is set
  */
-export async function createWeeklyPlan(temperature?: number): Promise<CreateWeeklyPlanResponse> {
+export async function createWeeklyPlan(temperature?: number, regenerate = false): Promise<CreateWeeklyPlanResponse> {
   return apiFetch<CreateWeeklyPlanResponse>('/weekly/create-plan', {
     method: 'PUT',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ temperature }),
+    body: JSON.stringify({ temperature, regenerate }),
   });
 }
 
@@ -284,6 +359,14 @@ export async function getWeeklyPlan(): Promise<GetWeeklyPlanResponse> {
   });
 }
 
+/**
+ * Open a server-sent event stream with the progress of the current weekly plan.
+ * Emits `plan` (full plan), `day` ({ day_key, image_url }) and `complete` ({ status }) events.
+ */
+export function openWeeklyPlanEvents(): EventSource {
+  return new EventSource(`${API_BASE_URL}/weekly/plan/events`, { withCredentials: true });
+}
+
 /**
  * Chat about outfits and fashion with AI
  */
@@ -295,4 +378,69 @@ export async function outfitChat(message: string, temperature?: number, context?
   });
 }
 
+/**
+ * Chat about outfits and fashion with AI, receiving the response as it is generated.
+ * onToken is called with each piece of text; resolves with the full response.
+ * Pass the session_id of the previous response to continue the conversation.
+ * Aborting the signal stops generation on the server.
+ */
+export async function streamOutfitChat(
+  message: string,
+  onToken: (text: string) => void,
+  options: { temperature?: number; context?: Record<string, any>; sessionId?: string; signal?: AbortSignal } = {}
+): Promise<ChatResponse> {
+  const response = await fetch(`${API_BASE_URL}/chat/outfit-chat/stream`, {
+    method: 'POST',
+    credentials: 'include',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      message,
+      temperature: options.temperature,
+      context: options.context,
+      session_id: options.sessionId,
+    }),
+    signal: options.signal,
+  });
+
+  if (response.status === 401) {
+    handleUnauthorized();
+    throw new Error('Unauthorized');
+  }
+  if (!response.ok || !response.body) {
+    const err = await parseJsonSafe(response);
+    throw new Error((err && err.detail) || 'Request failed');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const rawEvent = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+
+      const payload = data ? JSON.parse(data) : {};
+      if (event === 'token') onToken(payload.text);
+      else if (event === 'done') return payload as ChatResponse;
+      else if (event === 'error') throw new Error(payload.detail || 'Chat failed');
+    }
+  }
+
+  throw new Error('Chat stream ended unexpectedly');
+}
+
 